@@ -18,13 +18,18 @@ class DiaryPhotoInline(admin.TabularInline):
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'created_at']
+    list_display = ['user', 'entry_count', 'followers_count', 'following_count', 'created_at']
+    list_select_related = ['user']
+    show_full_result_count = False
     search_fields = ['user__username', 'user__email']
+    readonly_fields = ['entry_count', 'public_entry_count', 'followers_count', 'following_count']
 
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ['follower', 'following', 'created_at']
+    list_select_related = ['follower', 'following']
+    show_full_result_count = False
     list_filter = ['created_at']
     search_fields = ['follower__username', 'following__username']
 
@@ -32,6 +37,8 @@ class FollowAdmin(admin.ModelAdmin):
 @admin.register(DiaryEntry)
 class DiaryEntryAdmin(admin.ModelAdmin):
     list_display = ('author', 'title', 'privacy', 'created_at')
+    list_select_related = ('author',)
+    show_full_result_count = False
     list_filter = ('privacy', 'created_at', 'author')
     search_fields = ('title', 'content', 'author__username')
     inlines = [DiaryPhotoInline] # Fotoğraf yöneticisini göm
@@ -41,6 +48,8 @@ class DiaryEntryAdmin(admin.ModelAdmin):
 @admin.register(DiaryPhoto)
 class DiaryPhotoAdmin(admin.ModelAdmin):
     list_display = ('entry_title', 'image_preview', 'uploaded_at')
+    list_select_related = ('diary_entry',)
+    show_full_result_count = False
     list_filter = ('uploaded_at',)
     search_fields = ('diary_entry__title', 'diary_entry__author__username')
     readonly_fields = ('image_preview',)
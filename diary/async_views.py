@@ -0,0 +1,199 @@
+"""
+ASGI altında kullanılan asenkron görünümler: home, profile ve follow_user.
+
+Veritabanı beklemeleri Django'nun asenkron ORM'i (aexists, aget_or_create,
+adelete, async for) ile yapılır; istek bir işçi iş parçacığını tutmaz.
+Şablonlar ve önbellek eşzamanlı olduğundan sync_to_async ile çizilir.
+
+DIARY_ASYNC_VIEWS açıkken (asgi.py varsayılan olarak açar) urls.py bu
+görünümleri kullanır; WSGI altında views.py'deki eşzamanlı sürümler çalışır.
+Anlık bildirim akışı (feed_stream) sadece burada gerçekten açık tutulur.
+"""
+import asyncio
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.db import connections
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from . import authcache
+from .cards import render_cards
+from .conditional import afeed_etag, afeed_page, aprofile_etag, aprofile_user, etag_condition, private_cache
+from .feeds import LANDING_ENTRIES, recent_public_entries
+from .models import Follow, TimelineEntry, UserProfile
+from .pagination import apaginate
+from .realtime import MAX_IDS, format_event, get_broker, heartbeat_seconds, max_age_seconds
+from .routers import primary_db
+from .suggestions import suggestions_for
+from .views import _profile_entries
+
+arender = sync_to_async(render)
+
+# Bağlantı koparsa tarayıcının yeniden bağlanmadan önce beklediği süre (ms)
+STREAM_RETRY_MS = 5000
+
+
+async def aget_user(request):
+    """
+    request.user tembel bir nesnedir ve ilk erişimde veritabanına gider.
+    Django 4.2'de request.auser() olmadığından bir kez eşzamanlı çözülür.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def async_login_required(view_func):
+    # django.contrib.auth.decorators.login_required 4.2'de asenkron görünümleri desteklemez
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+async def _aget_user_or_404(username):
+    try:
+        return await User.objects.aget(username=username)
+    except User.DoesNotExist:
+        raise Http404('Kullanıcı bulunamadı.')
+
+
+@private_cache
+@etag_condition(afeed_etag)
+async def home(request):
+    """Ana sayfa akışı"""
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        cards = await sync_to_async(lambda: render_cards(recent_public_entries(LANDING_ENTRIES)))()
+        return await arender(request, 'diary/landing.html', {'cards': cards})
+
+    page_obj = await afeed_page(request)
+    cards = await sync_to_async(render_cards)(page_obj.object_list)
+    suggestions = await sync_to_async(suggestions_for)(user)
+    return await arender(request, 'diary/home.html', {
+        'page_obj': page_obj,
+        'cards': cards,
+        'suggestions': suggestions,
+    })
+
+
+@private_cache
+@async_login_required
+@etag_condition(aprofile_etag)
+async def profile(request, username=None):
+    """Profil sayfası - kendi veya başkasının günlükleri"""
+    if username:
+        # ETag hesaplanırken yüklendi (bkz. diary.conditional)
+        user = await aprofile_user(request, username)
+        if user is None:
+            raise Http404('Kullanıcı bulunamadı.')
+        is_own_profile = user.pk == request.user.pk
+    else:
+        user, is_own_profile = request.user, True
+
+    profile, created = await UserProfile.objects.aget_or_create(user=user)
+    if created:
+        await profile.arefresh_from_db(fields=UserProfile.COUNTER_FIELDS)
+
+    entries = _profile_entries(user, is_own_profile)
+    page_obj = await apaginate(entries.select_related('author').prefetch_related('photos'), request)
+
+    is_following = False
+    if not is_own_profile:
+        is_following = await sync_to_async(authcache.is_following)(request.user, user.pk)
+
+    return await arender(request, 'diary/profile.html', {
+        'profile_user': user,
+        'profile': profile,
+        'entries': page_obj,
+        'entry_count': profile.entry_count if is_own_profile else profile.public_entry_count,
+        'is_own_profile': is_own_profile,
+        'is_following': is_following,
+    })
+
+
+@primary_db
+@async_login_required
+async def follow_user(request, username):
+    """Kullanıcıyı takip et/takibi bırak"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    user_to_follow = await _aget_user_or_404(username)
+    if user_to_follow.pk == request.user.pk:
+        return JsonResponse({'error': 'Kendinizi takip edemezsiniz.'}, status=400)
+
+    # transaction.atomic 4.2'de asenkron kodda kullanılamaz. Sayaçlar sadece
+    # satırı gerçekten ekleyen/silen istekte değişir; yarıda kalan bir
+    # istekteki kayma reconcile_counters ile düzeltilir.
+    follow_obj, created = await Follow.objects.aget_or_create(
+        follower_id=request.user.pk, following=user_to_follow
+    )
+    if created:
+        delta = 1
+    else:
+        deleted, _ = await Follow.objects.filter(pk=follow_obj.pk).adelete()
+        delta = -1 if deleted else 0
+
+    await UserProfile.aadjust_counters(request.user.pk, following_count=delta)
+    await UserProfile.aadjust_counters(user_to_follow.pk, followers_count=delta)
+
+    followers_count = await UserProfile.objects.filter(user=user_to_follow).values_list(
+        'followers_count', flat=True
+    ).afirst()
+    return JsonResponse({'is_following': created, 'followers_count': followers_count})
+
+
+async def _stream_position(user_id, last_event_id):
+    """
+    Yeniden bağlanan tarayıcının kaçırdığı girişler (Last-Event-ID'den
+    sonrakiler) ya da ilk bağlantıda akıştaki en yeni girişin ID'si.
+    """
+    rows = TimelineEntry.objects.filter(user_id=user_id).exclude(author_id=user_id)
+    if last_event_id.isdigit():
+        missed = rows.filter(entry_id__gt=int(last_event_id)).values_list('entry_id', flat=True)
+        return [entry_id async for entry_id in missed[:MAX_IDS]], None
+    latest = await rows.order_by('-created_at', '-entry_id').values_list('entry_id', flat=True).afirst()
+    return [], latest
+
+
+@async_login_required
+async def feed_stream(request):
+    """Takip edilen kişilerin yeni girişleri için server-sent events akışı"""
+    broker = get_broker()
+    subscription = broker.subscribe(request.user.pk)
+    try:
+        # Bütün veritabanı okumaları akış başlamadan biter; akış sırasında
+        # eşzamanlı kod çalışmaz ve boştaki bağlantı veritabanı bağlantısı tutmaz
+        missed, latest = await _stream_position(request.user.pk, request.headers.get('Last-Event-ID', ''))
+        await sync_to_async(connections.close_all)()
+    except BaseException:
+        broker.unsubscribe(subscription)
+        raise
+
+    async def events():
+        try:
+            opening = [f'retry: {STREAM_RETRY_MS}']
+            if latest:
+                opening.append(f'id: {latest}')
+            yield '\n'.join(opening) + '\n\n'
+            if missed:
+                yield format_event(missed)
+            # Django 4.2 ASGI'de kopan bağlantıyı akış sırasında fark etmez;
+            # akış DIARY_REALTIME_MAX_AGE sonunda kapanır ve tarayıcı yeniden bağlanır.
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max_age_seconds()
+            while (remaining := deadline - loop.time()) > 0:
+                entry_ids, dropped = await subscription.next_batch(min(heartbeat_seconds(), remaining))
+                yield format_event(entry_ids, dropped) if entry_ids else ': ping\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx gibi vekillerin olayları tamponlamaması için
+    response['X-Accel-Buffering'] = 'no'
+    return response
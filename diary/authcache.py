@@ -0,0 +1,110 @@
+"""
+Oturumlu isteklerde kullanıcı, profil ve takip edilenlerin önbelleği.
+
+Varsayılan AuthenticationMiddleware her istekte kullanıcıyı veritabanından
+okur. CachedAuthenticationMiddleware kullanıcıyı profiliyle birlikte
+önbellekten getirir; oturumdaki parola özeti yine önbellekteki kullanıcıyla
+karşılaştırılır, tutmazsa Django'nun normal yoluna düşülür. Takip edilen
+kullanıcıların ID kümesi de ayrı bir anahtarda tutulur.
+
+Kullanıcı, profil, giriş/çıkış ve takip değişikliklerinde anahtarlar
+silinir (bkz. diary.signals). Süreç içi önbellek diğer süreçlerde
+geçersiz kılınamadığından DIARY_AUTH_CACHE sadece paylaşılan bir önbellekle
+ya da tek süreçle açılmalıdır; kapalıyken her şey veritabanından okunur.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from .models import Follow, UserProfile
+
+
+def enabled():
+    return getattr(settings, 'DIARY_AUTH_CACHE', False)
+
+
+def _timeout():
+    return getattr(settings, 'DIARY_AUTH_CACHE_TIMEOUT', 60 * 60)
+
+
+def _user_key(user_id):
+    return f'diary:auth-user:{user_id}'
+
+
+def _following_key(user_id):
+    return f'diary:following:{user_id}'
+
+
+def invalidate_user(user_id):
+    if enabled():
+        cache.delete(_user_key(user_id))
+
+
+def invalidate_following(user_id):
+    if enabled():
+        cache.delete(_following_key(user_id))
+
+
+def _load_user(request):
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        profile = UserProfile.objects.filter(user=user).first()
+        if profile is not None:
+            user.userprofile = profile
+        cache.set(_user_key(user.pk), user, _timeout())
+    return user
+
+
+def get_user(request):
+    """
+    django.contrib.auth.get_user gibi; önbellekteki kullanıcı sadece oturum
+    bilinen bir arka uçla açılmışsa ve parola özeti tutuyorsa kullanılır.
+    """
+    if not enabled():
+        return auth.get_user(request)
+    user_id = request.session.get(auth.SESSION_KEY)
+    if user_id is None or request.session.get(auth.BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    user = cache.get(_user_key(user_id))
+    if user is None:
+        return _load_user(request)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if session_hash and constant_time_compare(session_hash, user.get_session_auth_hash()):
+        return user
+    # Parola değişmiş ya da SECRET_KEY_FALLBACKS ile imzalanmış oturum
+    return _load_user(request)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def cached_profile(user):
+    """Önbellekten gelen kullanıcıyla yüklenmiş profil; yüklenmemişse sorgu yapmadan None"""
+    if User.userprofile.is_cached(user):
+        return user.userprofile
+    return None
+
+
+def following_ids(user):
+    """Kullanıcının takip ettiklerinin ID kümesi"""
+    if not enabled():
+        return frozenset(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+    key = _following_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+        cache.set(key, ids, _timeout())
+    return ids
+
+
+def is_following(user, other_id):
+    if enabled():
+        return other_id in following_ids(user)
+    return Follow.objects.filter(follower=user, following_id=other_id).exists()
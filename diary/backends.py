@@ -0,0 +1,42 @@
+"""
+E-posta ile giriş.
+
+Kayıt kullanıcı adını e-postadan üretir ve giriş formu e-posta ister.
+EmailBackend kullanıcıyı LOWER(email) ifade indeksiyle tek sorguda bulur;
+e-posta büyük/küçük harf duyarsızdır ve boş olmayan e-postalar benzersizdir
+(bkz. 0010_user_email_unique). '@' içermeyen girişler (örn. admin) kullanıcı adıyla aranır.
+Parola kontrolü diary.passwords havuzunda yapılır.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Value
+from django.db.models.functions import Lower
+from . import passwords
+
+
+def users_with_email(email):
+    # İki taraf da veritabanında küçültülür; indeksteki ifadeyle aynı olur
+    return get_user_model()._default_manager.alias(email_lower=Lower('email')).filter(
+        email_lower=Lower(Value(email))
+    )
+
+
+class EmailBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        if '@' in username:
+            user = users_with_email(username).first()
+        else:
+            user = get_user_model()._default_manager.filter(username=username).first()
+
+        if user is None:
+            # Kullanıcı yokken de parola özeti hesaplanır; süre farkı hesabın varlığını ele vermez
+            passwords.make_password(password)
+            return None
+        if passwords.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,125 @@
+"""
+İçerik adresli medya dosyalarının referans sayımı.
+
+Aynı dosya birden çok DiaryPhoto/UserProfile satırı tarafından
+paylaşılabilir. Satır dosyayı kullanmaya başlayınca acquire, bırakınca
+release çağrılır; sayaç sıfıra inince dosya ve boyut kopyaları silinir.
+MediaBlob kaydı olmayan (eski, taşınmamış) dosyalara dokunulmaz.
+
+Depolama dosyayı yazmadan (ya da var olan dosyayı paylaşmadan) önce
+reserve ile kaydı ayırır. Ayrılmış kayıt RESERVATION_TTL boyunca sayaç
+sıfır olsa da silinmez; böylece aynı içeriği yükleyen ve acquire'ı henüz
+onaylanmamış bir istek, dosyası başka bir satırın release'i ile silinirken
+yakalanmaz. delete_file kaydın yokluğunu ve silmeyi tek bir işlem içinde,
+kayıt kilidi altında yapar.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import MediaBlob
+from . import renditions
+
+
+# Ayrılmış ama henüz kullanılmayan kayıt bu süre boyunca silinmez
+RESERVATION_TTL = timedelta(hours=1)
+
+
+def _unreserved():
+    return Q(reserved_at__isnull=True) | Q(reserved_at__lt=timezone.now() - RESERVATION_TTL)
+
+
+def reserve(storage, name, size=0):
+    """Dosya yazılmadan önce kaydı ayırır (bkz. ContentAddressedStorage._save)."""
+    with transaction.atomic():
+        updated = MediaBlob.objects.filter(name=name).update(reserved_at=timezone.now())
+        if not updated:
+            MediaBlob.objects.get_or_create(
+                name=name,
+                defaults={'sha256': _digest_from_name(name), 'size': size, 'ref_count': 0,
+                          'reserved_at': timezone.now()},
+            )
+
+
+def acquire(storage, name):
+    if not name or not storage.is_hashed(name):
+        return
+    updated = MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+    if not updated:
+        blob, created = MediaBlob.objects.get_or_create(
+            name=name,
+            defaults={'sha256': _digest_from_name(name), 'size': storage.size(name), 'ref_count': 1},
+        )
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+
+def release(storage, name):
+    if not name or not storage.is_hashed(name):
+        return
+    MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+    deleted, _ = MediaBlob.objects.filter(_unreserved(), name=name, ref_count__lte=0).delete()
+    if deleted:
+        # Dosya, silme işlemi kesinleştikten sonra kaldırılır
+        transaction.on_commit(lambda: delete_file(storage, name))
+
+
+def delete_file(storage, name):
+    # social_diary.db arka ucunda atomic BEGIN IMMEDIATE ile başlar: kontrol ile
+    # silme arasında reserve/acquire yazamaz. Diğer veritabanlarında kayıt kilitlenir.
+    with transaction.atomic():
+        if MediaBlob.objects.select_for_update().filter(name=name).exists():
+            # Bu arada aynı içerik tekrar yüklendi ya da ayrıldı
+            return
+        renditions.delete_for(storage, name)
+        storage.delete(name)
+
+
+def purge_released(storage):
+    """
+    Sayacı sıfıra indiğinde ayrılmış olduğu için silinmeyen kayıtları ve
+    dosyalarını temizler (bkz. process_images). Silinen kayıt sayısını döndürür.
+    """
+    names = list(
+        MediaBlob.objects.filter(_unreserved(), ref_count__lte=0).values_list('name', flat=True)
+    )
+    purged = 0
+    for name in names:
+        if MediaBlob.objects.filter(_unreserved(), name=name, ref_count__lte=0).delete()[0]:
+            delete_file(storage, name)
+            purged += 1
+    return purged
+
+
+def _digest_from_name(name):
+    return name.rsplit('/', 1)[-1].split('.', 1)[0]
+
+
+def recount(storage, sources):
+    """
+    Referans sayaçlarını satırlardan baştan hesaplar.
+    sources: (model, alan adı) çiftleri. Güncellenen kayıt sayısını döndürür.
+    """
+    counts = Counter()
+    for model, field_name in sources:
+        counts.update(
+            name for name in model.objects.values_list(field_name, flat=True).iterator()
+            if name and storage.is_hashed(name)
+        )
+
+    changed = 0
+    for name, ref_count in counts.items():
+        blob, created = MediaBlob.objects.get_or_create(
+            name=name,
+            defaults={'sha256': _digest_from_name(name), 'size': storage.size(name), 'ref_count': ref_count},
+        )
+        if created or blob.ref_count != ref_count:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=ref_count)
+            changed += 1
+
+    for blob in MediaBlob.objects.filter(_unreserved()).exclude(name__in=list(counts)):
+        blob.delete()
+        delete_file(storage, blob.name)
+        changed += 1
+    return changed
@@ -0,0 +1,128 @@
+"""
+Akıştaki günlük kartlarının HTML önbelleği.
+
+Kart anahtarı girişin updated_at değeri ile iki nesil numarasından oluşur:
+
+* giriş nesli: girişin fotoğrafları eklendiğinde, silindiğinde ya da
+  arka planda işlendiğinde artar;
+* yazar nesli: yazarın profili, profil fotoğrafı, adı veya kullanıcı adı
+  değiştiğinde artar.
+
+Nesiller de önbellekte tutulur. Eski anahtarlar silinmez, yeni anahtar
+kullanılmaya başlanınca kendiliğinden düşer. Sıcak bir akış sayfası bu
+yüzden sadece ID listesi sorgusu ve önbellek okumalarıyla çizilir; veritabanından
+yalnızca önbellekte olmayan kartların girişleri yüklenir.
+
+Süreç içi önbellekteki nesiller diğer süreçlerde artmadığından kart önbelleği
+DIARY_CARD_CACHE_ENABLED ile sadece paylaşılan bir önbellekle ya da tek
+süreçle açılmalıdır; kapalıyken kartlar her istekte çizilir.
+"""
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .models import DiaryEntry
+
+CARD_TEMPLATE = 'diary/entry_card.html'
+
+
+def enabled():
+    return getattr(settings, 'DIARY_CARD_CACHE_ENABLED', False)
+
+
+def get_cache():
+    return caches[getattr(settings, 'DIARY_CARD_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'DIARY_CARD_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _entry_gen_key(entry_id):
+    return f'diary:card-gen:entry:{entry_id}'
+
+
+def _author_gen_key(user_id):
+    return f'diary:card-gen:author:{user_id}'
+
+
+def _new_generation():
+    return time.time_ns()
+
+
+def invalidate_entry(entry_id):
+    get_cache().set(_entry_gen_key(entry_id), _new_generation(), None)
+
+
+def invalidate_author(user_id):
+    get_cache().set(_author_gen_key(user_id), _new_generation(), None)
+
+
+def _generations(cache, keys):
+    """
+    Nesilleri toplu okur. Önbellekten düşmüş nesiller yeni bir değerle
+    başlatılır; böylece daha önce kullanılmış bir anahtara geri dönülmez.
+    """
+    found = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return found
+
+
+def card_keys(entries):
+    """entries: id, author_id ve updated_at yüklenmiş girişler."""
+    cache = get_cache()
+    gen_keys = set()
+    for entry in entries:
+        gen_keys.add(_entry_gen_key(entry.id))
+        gen_keys.add(_author_gen_key(entry.author_id))
+    generations = _generations(cache, list(gen_keys))
+
+    return [
+        'diary:card:{}:{}:{}:{}'.format(
+            entry.id,
+            entry.updated_at.timestamp(),
+            generations[_entry_gen_key(entry.id)],
+            generations[_author_gen_key(entry.author_id)],
+        )
+        for entry in entries
+    ]
+
+
+def _load(ids):
+    return (
+        DiaryEntry.objects.select_related('author', 'author__userprofile')
+        .prefetch_related('photos').in_bulk(ids)
+    )
+
+
+def render_cards(entries):
+    """
+    Girişlerin kart HTML'lerini sırasıyla döndürür. entries sadece
+    id/author_id/updated_at alanları yüklenmiş hafif nesneler olabilir.
+    """
+    if not enabled():
+        full = _load([entry.id for entry in entries])
+        return [
+            mark_safe(render_to_string(CARD_TEMPLATE, {'entry': full[entry.id]}))
+            for entry in entries if entry.id in full
+        ]
+
+    cache = get_cache()
+    keys = card_keys(entries)
+    cached = cache.get_many(keys)
+
+    missing_ids = [entry.id for entry, key in zip(entries, keys) if key not in cached]
+    if missing_ids:
+        full = _load(missing_ids)
+        rendered = {}
+        for entry, key in zip(entries, keys):
+            if key not in cached and entry.id in full:
+                rendered[key] = render_to_string(CARD_TEMPLATE, {'entry': full[entry.id]})
+        cache.set_many(rendered, _timeout())
+        cached.update(rendered)
+
+    return [mark_safe(cached[key]) for key in keys if key in cached]
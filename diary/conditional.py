@@ -0,0 +1,219 @@
+"""
+Ana sayfa (ve JSON akışı), profil ve takvim yanıtları için koşullu GET (ETag / 304).
+
+Doğrulayıcılar sayfa çizilmeden, önbellekteki sürüm numaralarından
+hesaplanır:
+
+* profil sürümü: kullanıcının profili, adı, girişleri, fotoğraflarının
+  işlenmesi ya da takipçi/takip sayıları değiştiğinde artar;
+* takip sürümü: kullanıcının takip ettikleri değiştiğinde artar;
+* öneri sürümü: compute_follow_suggestions her çalıştığında artar.
+
+Ana sayfa ve landing doğrulayıcısına ayrıca sayfadaki girişlerin kart anahtarları
+(updated_at ve kart nesilleri, bkz. diary.cards) girer; sayfanın ID listesi
+tek sorguyla alınır ve görünüm aynı sayfayı yeniden sorgulamaz. Sürümler
+işlem onaylandıktan sonra artırılır (bkz. diary.signals).
+
+ETag'ler zayıftır (W/): aynı sayfanın iki çizimi CSRF maskesi yüzünden
+bayt bayt aynı değildir. Oturumdaki CSRF anahtarı ve sorgu parametreleri
+de ETag'e girer. Bekleyen bir flash mesajı varsa ETag üretilmez.
+Yanıtlar 'Cache-Control: private' ile DIARY_PRIVATE_MAX_AGE saniye (varsayılan
+0, her seferinde doğrulama) önbelleğe alınır.
+
+Süreç içi önbellekteki sürümler diğer süreçlerde artmaz ve oradan süresiz
+eski bir 304 dönebilir; ETag'ler DIARY_ETAGS ile sadece paylaşılan bir
+önbellekle ya da tek süreçle açılmalıdır. Kapalıyken doğrulayıcı üretilmez.
+"""
+import hashlib
+import time
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import condition
+from .cards import card_keys
+from .feeds import LANDING_ENTRIES, ahome_feed_page, home_feed_page, recent_public_entries
+
+
+def enabled():
+    return getattr(settings, 'DIARY_ETAGS', False)
+
+
+def _version_key(kind, user_id=''):
+    return f'diary:etag-version:{kind}:{user_id}'
+
+
+def _bump(key):
+    if enabled():
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_profile(*user_ids):
+    for user_id in user_ids:
+        _bump(_version_key('profile', user_id))
+
+
+def bump_following(user_id):
+    _bump(_version_key('following', user_id))
+
+
+def bump_suggestions():
+    _bump(_version_key('suggestions'))
+
+
+def _versions(*keys):
+    # Önbellekten düşen sürüm yeni bir değerle başlar; eski bir ETag'e geri dönülmez
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def make_etag(request, *parts):
+    """Kullanıcıya ve sorgu parametrelerine özgü zayıf ETag; flash mesajı bekliyorsa None"""
+    if len(get_messages(request)):
+        return None
+    parts = (request.user.pk, request.META.get('CSRF_COOKIE', ''), sorted(request.GET.lists())) + parts
+    return 'W/"{}"'.format(hashlib.sha256(repr(parts).encode()).hexdigest()[:32])
+
+
+def feed_page(request):
+    """Ana sayfa akışının bu istekteki sayfası; ETag ve görünüm aynı sayfayı kullanır"""
+    if not hasattr(request, '_diary_feed_page'):
+        request._diary_feed_page = home_feed_page(request.user, request)
+    return request._diary_feed_page
+
+
+async def afeed_page(request):
+    if not hasattr(request, '_diary_feed_page'):
+        request._diary_feed_page = await ahome_feed_page(request.user, request)
+    return request._diary_feed_page
+
+
+def _feed_etag(request, page, variant):
+    user_id = request.user.pk
+    versions = _versions(
+        _version_key('profile', user_id), _version_key('following', user_id), _version_key('suggestions')
+    )
+    return make_etag(request, variant, versions, card_keys(page.object_list), page.next_cursor)
+
+
+def landing_etag(request):
+    return make_etag(request, 'landing', card_keys(recent_public_entries(LANDING_ENTRIES)))
+
+
+def feed_etag(request, variant='html'):
+    """Ana sayfanın ETag'i; JSON akışı aynı doğrulayıcıları variant='json' ile kullanır"""
+    if not request.user.is_authenticated:
+        return landing_etag(request) if variant == 'html' else None
+    return _feed_etag(request, feed_page(request), variant)
+
+
+def json_feed_etag(request):
+    return feed_etag(request, 'json')
+
+
+async def afeed_etag(request):
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return await sync_to_async(landing_etag)(request)
+    page = await afeed_page(request)
+    return await sync_to_async(_feed_etag)(request, page, 'html')
+
+
+def _profile_etag(request, profile_user_id, variant):
+    viewer_id = request.user.pk
+    keys = [_version_key('profile', profile_user_id), _version_key('profile', viewer_id)]
+    if profile_user_id != viewer_id:
+        # Takip et/bırak düğmesi
+        keys.append(_version_key('following', viewer_id))
+    return make_etag(request, variant, profile_user_id, _versions(*keys))
+
+
+def profile_user(request, username):
+    """Adı verilen kullanıcı ya da None; ETag ve görünüm aynı nesneyi kullanır"""
+    users = request.__dict__.setdefault('_diary_profile_users', {})
+    if username not in users:
+        users[username] = User.objects.filter(username=username).first()
+    return users[username]
+
+
+async def aprofile_user(request, username):
+    users = request.__dict__.setdefault('_diary_profile_users', {})
+    if username not in users:
+        users[username] = await User.objects.filter(username=username).afirst()
+    return users[username]
+
+
+def profile_etag(request, username=None):
+    """Profil sayfasının ETag'i; kullanıcı yoksa None (görünüm 404 döndürür)"""
+    user = profile_user(request, username) if username else request.user
+    return None if user is None else _profile_etag(request, user.pk, 'html')
+
+
+async def aprofile_etag(request, username=None):
+    user = await aprofile_user(request, username) if username else request.user
+    return None if user is None else await sync_to_async(_profile_etag)(request, user.pk, 'html')
+
+
+def calendar_etag(request, username):
+    user = profile_user(request, username)
+    return None if user is None else _profile_etag(request, user.pk, 'calendar')
+
+
+def private_cache(view_func):
+    """Yanıtları (304 dahil) tarayıcıya özel ve yeniden doğrulanacak şekilde işaretler."""
+    def patch(response):
+        patch_cache_control(
+            response, private=True, must_revalidate=True,
+            max_age=getattr(settings, 'DIARY_PRIVATE_MAX_AGE', 0),
+        )
+        return response
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            return patch(await view_func(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        return patch(view_func(request, *args, **kwargs))
+    return wrapper
+
+
+def etag_condition(etag_func):
+    """
+    Eşzamanlı görünümlerde django.views.decorators.http.condition(etag_func=...).
+    Django 4.2'deki condition asenkron görünümleri desteklemez; asenkron
+    görünümlerde etag_func de asenkron olmalıdır. DIARY_ETAGS kapalıyken
+    görünüm doğrudan çağrılır.
+    """
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            conditional_view = condition(etag_func=etag_func)(view_func)
+
+            @wraps(view_func)
+            def sync_wrapper(request, *args, **kwargs):
+                if not enabled():
+                    return view_func(request, *args, **kwargs)
+                return conditional_view(request, *args, **kwargs)
+            return sync_wrapper
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if not enabled() or request.method not in ('GET', 'HEAD'):
+                return await view_func(request, *args, **kwargs)
+            etag = await etag_func(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag) if etag else None
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,163 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from .authcache import cached_profile, following_ids
+from .models import DiaryEntry, TimelineEntry, UserProfile
+from .pagination import PER_PAGE, apaginate, make_page, page_position, paginate
+from .timeline import is_timeline_ready
+
+
+# Kartlar diary.cards ile önbellekten çizilir; sayfa sorgusu sadece
+# sıralama ve kart anahtarı için gereken alanları yükler.
+CARD_FIELDS = ('id', 'author', 'created_at', 'updated_at')
+
+# Herkese açık son girişler: takip ettiği kimsenin içeriği olmayanların
+# akışı ve landing sayfası bu sınırlı, kısa ömürlü listeyi paylaşır.
+# Herkese açık giriş eklenince, değişince ya da silinince yenilenir.
+PUBLIC_FEED_KEY = 'diary:public-feed'
+PUBLIC_FEED_SIZE = 100
+# Landing sayfasının Keşfet bölümünde gösterilen herkese açık giriş sayısı
+LANDING_ENTRIES = 6
+
+
+def _feed_queryset(queryset):
+    return queryset.only(*CARD_FIELDS)
+
+
+def _public_feed_entries(user):
+    """Kendi gönderileri ve tüm herkese açık gönderiler"""
+    final_q = Q(author=user) | Q(privacy='public')
+    return _feed_queryset(DiaryEntry.objects.filter(final_q))
+
+
+def visible_entries(user, ids):
+    """ids içinden kullanıcının görebildiği girişler, akış sırasıyla"""
+    return list(_public_feed_entries(user).filter(id__in=ids).order_by('-created_at', '-id'))
+
+
+def refresh_public_feed():
+    rows = list(
+        DiaryEntry.objects.filter(privacy='public').order_by('-created_at', '-id')
+        .values_list('id', 'author_id', 'created_at', 'updated_at')[:PUBLIC_FEED_SIZE]
+    )
+    cache.set(PUBLIC_FEED_KEY, rows, getattr(settings, 'DIARY_PUBLIC_FEED_TIMEOUT', 60))
+    return rows
+
+
+def public_entry_changed(entry):
+    """Herkese açık olan ya da listede bulunan bir giriş değiştiyse liste işlem onaylanınca yenilenir."""
+    if entry.privacy == 'public' or entry.id in {row[0] for row in cache.get(PUBLIC_FEED_KEY) or ()}:
+        transaction.on_commit(refresh_public_feed)
+
+
+def public_feed_rows():
+    """Önbellekteki (id, author_id, created_at, updated_at) satırları, yeniden eskiye"""
+    rows = cache.get(PUBLIC_FEED_KEY)
+    if rows is None:
+        rows = refresh_public_feed()
+    return rows
+
+
+def _entry_from_row(row):
+    # Kart anahtarı ve sıralama için yeterli hafif nesne (bkz. CARD_FIELDS)
+    entry_id, author_id, created_at, updated_at = row
+    return DiaryEntry(id=entry_id, author_id=author_id, created_at=created_at, updated_at=updated_at)
+
+
+def recent_public_entries(limit):
+    return [_entry_from_row(row) for row in public_feed_rows()[:limit]]
+
+
+def public_fallback_page(user, request, per_page=PER_PAGE):
+    """
+    Takip ettiği kimsenin içeriği olmayan kullanıcının akışı: önbellekteki
+    herkese açık son girişler ile kendi girişleri. Önbellekteki pencerenin
+    ötesindeki sayfalar herkese açık girişlerin tamamından okunur.
+    """
+    rows = public_feed_rows()
+    position, offset = page_position(request, per_page)
+    wanted = offset + per_page + 1
+
+    public = [row for row in rows if position is None or (row[2], row[0]) < position]
+    if len(rows) >= PUBLIC_FEED_SIZE and len(public) < wanted:
+        return paginate(_public_feed_entries(user), request, per_page)
+
+    own = _feed_queryset(DiaryEntry.objects.filter(author=user)).order_by('-created_at', '-id')
+    if position:
+        created_at, pk = position
+        own = own.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    merged = {entry.id: entry for entry in map(_entry_from_row, public[:wanted])}
+    merged.update((entry.id, entry) for entry in own[:wanted])
+    ordered = sorted(merged.values(), key=lambda entry: (entry.created_at, entry.id), reverse=True)
+    return make_page(ordered[offset:wanted], per_page, ('created_at', 'id'), position is None and offset == 0)
+
+
+def _timeline_rows(user):
+    return TimelineEntry.objects.filter(user=user).select_related('entry').only(
+        'created_at', 'entry', *(f'entry__{field}' for field in CARD_FIELDS)
+    )
+
+
+def timeline_page(user, request):
+    """Önceden hesaplanmış akış tablosundan tek indeksli dilim"""
+    has_followed_content = TimelineEntry.objects.filter(user=user).exclude(author=user).exists()
+    if not has_followed_content:
+        return public_fallback_page(user, request)
+
+    page = paginate(_timeline_rows(user), request, keys=('created_at', 'entry_id'))
+    page.object_list = [row.entry for row in page.object_list]
+    return page
+
+
+async def atimeline_page(user, request):
+    has_followed_content = await TimelineEntry.objects.filter(user=user).exclude(author=user).aexists()
+    if not has_followed_content:
+        return await sync_to_async(public_fallback_page)(user, request)
+
+    page = await apaginate(_timeline_rows(user), request, keys=('created_at', 'entry_id'))
+    page.object_list = [row.entry for row in page.object_list]
+    return page
+
+
+def live_feed_entries(user):
+    """Akış tablosu henüz oluşturulmamış (soğuk) kullanıcılar için canlı sorgu"""
+    following_users = list(following_ids(user))
+
+    # Kullanıcının kendi gönderilerini her zaman dahil et
+    user_entries_q = Q(author=user)
+
+    # Takip edilen kullanıcıların herkese açık gönderileri için Q nesnesi
+    following_entries_q = Q(author__in=following_users, privacy='public')
+
+    # Birleşik sorgu
+    combined_q = user_entries_q | following_entries_q
+    return _feed_queryset(DiaryEntry.objects.filter(combined_q))
+
+
+def live_feed_page(user, request):
+    entries = live_feed_entries(user)
+    # Eğer kullanıcının akışı (kendi gönderileri hariç) boşsa, genel herkese açık gönderileri göster
+    has_followed_content = entries.exclude(author=user).exists()
+    if not has_followed_content:
+        return public_fallback_page(user, request)
+    return paginate(entries, request)
+
+
+def home_feed_page(user, request):
+    """Ana sayfa akışının bir sayfası: hazırsa akış tablosu, değilse canlı sorgu"""
+    if is_timeline_ready(user):
+        return timeline_page(user, request)
+    return live_feed_page(user, request)
+
+
+async def ahome_feed_page(user, request):
+    """home_feed_page'in asenkron sürümü; soğuk akış nadir olduğu için eşzamanlı yoldan gider"""
+    profile = cached_profile(user)
+    if profile is not None and profile.timeline_built_at:
+        return await atimeline_page(user, request)
+    if await UserProfile.objects.filter(user=user, timeline_built_at__isnull=False).aexists():
+        return await atimeline_page(user, request)
+    return await sync_to_async(live_feed_page)(user, request)
@@ -0,0 +1,118 @@
+"""
+Toplu takip etme/bırakma.
+
+Öneri listesinden birden çok kişiyi takip etmek ya da dışarıdan takip
+grafı aktarmak için follow_user'ı tek tek çağırmak yerine kullanılır.
+Kullanıcılar tek sorguda çözülür, yeni takipler tek bulk_create ile
+eklenir, bırakılanlar tek DELETE ile silinir. İkisi de Follow sinyallerini
+çalıştırmaz (QuerySet.delete() takip başına post_delete sinyali ve akış
+sorgusu çalıştırırdı); sinyallerin işi olan sayaçlar, akış tablosu, takip
+önbelleği ve ETag sürümleri burada toplu güncellenir.
+"""
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
+from . import authcache, conditional
+from .models import Follow, UserProfile
+from .timeline import add_authors_to_timeline, remove_authors_from_timeline
+
+# Bir istekte işlenebilecek en fazla kullanıcı adı
+MAX_USERNAMES = 200
+
+
+class BulkFollowError(ValueError):
+    pass
+
+
+def _adjust_followers(added, removed):
+    # Takip edilen ve bırakılanların sayaçları tek UPDATE ile
+    if added or removed:
+        delta = Case(When(user_id__in=added, then=1), default=-1)
+        UserProfile.objects.filter(user_id__in=added | removed).update(
+            followers_count=Greatest(F('followers_count') + delta, 0)
+        )
+
+
+def _delete_follows(follower_id, following_ids):
+    """Sinyalsiz tek DELETE; Follow'a bağlı başka tablo yoktur, CASCADE gerekmez."""
+    meta = Follow._meta
+    placeholders = ', '.join(['%s'] * len(following_ids))
+    with connections[Follow.objects.db].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {meta.db_table} WHERE {meta.get_field("follower").column} = %s '
+            f'AND {meta.get_field("following").column} IN ({placeholders})',
+            [follower_id, *following_ids],
+        )
+
+
+@transaction.atomic
+def bulk_follow(user, follow=(), unfollow=()):
+    """
+    user için follow listesindeki kullanıcıları takip eder, unfollow
+    listesindekileri bırakır. Zaten takip edilen/edilmeyenler atlanır.
+
+    (sonuçlar, bulunamayanlar) döndürür; sonuçlar kullanıcı adından
+    {'is_following': bool, 'followers_count': int} sözlüğüdür.
+    """
+    follow, unfollow = set(follow), set(unfollow)
+    if follow & unfollow:
+        raise BulkFollowError('Aynı kullanıcı hem takip hem bırakma listesinde olamaz.')
+    if len(follow) + len(unfollow) > MAX_USERNAMES:
+        raise BulkFollowError(f'Bir istekte en fazla {MAX_USERNAMES} kullanıcı işlenebilir.')
+    if user.username in follow:
+        raise BulkFollowError('Kendinizi takip edemezsiniz.')
+
+    ids = dict(User.objects.filter(username__in=follow | unfollow).values_list('username', 'id'))
+    not_found = sorted((follow | unfollow) - ids.keys())
+    follow_ids = {ids[name] for name in follow if name in ids}
+    unfollow_ids = {ids[name] for name in unfollow if name in ids}
+
+    # social_diary.db arka ucunda atomic BEGIN IMMEDIATE ile başlar; bu okuma
+    # ile aşağıdaki yazmalar arasında başka bir yazma araya giremez.
+    # Diğer veritabanlarında satırlar kilitlenir.
+    existing = set(
+        Follow.objects.select_for_update()
+        .filter(follower=user, following_id__in=follow_ids | unfollow_ids)
+        .values_list('following_id', flat=True)
+    )
+    added = set()
+    removed = unfollow_ids & existing
+
+    if follow_ids - existing:
+        new_follows = [Follow(follower=user, following_id=user_id) for user_id in follow_ids - existing]
+        Follow.objects.bulk_create(new_follows, ignore_conflicts=True)
+        # ignore_conflicts, okumadan sonra başka bir isteğin eklediği satırları
+        # sessizce atlar; o satırların sayaçlarını ekleyen istek artırdı. Sadece
+        # bu çağrının eklediği satırlar (bulk_create'in atadığı created_at ile) sayılır.
+        inserted = {(follow.following_id, follow.created_at) for follow in new_follows}
+        rows = set(
+            Follow.objects.filter(follower=user, following_id__in=follow_ids - existing)
+            .values_list('following_id', 'created_at')
+        )
+        added = {following_id for following_id, created_at in rows & inserted}
+        existing |= {following_id for following_id, created_at in rows - inserted}
+        add_authors_to_timeline(user.id, added)
+    if removed:
+        _delete_follows(user.id, removed)
+        remove_authors_from_timeline(user.id, removed)
+
+    UserProfile.adjust_counters(user.id, following_count=len(added) - len(removed))
+    if added or removed:
+        # following_changed sinyalinin yaptığı geçersiz kılma
+        def invalidate():
+            authcache.invalidate_following(user.id)
+            conditional.bump_following(user.id)
+            conditional.bump_profile(user.id, *added, *removed)
+        transaction.on_commit(invalidate)
+    _adjust_followers(added, removed)
+
+    followers = dict(
+        UserProfile.objects.filter(user_id__in=ids.values()).values_list('user_id', 'followers_count')
+    )
+    following = (existing | added) - removed
+    results = {
+        name: {'is_following': user_id in following, 'followers_count': followers.get(user_id, 0)}
+        for name, user_id in ids.items()
+    }
+    return results, not_found
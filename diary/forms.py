@@ -1,9 +1,17 @@
 from django import forms
-from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from django.contrib.auth.forms import BaseUserCreationForm, UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from . import passwords, throttle
+from .backends import users_with_email
 from .models import DiaryEntry, UserProfile
 import re
 
+# Eşzamanlı kayıtlar aynı kullanıcı adını seçerse kaç kez yeniden denenir
+USERNAME_ATTEMPTS = 5
+
+BUSY_MESSAGE = 'Sunucu şu an çok yoğun. Lütfen birkaç saniye sonra tekrar deneyin.'
+
 
 class DiaryEntryForm(forms.ModelForm):
     class Meta:
@@ -89,7 +97,7 @@ class CustomUserCreationForm(UserCreationForm):
     
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError('Bu e-posta adresi zaten kullanılıyor.')
         return email
     
@@ -103,18 +111,24 @@ class CustomUserCreationForm(UserCreationForm):
         if len(base_username) < 3:
             base_username = 'user' + base_username
         
+        # base, base1, base2... adlarının hepsi username indeksinde tek aralık
+        # sorgusuyla okunur (':' karakteri '9'dan hemen sonra gelir)
+        taken = set(
+            User.objects.filter(username__gte=base_username, username__lt=base_username + ':')
+            .values_list('username', flat=True)
+        )
         username = base_username
         counter = 1
-        
-        # Benzersiz kullanıcı adı bulana kadar dene
-        while User.objects.filter(username=username).exists():
+        while username in taken:
             username = f"{base_username}{counter}"
             counter += 1
         
         return username
     
     def save(self, commit=True):
-        user = super().save(commit=False)
+        # BaseUserCreationForm.save parolayı isteğin iş parçacığında özetler; atlanır
+        user = super(BaseUserCreationForm, self).save(commit=False)
+        passwords.set_password(user, self.cleaned_data['password1'])
         user.email = self.cleaned_data['email']
         user.first_name = self.cleaned_data.get('first_name', '')
         user.last_name = self.cleaned_data.get('last_name', '')
@@ -123,9 +137,24 @@ class CustomUserCreationForm(UserCreationForm):
         user.username = self.generate_username_from_email(user.email)
         
         if commit:
-            user.save()
+            self.save_user(user)
         return user
 
+    def save_user(self, user):
+        """
+        Aynı anda kayıt olan biri aynı kullanıcı adını aldıysa ad yeniden
+        seçilir. E-posta çakışması IntegrityError olarak yukarı iletilir.
+        """
+        for attempt in range(USERNAME_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    user.save()
+                return
+            except IntegrityError:
+                if attempt == USERNAME_ATTEMPTS - 1 or users_with_email(user.email).exists():
+                    raise
+                user.username = self.generate_username_from_email(user.email)
+
 
 class CustomAuthenticationForm(AuthenticationForm):
     username = forms.EmailField(
@@ -142,15 +171,30 @@ class CustomAuthenticationForm(AuthenticationForm):
             'placeholder': 'Şifrenizi girin'
         })
     )
-    
-    def clean_username(self):
+    # E-posta ile kullanıcı diary.backends.EmailBackend'de tek sorguda bulunur
+
+    def __init__(self, request=None, *args, **kwargs):
+        super().__init__(request, *args, **kwargs)
+        # Sınır aşıldıysa ya da özetleme havuzu doluysa gösterilecek mesaj
+        self.limit_message = None
+
+    def clean(self):
+        ip = throttle.client_ip(self.request) if self.request else ''
         email = self.cleaned_data.get('username')
+        if throttle.is_limited('login-ip', ip) or throttle.is_limited('login-email', email):
+            self.limit_message = throttle.MESSAGE
+            raise forms.ValidationError(throttle.MESSAGE, code='throttled')
         try:
-            # Email ile kullanıcıyı bul
-            user = User.objects.get(email=email)
-            return user.username  # Gerçek username'i döndür
-        except User.DoesNotExist:
-            raise forms.ValidationError('Bu e-posta adresi ile kayıtlı kullanıcı bulunamadı.')
+            cleaned_data = super().clean()
+        except passwords.HashingBusy:
+            self.limit_message = BUSY_MESSAGE
+            raise forms.ValidationError(BUSY_MESSAGE, code='busy')
+        except forms.ValidationError:
+            throttle.hit('login-ip', ip)
+            throttle.hit('login-email', email)
+            raise
+        throttle.reset('login-email', email)
+        return cleaned_data
 
 
 class EditUsernameForm(forms.ModelForm):
@@ -0,0 +1,170 @@
+"""
+Yüklenen resimlerin arka planda boyutlandırılması.
+
+Yüklemeler ham haliyle kaydedilir ve modelde PENDING olarak işaretlenir.
+İşleme iki yoldan yapılır, ikisi de aynı veritabanı durumunu kullanır:
+
+* Web sürecinde küçük bir iş parçacığı havuzu (DIARY_IMAGE_WORKERS),
+  işlem kaydedildikten sonra resmi sıraya alır.
+* ``python manage.py process_images`` komutu; havuz kapalıysa veya süreç
+  iş bitmeden kapandıysa bekleyen işleri tamamlar.
+
+Bir işi önce PENDING -> PROCESSING koşullu güncellemesiyle sahiplenen
+işçi yapar, böylece aynı resim iki kez işlenmez.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from django.conf import settings
+from django.core.files import File
+from django.db import connections, transaction
+from PIL import Image
+from . import blobs, cards, conditional, renditions
+from .models import DiaryPhoto, UserProfile, PENDING, PROCESSING, READY, FAILED
+
+logger = logging.getLogger(__name__)
+
+# model -> (resim alanı, durum alanı, kopyalar alanı, en büyük boyut)
+JOBS = {
+    DiaryPhoto: ('image', 'processing_state', 'renditions', (1024, 1024)),
+    UserProfile: ('profile_picture', 'picture_state', 'picture_renditions', (300, 300)),
+}
+
+# Kodlanan çıktı bu boyuta kadar bellekte, üstünde geçici dosyada tutulur
+SPOOL_SIZE = 1024 * 1024
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    workers = getattr(settings, 'DIARY_IMAGE_WORKERS', 2)
+    if not workers:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='diary-images')
+    return _executor
+
+
+def schedule(instance):
+    """Kaydedilen resmi işlem tamamlandıktan sonra havuza gönderir."""
+    executor = _get_executor()
+    if executor is None:
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: executor.submit(_run_in_thread, model, pk))
+
+
+def _run_in_thread(model, pk):
+    try:
+        process(model, pk)
+    finally:
+        # İş parçacığına ait veritabanı bağlantılarını kapat
+        connections.close_all()
+
+
+def resize_field(field, max_size):
+    """
+    Resmi max_size sınırına küçültür ve depolamaya yazar.
+
+    Dosya depolamadan akış olarak okunur; JPEG'ler draft() ile çözülürken
+    1/2, 1/4 veya 1/8 ölçekte açılır, diğer biçimler reduce() ile tam sayı
+    katsayıyla küçültülür. Böylece bellekte tam çözünürlüklü resim tutulmaz.
+    Çıktı SpooledTemporaryFile üzerinden depolamaya akar.
+
+    (yeni ad, küçültülmüş resim) döndürür; içerik adresli depolamada
+    küçültülen resim yeni bir ad alır.
+    """
+    max_width, max_height = max_size
+    with field.storage.open(field.name) as source:
+        img = Image.open(source)
+        image_format = img.format
+
+        if img.height <= max_height and img.width <= max_width:
+            img.load()
+            return field.name, img
+
+        img.draft('RGB', max_size)
+        factor = min(img.width // max_width, img.height // max_height)
+        if factor > 1 and img.mode in ('L', 'LA', 'RGB', 'RGBA'):
+            img = img.reduce(factor)
+        img.thumbnail(max_size)
+
+    with SpooledTemporaryFile(max_size=SPOOL_SIZE) as output:
+        img.save(output, format=image_format, quality=85, optimize=True)
+        name = field.storage.save(field.name, File(output, name=field.name))
+    return name, img
+
+
+def process(model, pk):
+    """
+    Tek bir resmi işler. İşi başka bir işçi sahiplendiyse False döndürür.
+    """
+    field_name, state_field, renditions_field, max_size = JOBS[model]
+    claimed = model.objects.filter(pk=pk, **{state_field: PENDING}).update(**{state_field: PROCESSING})
+    if not claimed:
+        return False
+
+    instance = model.objects.filter(pk=pk).first()
+    changes = {state_field: READY}
+    previous_name = None
+    try:
+        field = getattr(instance, field_name)
+        changes[renditions_field] = {}
+        if field:
+            new_name, img = resize_field(field, max_size)
+            if new_name != field.name:
+                blobs.acquire(field.storage, new_name)
+                previous_name, field.name = field.name, new_name
+                changes[field_name] = new_name
+            # Kopyalar küçültülmüş resimden üretilir, dosya tekrar okunmaz
+            changes[renditions_field] = renditions.generate(field, img)
+    except (IOError, FileNotFoundError, AttributeError, ValueError):
+        # Dosya yoksa veya bozuksa resim hatalı olarak işaretlenir
+        logger.exception('Resim işlenemedi: %s #%s', model.__name__, pk)
+        changes[state_field] = FAILED
+
+    model.objects.filter(pk=pk).update(**changes)
+    if instance is not None:
+        # Hazır olan resim akış kartlarında yer tutucunun yerini alır
+        if model is DiaryPhoto:
+            cards.invalidate_entry(instance.diary_entry_id)
+            conditional.bump_profile(instance.diary_entry.author_id)
+        else:
+            cards.invalidate_author(instance.user_id)
+            conditional.bump_profile(instance.user_id)
+    if previous_name:
+        # Ham yükleme artık bu satır tarafından kullanılmıyor
+        blobs.release(field.storage, previous_name)
+    return True
+
+
+def process_pending(limit=None):
+    """Bekleyen bütün işleri sırayla işler, işlenen resim sayısını döndürür."""
+    done = 0
+    for model, (field_name, state_field, renditions_field, max_size) in JOBS.items():
+        pks = model.objects.filter(**{state_field: PENDING}).order_by('pk').values_list('pk', flat=True)
+        for pk in pks[:limit] if limit else pks:
+            if process(model, pk):
+                done += 1
+    return done
+
+
+def reset_stuck():
+    """Yarıda kalmış (PROCESSING) işleri yeniden sıraya alır."""
+    return sum(
+        model.objects.filter(**{state_field: PROCESSING}).update(**{state_field: PENDING})
+        for model, (field_name, state_field, renditions_field, max_size) in JOBS.items()
+    )
+
+
+def queue_missing_renditions():
+    """Kopyası hiç üretilmemiş hazır resimleri yeniden sıraya alır."""
+    total = 0
+    for model, (field_name, state_field, renditions_field, max_size) in JOBS.items():
+        total += (
+            model.objects.filter(**{state_field: READY, renditions_field: {}})
+            .exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            .update(**{state_field: PENDING})
+        )
+    return total
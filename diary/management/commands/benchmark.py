@@ -0,0 +1,290 @@
+import json
+import math
+import random
+import re
+import resource
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import Cookie, CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from importlib import import_module
+from diary.models import DiaryPhoto
+from diary.querybudget import QueryRecorder
+
+SCENARIOS = ('home', 'profile', 'create_entry', 'follow_user', 'media')
+SERVER_TIMING_RE = re.compile(r'"(\d+) queries')
+
+
+def percentile(values, pct):
+    """En yakın sıra yöntemiyle yüzdelik."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_kb(pid=None):
+    """Sürecin en yüksek bellek kullanımı (KB). pid verilirse Linux /proc üzerinden okunur."""
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class InProcessTarget:
+    """İstekleri Django test istemcisiyle aynı süreçte çalıştırır."""
+    name = 'client'
+
+    def __init__(self, users):
+        self.clients = {}
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            self.clients[user.id] = client
+
+    def request(self, user, method, path, data=None):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = getattr(self.clients[user.id], method)(path, data or {})
+            if response.streaming:
+                # Dosya yanıtları da sonuna kadar okunur
+                b''.join(response.streaming_content)
+                response.close()
+        return response.status_code, recorder.count
+
+
+class NoRedirect(HTTPRedirectHandler):
+    # Yönlendirmeler izlenmez; sadece ölçülen görünümün süresi sayılır
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTarget:
+    """
+    Çalışan bir sunucuya (örn. yerel gunicorn) HTTP ile istek atar.
+    Oturumlar doğrudan oturum deposunda açılır; sorgu sayısı sunucunun
+    Server-Timing başlığından okunur (DIARY_QUERY_BUDGET_HEADERS açık olmalı).
+    """
+
+    def __init__(self, base_url, users):
+        self.base_url = base_url.rstrip('/')
+        self.host = self.base_url.split('://', 1)[-1].split('/', 1)[0].split(':', 1)[0]
+        self.openers = {user.id: self.login(user) for user in users}
+        self.name = self.base_url
+
+    def login(self, user):
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+
+        jar = CookieJar()
+        csrf_token = get_random_string(32)
+        for name, value in ((settings.SESSION_COOKIE_NAME, store.session_key),
+                            (settings.CSRF_COOKIE_NAME, csrf_token)):
+            jar.set_cookie(Cookie(
+                0, name, value, None, False, self.host, False, False, '/', True,
+                False, None, False, None, None, {},
+            ))
+        opener = build_opener(HTTPCookieProcessor(jar), NoRedirect)
+        opener.csrf_token = csrf_token
+        return opener
+
+    def request(self, user, method, path, data=None):
+        opener = self.openers[user.id]
+        body = urlencode(data or {}).encode() if method == 'post' else None
+        request = Request(self.base_url + path, data=body, method=method.upper())
+        request.add_header('X-CSRFToken', opener.csrf_token)
+        try:
+            with opener.open(request) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except HTTPError as error:
+            status, timing = error.code, error.headers.get('Server-Timing', '')
+        match = SERVER_TIMING_RE.search(timing)
+        return status, int(match.group(1)) if match else None
+
+
+class Command(BaseCommand):
+    help = (
+        'home, profile, create_entry, follow_user görünümlerinin ve media dosyalarının gecikmesini ölçer; '
+        'p50/p95/p99, istek başına sorgu sayısı ve en yüksek belleği JSON olarak kaydeder. '
+        'Veri için önce generate_demo_data çalıştırılmalıdır; yazma senaryoları veritabanını değiştirir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f'Virgülle ayrılmış senaryolar ({", ".join(SCENARIOS)})')
+        parser.add_argument('--requests', type=int, default=200, help='Senaryo başına istek sayısı')
+        parser.add_argument('--warmup', type=int, default=10, help='Ölçüme katılmayan ilk istekler')
+        parser.add_argument('--sessions', type=int, default=20, help='İstekleri dağıtılacak kullanıcı sayısı')
+        parser.add_argument('--prefix', default='demo', help='generate_demo_data kullanıcı öneki')
+        parser.add_argument('--url', help='Süreç içi istemci yerine bu adresteki sunucuyu ölç (örn. http://127.0.0.1:8000)')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='--url ile aynı anda gönderilecek istek sayısı (WSGI/ASGI verim karşılaştırması)')
+        parser.add_argument('--server-pid', type=int, help='--url ile ölçülen sunucunun PID değeri (bellek için)')
+        parser.add_argument('--seed', type=int, default=42, help='Rastgele sayı tohumu')
+        parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+        parser.add_argument('--compare', help='Karşılaştırılacak önceki sonuç dosyası')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Bilinmeyen senaryo: {", ".join(sorted(unknown))}')
+
+        self.media_names = []
+        if 'media' in scenarios:
+            self.media_names = list(DiaryPhoto.objects.values_list('image', flat=True)[:500])
+            if not self.media_names:
+                raise CommandError('media senaryosu için fotoğraf yok, önce generate_demo_data çalıştırın.')
+
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency en az 1 olmalı.')
+        if options['concurrency'] > 1 and not options['url']:
+            raise CommandError('--concurrency sadece --url ile kullanılabilir; test istemcisi iş parçacığı güvenli değildir.')
+
+        users = list(User.objects.filter(username__startswith=options['prefix']).order_by('id'))
+        if len(users) < 2:
+            raise CommandError('Yeterli örnek kullanıcı yok, önce generate_demo_data çalıştırın.')
+        rng = random.Random(options['seed'])
+        sessions = rng.sample(users, min(options['sessions'], len(users)))
+
+        if options['url']:
+            target = HttpTarget(options['url'], sessions)
+            results = self.run(target, scenarios, rng, sessions, users, options)
+            rss = peak_rss_kb(options['server_pid']) if options['server_pid'] else None
+        else:
+            # Bütçe aşımı ölçümü kesmesin; test istemcisinin sunucu adı kabul edilsin
+            with override_settings(DIARY_QUERY_BUDGET_ACTION='log',
+                                   ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ['testserver']):
+                target = InProcessTarget(sessions)
+                results = self.run(target, scenarios, rng, sessions, users, options)
+            rss = peak_rss_kb()
+
+        report = {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'target': target.name,
+            'database': connection.vendor,
+            'users': len(users),
+            'requests_per_scenario': options['requests'],
+            'concurrency': options['concurrency'],
+            'peak_rss_kb': rss,
+            'scenarios': results,
+        }
+        self.print_report(report)
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                self.print_comparison(json.load(baseline), report)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Sonuçlar {options["output"]} dosyasına yazıldı.'))
+
+    def build_request(self, scenario, rng, user, users):
+        if scenario == 'home':
+            return 'get', reverse('diary:home'), None
+        if scenario == 'profile':
+            return 'get', reverse('diary:user_profile', args=[rng.choice(users).username]), None
+        if scenario == 'create_entry':
+            return 'post', reverse('diary:create_entry'), {
+                'title': 'Ölçüm', 'content': 'Yük testi girişi', 'privacy': rng.choice(['public', 'private']),
+            }
+        if scenario == 'media':
+            return 'get', settings.MEDIA_URL + rng.choice(self.media_names), None
+        other = rng.choice(users)
+        while other.id == user.id:
+            other = rng.choice(users)
+        return 'post', reverse('diary:follow_user', args=[other.username]), None
+
+    def run(self, target, scenarios, rng, sessions, users, options):
+        results = {}
+        for scenario in scenarios:
+            jobs = []
+            for index in range(options['warmup'] + options['requests']):
+                user = sessions[index % len(sessions)]
+                jobs.append((user, *self.build_request(scenario, rng, user, users)))
+            for job in jobs[:options['warmup']]:
+                target.request(*job)
+
+            def timed(job):
+                start = time.perf_counter()
+                status, query_count = target.request(*job)
+                return status, query_count, (time.perf_counter() - start) * 1000
+
+            started = time.perf_counter()
+            if options['concurrency'] > 1:
+                with ThreadPoolExecutor(options['concurrency']) as pool:
+                    outcomes = list(pool.map(timed, jobs[options['warmup']:]))
+            else:
+                outcomes = [timed(job) for job in jobs[options['warmup']:]]
+            wall = time.perf_counter() - started
+
+            latencies = [elapsed for status, query_count, elapsed in outcomes]
+            queries = [query_count for status, query_count, elapsed in outcomes if query_count is not None]
+            results[scenario] = {
+                'requests': len(latencies),
+                'errors': sum(1 for status, query_count, elapsed in outcomes if status >= 400),
+                'throughput_rps': round(len(latencies) / wall, 1),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+            }
+        return results
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['target']} @ {report['commit']} ({report['database']}, {report['users']} kullanıcı, "
+            f"eşzamanlılık {report.get('concurrency', 1)})"
+        )
+        self.stdout.write(f"{'senaryo':<14}{'istek/sn':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'sorgu':>8}{'hata':>6}")
+        for name, result in report['scenarios'].items():
+            self.stdout.write(
+                f"{name:<14}{result.get('throughput_rps', '-'):>10}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>8}"
+                f"{result['errors']:>6}"
+            )
+        if report['peak_rss_kb']:
+            self.stdout.write(f"En yüksek bellek: {report['peak_rss_kb'] / 1024:.1f} MB")
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write(f"\n{baseline.get('commit')} -> {report['commit']} (ms, negatif = hızlandı)")
+        for name, result in report['scenarios'].items():
+            old = baseline.get('scenarios', {}).get(name)
+            if not old:
+                continue
+            deltas = '  '.join(
+                f"{key[:-3]} {result[key] - old[key]:+.2f}" for key in ('p50_ms', 'p95_ms', 'p99_ms')
+            )
+            self.stdout.write(f'{name:<14}{deltas}')
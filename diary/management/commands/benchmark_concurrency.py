@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from diary.models import DiaryEntry, Follow, TimelineEntry, UserProfile
+from .benchmark import percentile
+
+MODES = {
+    # Django'nun varsayılan SQLite arka ucu, geri alma günlüğü (DELETE) kipinde
+    'default': ('django.db.backends.sqlite3', 'DELETE', {}),
+    # social_diary.db: WAL, PRAGMA'lar ve BEGIN IMMEDIATE
+    'tuned': ('social_diary.db', 'WAL', {'timeout': 5}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Yazmalar sürerken SQLite okuma verimini ölçer. Veritabanının bir kopyası '
+        'üzerinde okuyucu ve yazıcı iş parçacıkları çalıştırır; varsayılan ve ayarlı '
+        'arka ucu karşılaştırır.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+        parser.add_argument('--readers', type=int, default=4, help='Okuyucu iş parçacığı sayısı')
+        parser.add_argument('--writers', type=int, default=2, help='Yazıcı iş parçacığı sayısı')
+        parser.add_argument('--seconds', type=float, default=10, help='Her kipin ölçüm süresi')
+
+    def handle(self, *args, **options):
+        source = connections['default']
+        if source.vendor != 'sqlite' or source.is_in_memory_db():
+            raise CommandError('Bu ölçüm dosya tabanlı bir SQLite veritabanı gerektirir.')
+        if not DiaryEntry.objects.exists():
+            raise CommandError('Veritabanı boş, önce generate_demo_data çalıştırın.')
+
+        modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+        self.stdout.write(f"{'kip':<10}{'okuma/sn':>10}{'okuma p95':>11}{'yazma/sn':>10}{'kilit hatası':>14}")
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as directory:
+                alias = self.prepare(mode, source, os.path.join(directory, 'bench.sqlite3'))
+                try:
+                    result = self.measure(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.settings[alias]
+            self.stdout.write(
+                f"{mode:<10}{result['reads'] / options['seconds']:>10.1f}{result['read_p95_ms']:>11.2f}"
+                f"{result['writes'] / options['seconds']:>10.1f}{result['locked']:>14}"
+            )
+
+    def prepare(self, mode, source, path):
+        """Veritabanını kopyalar ve kip için ayrı bir bağlantı takma adı tanımlar."""
+        engine, journal_mode, db_options = MODES[mode]
+        source.ensure_connection()
+        with sqlite3.connect(path) as target:
+            source.connection.backup(target)
+            target.execute(f'PRAGMA journal_mode = {journal_mode}')
+
+        alias = f'benchmark_{mode}'
+        connections.settings[alias] = {
+            **connections.settings['default'],
+            'ENGINE': engine,
+            'NAME': path,
+            'OPTIONS': db_options,
+        }
+        return alias
+
+    def measure(self, alias, options):
+        authors = list(
+            UserProfile.objects.using(alias).order_by('-followers_count')
+            .values_list('user_id', flat=True)[:50]
+        )
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {'reads': 0, 'writes': 0, 'locked': 0, 'latencies': []}
+
+        def reader():
+            # Ana sayfanın genel akışı ve bir profil sayfası
+            list(DiaryEntry.objects.using(alias).filter(privacy='public').order_by('-created_at', '-id')[:10])
+            author_id = authors[int(time.perf_counter() * 1000) % len(authors)]
+            list(DiaryEntry.objects.using(alias).filter(author_id=author_id).order_by('-created_at', '-id')[:10])
+
+        def writer():
+            # create_entry ile aynı yazma deseni: giriş, akış dağıtımı, sayaç.
+            # save() sinyalleri varsayılan veritabanına yazacağı için bulk_create kullanılır.
+            author_id = authors[int(time.perf_counter() * 1000) % len(authors)]
+            with transaction.atomic(using=alias):
+                entry, = DiaryEntry.objects.using(alias).bulk_create([
+                    DiaryEntry(author_id=author_id, content='Eşzamanlılık ölçümü', privacy='public')
+                ])
+                followers = Follow.objects.using(alias).filter(following_id=author_id).values_list('follower_id', flat=True)
+                TimelineEntry.objects.using(alias).bulk_create(
+                    TimelineEntry(user_id=user_id, entry=entry, author_id=author_id, created_at=entry.created_at)
+                    for user_id in [author_id, *followers]
+                )
+                UserProfile.objects.using(alias).filter(user_id=author_id).update(entry_count=F('entry_count') + 1)
+
+        def run(work, key):
+            done, locked, latencies = 0, 0, []
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        work()
+                    except OperationalError as error:
+                        if 'locked' not in str(error):
+                            raise
+                        locked += 1
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    done += 1
+            finally:
+                connections[alias].close()
+            with lock:
+                result[key] += done
+                result['locked'] += locked
+                if key == 'reads':
+                    result['latencies'].extend(latencies)
+
+        threads = [threading.Thread(target=run, args=(writer, 'writes')) for _ in range(options['writers'])]
+        threads += [threading.Thread(target=run, args=(reader, 'reads')) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        result['read_p95_ms'] = percentile(result['latencies'], 95) if result['latencies'] else 0.0
+        return result
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from diary.suggestions import TOP_K, FollowGraph, compute_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Takip grafından kullanıcı başına "kimi takip etmeli" önerilerini hesaplar '
+        've FollowSuggestions tablosuna yazar. Düzenli (örn. saatlik) çalıştırılmalıdır.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Kullanıcı başına saklanan öneri sayısı')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        graph = FollowGraph.from_database()
+        loaded = time.perf_counter()
+        users = compute_all(graph, options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{users} kullanıcı ve {len(graph.out_targets)} takip için öneriler hesaplandı '
+            f'(graf {loaded - start:.2f} sn, öneriler {time.perf_counter() - loaded:.2f} sn).'
+        ))
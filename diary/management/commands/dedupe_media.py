@@ -0,0 +1,72 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from diary import blobs, renditions
+from diary.images import JOBS
+from diary.models import PENDING
+from diary.storage import file_digest, media_storage
+
+
+class Command(BaseCommand):
+    help = ('Mevcut fotoğrafları ve profil resimlerini içerik adresli düzene taşır, '
+            'aynı içerikli dosyaları birleştirir ve kazanılan alanı raporlar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Sadece raporla, hiçbir şeyi değiştirme')
+
+    def handle(self, *args, **options):
+        storage = media_storage
+        dry_run = options['dry_run']
+        old_files = {}
+        written = 0
+        moved = 0
+
+        for model, (field_name, state_field, renditions_field, max_size) in JOBS.items():
+            rows = (
+                model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+                .values_list('pk', field_name)
+            )
+            for pk, name in rows.iterator():
+                if storage.is_hashed(name):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f'Dosya bulunamadı: {name}')
+                    continue
+
+                with storage.open(name) as source:
+                    content = File(source, name=name)
+                    content.sha256 = file_digest(content)
+                    new_name = storage.hashed_name(name, content.sha256)
+                    if not storage.exists(new_name):
+                        written += storage.size(name)
+                        if not dry_run:
+                            storage.save(new_name, content)
+
+                old_files[name] = storage.size(name)
+                moved += 1
+                if not dry_run:
+                    # Boyut kopyaları yeni adla process_images tarafından üretilir
+                    model.objects.filter(pk=pk).update(
+                        **{field_name: new_name, renditions_field: {}, state_field: PENDING}
+                    )
+
+        freed = 0
+        if not dry_run:
+            blobs.recount(storage, [(model, job[0]) for model, job in JOBS.items()])
+            for name, size in old_files.items():
+                still_used = any(
+                    model.objects.filter(**{job[0]: name}).exists() for model, job in JOBS.items()
+                )
+                if not still_used:
+                    renditions.delete_for(storage, name)
+                    storage.delete(name)
+                    freed += size
+        else:
+            freed = sum(old_files.values())
+
+        reclaimed = freed - written
+        self.stdout.write(self.style.SUCCESS(
+            f'{moved} dosya taşındı, {len(old_files)} eski dosyadan {written} bayt yeniden yazıldı, '
+            f'{reclaimed} bayt ({reclaimed / 1024 / 1024:.1f} MB) kazanıldı.'
+        ))
+        if moved and not dry_run:
+            self.stdout.write('Boyut kopyalarını yeniden üretmek için: python manage.py process_images')
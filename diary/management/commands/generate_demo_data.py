@@ -0,0 +1,196 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from diary import blobs
+from diary.models import DiaryEntry, DiaryPhoto, Follow, UserProfile, READY
+from diary.feeds import refresh_public_feed
+from diary.search import get_backend
+from diary.storage import media_storage
+from diary.timeline import rebuild_timeline
+
+BATCH_SIZE = 1000
+
+WORDS = (
+    'bugün dün yarın sabah akşam gece deniz dağ orman şehir kahve çay kitap film müzik '
+    'yürüyüş arkadaş aile okul iş toplantı proje yolculuk tren otobüs yağmur güneş kar '
+    'rüzgar bahar yaz sonbahar kış güzel yorucu sakin heyecanlı mutlu düşünceli uzun kısa '
+    'İstanbul İzmir Ankara ışık gölge çiçek ağaç kuş kedi köpek yemek tatlı ekmek pazar'
+).split()
+
+
+def zipf_weights(count, exponent):
+    """Sıralamaya göre azalan (kuvvet yasası) ağırlıklar."""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Ölçüm için tekrarlanabilir örnek veri üretir: kullanıcılar, kuvvet yasasına '
+        'uyan takip grafı, karışık gizlilikte girişler ve fotoğraflar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Kullanıcı sayısı')
+        parser.add_argument('--entries', type=int, default=20000, help='Günlük girişi sayısı')
+        parser.add_argument('--mean-follows', type=float, default=30,
+                            help='Kullanıcı başına ortalama takip sayısı')
+        parser.add_argument('--follow-exponent', type=float, default=1.1,
+                            help='Popülerlik dağılımının üssü (büyüdükçe birkaç kullanıcı öne çıkar)')
+        parser.add_argument('--public-ratio', type=float, default=0.6,
+                            help='Herkese açık girişlerin oranı')
+        parser.add_argument('--photo-ratio', type=float, default=0.2,
+                            help='Fotoğraflı girişlerin oranı (giriş başına 1-3 fotoğraf)')
+        parser.add_argument('--photo-variants', type=int, default=12,
+                            help='Üretilecek farklı fotoğraf sayısı (aynı dosyalar paylaşılır)')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Girişlerin dağıtılacağı geçmiş gün sayısı')
+        parser.add_argument('--prefix', default='demo', help='Kullanıcı adı öneki')
+        parser.add_argument('--password', default='demo-parola', help='Bütün örnek kullanıcıların parolası')
+        parser.add_argument('--seed', type=int, default=42, help='Rastgele sayı tohumu')
+        parser.add_argument('--replace', action='store_true',
+                            help='Aynı önekli mevcut örnek kullanıcıları önce sil')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+
+        existing = User.objects.filter(username__startswith=prefix)
+        if existing.exists():
+            if not options['replace']:
+                raise CommandError(f'"{prefix}" önekli kullanıcılar zaten var, --replace ile silin.')
+            deleted, _ = existing.delete()
+            self.stdout.write(f'{deleted} eski örnek kayıt silindi.')
+
+        with transaction.atomic():
+            users = self.create_users(options)
+            follows = self.create_follows(rng, users, options)
+            entries = self.create_entries(rng, users, options)
+            photos = self.create_photos(rng, entries, options)
+
+            # bulk_create sinyalleri çalıştırmaz; türetilmiş veriler toplu güncellenir
+            get_backend().rebuild(
+                DiaryEntry.objects.order_by('id')
+                .values_list('id', 'title', 'content', 'author_id', 'privacy').iterator()
+            )
+            UserProfile.reconcile_counters(UserProfile.objects.filter(user__in=users))
+            blobs.recount(media_storage, [(DiaryPhoto, 'image'), (UserProfile, 'profile_picture')])
+
+        for user in users:
+            rebuild_timeline(user)
+        refresh_public_feed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} kullanıcı, {follows} takip, {len(entries)} giriş ve {photos} fotoğraf oluşturuldu.'
+        ))
+        self.stdout.write('Fotoğraf kopyaları için: python manage.py process_images --backfill-renditions')
+
+    def create_users(self, options):
+        password = make_password(options['password'])
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{options['prefix']}{index:06d}",
+                    email=f"{options['prefix']}{index:06d}@example.com",
+                    first_name=WORDS[index % len(WORDS)].capitalize(),
+                    password=password,
+                )
+                for index in range(options['users'])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=user, timeline_built_at=now) for user in users],
+            batch_size=BATCH_SIZE,
+        )
+        return users
+
+    def create_follows(self, rng, users, options):
+        """
+        Takip edilecek kişi popülerliğe göre (Zipf) seçilir, takip sayısı
+        Pareto dağılımından gelir: çoğu kullanıcı az, birkaçı çok kişiyi takip eder.
+        """
+        if len(users) < 2:
+            return 0
+        by_popularity = users[:]
+        rng.shuffle(by_popularity)
+        cum_weights = []
+        total = 0
+        for weight in zipf_weights(len(users), options['follow_exponent']):
+            total += weight
+            cum_weights.append(total)
+
+        # Pareto(2) ortalaması 2'dir
+        scale = options['mean_follows'] / 2
+        follows = []
+        for user in users:
+            wanted = min(len(users) - 1, int(rng.paretovariate(2) * scale))
+            chosen = set()
+            for _ in range(wanted * 3):
+                if len(chosen) >= wanted:
+                    break
+                target = rng.choices(by_popularity, cum_weights=cum_weights)[0]
+                if target.id != user.id:
+                    chosen.add(target.id)
+            follows.extend(Follow(follower_id=user.id, following_id=target_id) for target_id in chosen)
+
+        Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+        return len(follows)
+
+    def create_entries(self, rng, users, options):
+        # Yazma sıklığı da kuvvet yasasına uyar
+        by_activity = users[:]
+        rng.shuffle(by_activity)
+        authors = rng.choices(by_activity, weights=zipf_weights(len(users), 0.8), k=options['entries'])
+
+        now = timezone.now()
+        span = options['days'] * 24 * 60 * 60
+        entries = DiaryEntry.objects.bulk_create(
+            [
+                DiaryEntry(
+                    author=author,
+                    title=sentence(rng, 1, 5).capitalize() if rng.random() < 0.7 else '',
+                    content=sentence(rng, 10, 120).capitalize() + '.',
+                    privacy='public' if rng.random() < options['public_ratio'] else 'private',
+                )
+                for author in authors
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        # auto_now_add bulk_create'de de şimdiki zamanı yazar; tarihler sonradan dağıtılır
+        for entry in entries:
+            entry.created_at = entry.updated_at = now - timedelta(seconds=rng.randint(0, span))
+        DiaryEntry.objects.bulk_update(entries, ['created_at', 'updated_at'], batch_size=BATCH_SIZE)
+        return entries
+
+    def create_photos(self, rng, entries, options):
+        if not options['photo_ratio'] or not options['photo_variants']:
+            return 0
+        variants = [self.save_variant(rng, index) for index in range(options['photo_variants'])]
+        photos = [
+            DiaryPhoto(diary_entry=entry, image=rng.choice(variants), processing_state=READY)
+            for entry in entries if rng.random() < options['photo_ratio']
+            for _ in range(rng.randint(1, 3))
+        ]
+        DiaryPhoto.objects.bulk_create(photos, batch_size=BATCH_SIZE)
+        return len(photos)
+
+    def save_variant(self, rng, index):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        img = Image.new('RGB', (1024, 768), color)
+        img.paste(tuple(255 - channel for channel in color), (0, 0, 512, 384))
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=85)
+        return media_storage.save(f'diary_photos/demo_{index}.jpg', ContentFile(output.getvalue()))
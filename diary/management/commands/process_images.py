@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from diary import blobs
+from diary.images import process_pending, queue_missing_renditions, reset_stuck
+from diary.storage import media_storage
+
+
+class Command(BaseCommand):
+    help = 'Sırada bekleyen fotoğrafları ve profil resimlerini boyutlandırır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Bitince çıkma, yeni işleri beklemeye devam et')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='--loop modunda iki tarama arasındaki bekleme (saniye)')
+        parser.add_argument('--reset-stuck', action='store_true',
+                            help='Yarıda kalmış işleri yeniden sıraya al')
+        parser.add_argument('--backfill-renditions', action='store_true',
+                            help='Boyut kopyaları olmayan eski resimleri sıraya al')
+
+    def handle(self, *args, **options):
+        if options['reset_stuck']:
+            self.stdout.write(f'{reset_stuck()} yarıda kalmış iş yeniden sıraya alındı.')
+        if options['backfill_renditions']:
+            self.stdout.write(f'{queue_missing_renditions()} resim kopyaları için sıraya alındı.')
+
+        while True:
+            done = process_pending()
+            if done:
+                self.stdout.write(self.style.SUCCESS(f'{done} resim işlendi.'))
+            # Ayrılmışken serbest kalan dosyalar
+            blobs.purge_released(media_storage)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
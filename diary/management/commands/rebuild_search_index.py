@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from diary.models import DiaryEntry
+from diary.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Günlük arama indeksini DiaryEntry verisinden yeniden oluşturur.'
+
+    def handle(self, *args, **options):
+        entries = DiaryEntry.objects.order_by('id').values_list('id', 'title', 'content', 'author_id', 'privacy')
+        with transaction.atomic():
+            get_backend().rebuild(entries.iterator())
+        self.stdout.write(self.style.SUCCESS(f'{entries.count()} giriş indekslendi.'))
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from diary.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Ana sayfa akış tablosunu Follow ve DiaryEntry verisinden yeniden oluşturur.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Sadece bu kullanıcıların akışını oluştur')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        count = 0
+        for user in users.iterator():
+            rebuild_timeline(user)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{count} kullanıcının akışı yeniden oluşturuldu.'))
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from diary.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'UserProfile üzerindeki günlük/takipçi/takip sayaçlarını gerçek değerleriyle eşitler.'
+
+    def handle(self, *args, **options):
+        # Profili olmayan kullanıcılar için profil oluştur
+        missing = User.objects.filter(userprofile__isnull=True).values_list('id', flat=True)
+        created = UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id) for user_id in missing], batch_size=500
+        )
+
+        fixed = UserProfile.reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(created)} profil oluşturuldu, {fixed} profilin sayaçları düzeltildi.'
+        ))
@@ -0,0 +1,182 @@
+"""
+Yüklenen medya dosyalarının sunulması.
+
+MediaMiddleware MEDIA_URL altındaki istekleri oturum, kimlik doğrulama ve
+sorgu bütçesi ara katmanlarına girmeden yanıtlar. Dosyalar ETag ve
+Last-Modified ile koşullu isteklere (304), tek aralıklı Range isteklerine
+(206) cevap verir. İçerik adresli adlar (bkz. diary.storage) ve onlardan
+üretilen kopyalar hiç değişmediği için bir yıl ve immutable ile önbelleğe
+alınır.
+
+DIARY_MEDIA_SENDFILE ayarlanırsa dosya gövdesi önündeki web sunucusuna
+bırakılır: 'X-Accel-Redirect' (nginx, DIARY_MEDIA_ACCEL_PREFIX altındaki
+internal location) ya da 'X-Sendfile' (Apache mod_xsendfile, lighttpd).
+Bu durumda Range ve koşullu istekleri web sunucusu işler.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60 * 60
+# diary_photos/ab/<sha256>.jpg ve renditions/diary_photos/ab/<sha256>_480.webp
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{64}(_\d+)?\.\w+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sendfile_header():
+    return getattr(settings, 'DIARY_MEDIA_SENDFILE', None)
+
+
+def cache_control(path):
+    if HASHED_NAME_RE.search(path):
+        return f'max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'max-age={MUTABLE_MAX_AGE}'
+
+
+def parse_range(header, size):
+    """
+    Tek aralıklı Range başlığından (başlangıç, bitiş) döndürür. Başlık yoksa
+    ya da desteklenmiyorsa (çok aralıklı) None, karşılanamıyorsa ValueError.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        # bytes=-500: son 500 bayt
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class FileRange:
+    """Dosyanın [start, end] aralığını okuyan, FileResponse'a verilebilen nesne."""
+
+    def __init__(self, file, start, end):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve(request, path):
+    """MEDIA_ROOT altındaki path dosyasının yanıtı"""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        info = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Dosya bulunamadı.')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('Dosya bulunamadı.')
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    header = sendfile_header()
+    if header:
+        response = HttpResponse(content_type=content_type)
+        if header.lower() == 'x-accel-redirect':
+            response[header] = getattr(settings, 'DIARY_MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(path)
+        else:
+            response[header] = full_path
+        response['Cache-Control'] = cache_control(path)
+        return response
+
+    etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(info.st_mtime),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(request, etag=etag, last_modified=int(info.st_mtime))
+    if response is not None:
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), info.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{info.st_size}'
+            return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        # Tam dosya; WSGI sunucusu wsgi.file_wrapper ile sendfile kullanabilir
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+        response['Content-Length'] = end - start + 1
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+def serve_or_404(request, path):
+    # Kimlik doğrulama ara katmanı çalışmadığı için 404 şablonu yerine sade yanıt
+    try:
+        return serve(request, path)
+    except Http404:
+        return HttpResponse('Dosya bulunamadı.', status=404, content_type='text/plain; charset=utf-8')
+
+
+class MediaMiddleware:
+    """MEDIA_URL altındaki istekleri sonraki ara katmanlara ve URL çözümlemeye girmeden yanıtlar."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.MEDIA_URL
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def media_path(self, request):
+        if request.path_info.startswith(self.prefix):
+            return request.path_info[len(self.prefix):]
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        path = self.media_path(request)
+        if path is None:
+            return self.get_response(request)
+        return serve_or_404(request, path)
+
+    async def __acall__(self, request):
+        path = self.media_path(request)
+        if path is None:
+            return await self.get_response(request)
+        return await sync_to_async(serve_or_404)(request, path)
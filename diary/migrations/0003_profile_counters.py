@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    UserProfile = apps.get_model("diary", "UserProfile")
+    DiaryEntry = apps.get_model("diary", "DiaryEntry")
+    Follow = apps.get_model("diary", "Follow")
+
+    def count_of(model, key, **filters):
+        counts = (
+            model.objects.filter(**{key: OuterRef("user_id")}, **filters)
+            .order_by().values(key).annotate(total=Count("*")).values("total")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    UserProfile.objects.update(
+        entry_count=count_of(DiaryEntry, "author"),
+        public_entry_count=count_of(DiaryEntry, "author", privacy="public"),
+        followers_count=count_of(Follow, "following"),
+        following_count=count_of(Follow, "follower"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0002_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='public_entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0003_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diaryphoto',
+            name='processing_state',
+            field=models.CharField(choices=[('pending', 'Sırada'), ('processing', 'İşleniyor'), ('ready', 'Hazır'), ('failed', 'Hatalı')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='picture_state',
+            field=models.CharField(choices=[('pending', 'Sırada'), ('processing', 'İşleniyor'), ('ready', 'Hazır'), ('failed', 'Hatalı')], default='ready', max_length=10),
+        ),
+    ]
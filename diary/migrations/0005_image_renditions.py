@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0004_image_processing_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diaryphoto',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='picture_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
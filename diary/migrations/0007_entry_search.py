@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from diary.search import BACKENDS
+
+    vendor = schema_editor.connection.vendor
+    if vendor not in BACKENDS:
+        return
+    backend = BACKENDS[vendor]()
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_index(cursor)
+
+    DiaryEntry = apps.get_model("diary", "DiaryEntry")
+    using = schema_editor.connection.alias
+    backend.rebuild(
+        DiaryEntry.objects.using(using).values_list("id", "title", "content", "author_id", "privacy").iterator(),
+        using,
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    from diary.search import BACKENDS
+
+    vendor = schema_editor.connection.vendor
+    if vendor in BACKENDS:
+        with schema_editor.connection.cursor() as cursor:
+            BACKENDS[vendor]().drop_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0006_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('diary', '0007_entry_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='diary_timeline_user_created',
+        ),
+        migrations.AlterField(
+            model_name='diaryentry',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='diary_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='diaryentry',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='diary_entry_author_created'),
+        ),
+        migrations.AddIndex(
+            model_name='diaryentry',
+            index=models.Index(fields=['author', 'privacy', '-created_at', '-id'], name='diary_entry_author_privacy'),
+        ),
+        migrations.AddIndex(
+            model_name='diaryentry',
+            index=models.Index(condition=models.Q(('privacy', 'public')), fields=['-created_at', '-id'], name='diary_entry_public_created'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at'], name='diary_follow_following_created'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-created_at', '-entry'], name='diary_timeline_user_created'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+INDEX_NAME = "diary_user_email_lower"
+UNIQUE_INDEX_NAME = "diary_user_email_unique"
+
+
+def check_duplicate_emails(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    duplicates = list(
+        User.objects.exclude(email="")
+        .annotate(email_lower=Lower("email"))
+        .values("email_lower")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("email_lower", flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Aynı e-postayı kullanan hesaplar var, benzersiz indeks oluşturulamadı: " + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("diary", "0009_follow_suggestions"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # auth_user başka bir uygulamanın tablosu; ifade indeksleri elle oluşturulur.
+        # Benzersizlik kısmi indeksle sağlanır: boş e-postalar (createsuperuser,
+        # eski hesaplar) kısıta dahil değildir. SQLite, sorgu "email <> ''"
+        # koşulunu içermedikçe kısmi indeksi aramada kullanmadığından aramalar
+        # için ayrıca tam bir ifade indeksi vardır.
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX {UNIQUE_INDEX_NAME} ON auth_user (LOWER(email)) WHERE email <> ''",
+            f"DROP INDEX {UNIQUE_INDEX_NAME}",
+        ),
+        migrations.RunSQL(
+            f"CREATE INDEX {INDEX_NAME} ON auth_user (LOWER(email))",
+            f"DROP INDEX {INDEX_NAME}",
+        ),
+    ]
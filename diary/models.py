@@ -1,62 +1,120 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
-from PIL import Image
-from io import BytesIO
-from django.core.files.base import ContentFile
+from .storage import get_media_storage
+
+
+# Yüklenen resimlerin arka plan işleme durumları (bkz. diary.images)
+PENDING = 'pending'
+PROCESSING = 'processing'
+READY = 'ready'
+FAILED = 'failed'
+PROCESSING_STATES = [
+    (PENDING, 'Sırada'),
+    (PROCESSING, 'İşleniyor'),
+    (READY, 'Hazır'),
+    (FAILED, 'Hatalı'),
+]
 
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', storage=get_media_storage, blank=True, null=True)
+    picture_state = models.CharField(max_length=10, choices=PROCESSING_STATES, default=READY)
+    # Farklı boyut ve biçimlerdeki kopyalar (bkz. diary.renditions)
+    picture_renditions = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Akış tablosu bu kullanıcı için en son ne zaman baştan oluşturuldu.
+    # Boşsa akış "soğuk" kabul edilir ve ana sayfa eski sorguya döner.
+    timeline_built_at = models.DateTimeField(blank=True, null=True)
+    # Profil sayfasında COUNT sorgusu yapmamak için tutulan sayaçlar.
+    # F() ifadeleriyle güncellenir, kaymalar reconcile_counters ile düzeltilir.
+    entry_count = models.PositiveIntegerField(default=0)
+    public_entry_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
     
+    COUNTER_FIELDS = ('entry_count', 'public_entry_count', 'followers_count', 'following_count')
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @staticmethod
+    def _counter_changes(deltas):
+        # Kaymış bir sayaç azaltılırken sıfırın altına inip CHECK kısıtını bozmasın
+        return {
+            field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items() if delta
+        }
+
+    @classmethod
+    def adjust_counters(cls, user_id, **deltas):
+        """Sayaçları tek bir UPDATE ile atomik olarak artırır/azaltır."""
+        changes = cls._counter_changes(deltas)
+        if changes:
+            cls.objects.filter(user_id=user_id).update(**changes)
+
+    @classmethod
+    async def aadjust_counters(cls, user_id, **deltas):
+        changes = cls._counter_changes(deltas)
+        if changes:
+            await cls.objects.filter(user_id=user_id).aupdate(**changes)
+
+    @classmethod
+    def reconcile_counters(cls, queryset=None):
+        """
+        Sayaçları gerçek değerleriyle karşılaştırır ve kaymış olanları
+        tek bir toplu UPDATE ile düzeltir. Düzeltilen profil sayısını döndürür.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        def count_of(model, key, **filters):
+            counts = (
+                model.objects.filter(**{key: OuterRef('user_id')}, **filters)
+                .order_by().values(key).annotate(total=Count('*')).values('total')
+            )
+            return Coalesce(Subquery(counts), 0)
+
+        actual = {
+            'entry_count': count_of(DiaryEntry, 'author'),
+            'public_entry_count': count_of(DiaryEntry, 'author', privacy='public'),
+            'followers_count': count_of(Follow, 'following'),
+            'following_count': count_of(Follow, 'follower'),
+        }
+        drift = Q()
+        for field in cls.COUNTER_FIELDS:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+
+        drifted = list(
+            queryset.annotate(**{f'actual_{field}': value for field, value in actual.items()})
+            .filter(drift).values_list('pk', flat=True)
+        )
+        if drifted:
+            cls.objects.filter(pk__in=drifted).update(**actual)
+        return len(drifted)
+
+    @property
+    def picture_ready(self):
+        return self.picture_state == READY
+
     def save(self, *args, **kwargs):
-        # First, call the original save method
+        # Yeni yüklenen resim ham olarak kaydedilir, boyutlandırma arka planda yapılır
+        new_upload = bool(self.profile_picture) and not self.profile_picture._committed
+        if new_upload:
+            self.picture_state = PENDING
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'picture_state'}
+
         super().save(*args, **kwargs)
 
-        # Then, process the image if it exists
-        if self.profile_picture and self.profile_picture.name:
-            try:
-                # Dosya yolu elde edilebiliyorsa
-                if hasattr(self.profile_picture.storage, 'path'):
-                    img_path = self.profile_picture.path
-                    img = Image.open(img_path)
-
-                    # Resize if the image is larger than 300x300
-                    if img.height > 300 or img.width > 300:
-                        output_size = (300, 300)
-                        img.thumbnail(output_size)
-                        
-                        # Save the image back to the same path
-                        img.save(img_path, quality=85, optimize=True)
-                # Dosya yolu elde edilemiyorsa (örn. S3 veya başka bir storage)
-                else:
-                    # Dosyayı belleğe al, işle ve geri kaydet
-                    img_data = self.profile_picture.read()
-                    img = Image.open(BytesIO(img_data))
-                    
-                    if img.height > 300 or img.width > 300:
-                        output_size = (300, 300)
-                        img.thumbnail(output_size)
-                        
-                        output = BytesIO()
-                        img.save(output, format=img.format, quality=85, optimize=True)
-                        output.seek(0)
-                        
-                        # Dosyayı güncelle
-                        self.profile_picture.save(
-                            self.profile_picture.name,
-                            ContentFile(output.read()),
-                            save=False
-                        )
-            except (IOError, FileNotFoundError, AttributeError):
-                # Handle cases where the file might not exist or is corrupted
-                pass
+        if new_upload:
+            from .images import schedule
+            schedule(self)
 
 
 class Follow(models.Model):
@@ -66,6 +124,10 @@ class Follow(models.Model):
     
     class Meta:
         unique_together = ('follower', 'following')
+        indexes = [
+            # Bir kullanıcının takipçileri (akış dağıtımı, takipçi listesi)
+            models.Index(fields=['following', '-created_at'], name='diary_follow_following_created'),
+        ]
     
     def __str__(self):
         return f"{self.follower.username} follows {self.following.username}"
@@ -77,7 +139,8 @@ class DiaryEntry(models.Model):
         ('public', 'Herkes'),
     ]
     
-    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='diary_entries')
+    # Tek başına author indeksi gereksiz; aşağıdaki bileşik indeksler author ile başlar
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='diary_entries', db_index=False)
     title = models.CharField(max_length=200, blank=True)
     content = models.TextField()
     privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='private')
@@ -87,6 +150,18 @@ class DiaryEntry(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Diary Entries'
+        indexes = [
+            # Kendi profili ve takvimi: yazarın tüm girişleri tarih sırasıyla
+            models.Index(fields=['author', '-created_at', '-id'], name='diary_entry_author_created'),
+            # Başkasının profili ve canlı akış: yazarın herkese açık girişleri
+            models.Index(fields=['author', 'privacy', '-created_at', '-id'], name='diary_entry_author_privacy'),
+            # Genel herkese açık akış; sadece public satırlar indekslenir
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='diary_entry_public_created',
+                condition=Q(privacy='public'),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.author.username} - {self.created_at.strftime('%Y-%m-%d')}"
@@ -98,30 +173,81 @@ class DiaryEntry(models.Model):
 
 class DiaryPhoto(models.Model):
     diary_entry = models.ForeignKey(DiaryEntry, on_delete=models.CASCADE, related_name='photos')
-    image = models.ImageField(upload_to='diary_photos/')
+    image = models.ImageField(upload_to='diary_photos/', storage=get_media_storage)
     caption = models.CharField(max_length=200, blank=True)
+    processing_state = models.CharField(max_length=10, choices=PROCESSING_STATES, default=READY)
+    # Farklı boyut ve biçimlerdeki kopyalar (bkz. diary.renditions)
+    renditions = models.JSONField(default=dict, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"Photo for {self.diary_entry}"
 
+    @property
+    def is_ready(self):
+        return self.processing_state == READY
+
+    @property
+    def is_processing(self):
+        return self.processing_state in (PENDING, PROCESSING)
+
+    @property
+    def is_failed(self):
+        return self.processing_state == FAILED
+
     def save(self, *args, **kwargs):
-        # First, call the original save method
+        # Yeni yüklenen resim ham olarak kaydedilir, boyutlandırma arka planda yapılır
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload:
+            self.processing_state = PENDING
+
         super().save(*args, **kwargs)
 
-        # Then, process the image if it exists
-        if self.image and hasattr(self.image.storage, 'path'):
-            try:
-                img_path = self.image.path
-                img = Image.open(img_path)
-
-                # Resize if the image is larger than 1024x1024
-                if img.height > 1024 or img.width > 1024:
-                    output_size = (1024, 1024)
-                    img.thumbnail(output_size)
-                    
-                    # Save the image back to the same path
-                    img.save(img_path, quality=85, optimize=True)
-            except (IOError, FileNotFoundError):
-                # Handle cases where the file might not exist or is corrupted
-                pass
+        if new_upload:
+            from .images import schedule
+            schedule(self)
+
+
+class TimelineEntry(models.Model):
+    """Kullanıcının ana sayfa akışının önceden hesaplanmış (fan-out) hali"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    entry = models.ForeignKey(DiaryEntry, on_delete=models.CASCADE, related_name='timeline_items')
+    # Takibi bırakınca satırları tek sorguda silebilmek için yazar kopyalanır
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Sıralama için girişin created_at değerinin kopyası
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'entry')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-entry'], name='diary_timeline_user_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} <- {self.entry_id}"
+
+
+class FollowSuggestions(models.Model):
+    """Kullanıcı için önceden hesaplanmış takip önerileri (bkz. diary.suggestions)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='follow_suggestions')
+    # Skora göre sıralı [kullanıcı id, ortak bağlantı sayısı, seni takip ediyor mu (0/1)] listesi
+    suggestions = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} için {len(self.suggestions)} öneri"
+
+
+class MediaBlob(models.Model):
+    """İçerik adresli bir medya dosyası ve onu kullanan satır sayısı"""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    # Dosya yazılmadan önce ayrıldığı an; yakın zamanda ayrılan kayıt silinmez (bkz. diary.blobs)
+    reserved_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
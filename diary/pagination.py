@@ -0,0 +1,102 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+PER_PAGE = 10
+
+
+class CursorPage:
+    """
+    Anahtar kümesi (keyset) sayfalamasının bir sayfası.
+    Toplam sayı tutulmaz; sadece bir sonraki sayfanın imleci bilinir.
+    """
+
+    def __init__(self, object_list, next_cursor=None, is_first=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or not self.is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Geçersiz imleçlerde None döndürür (ilk sayfa gösterilir)."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_position(request, per_page):
+    """İstekteki ?cursor= konumu ya da eski ?page=N bağlantılarının kaydırması: (konum, offset)"""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return decode_cursor(cursor), 0
+    # Geriye dönük uyumluluk: ?page=N
+    try:
+        return None, max(int(request.GET.get('page', 1)) - 1, 0) * per_page
+    except ValueError:
+        return None, 0
+
+
+def _page_query(queryset, request, per_page, keys):
+    time_key, id_key = keys
+    queryset = queryset.order_by(f'-{time_key}', f'-{id_key}')
+
+    position, offset = page_position(request, per_page)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{time_key}__lt': created_at}) | Q(**{time_key: created_at, f'{id_key}__lt': pk})
+        )
+
+    return queryset[offset:offset + per_page + 1], position is None and offset == 0
+
+
+def make_page(rows, per_page, keys, is_first):
+    time_key, id_key = keys
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_key), getattr(last, id_key))
+    return CursorPage(rows, next_cursor, is_first=is_first)
+
+
+def paginate(queryset, request, per_page=PER_PAGE, keys=('created_at', 'id')):
+    """
+    Sorguyu (created_at, id) anahtarına göre azalan sırada sayfalar.
+    ?cursor= her derinlikte aynı maliyetli indeksli bir aralık taramasıdır.
+    Eski ?page= bağlantıları OFFSET ile çalışmaya devam eder, ancak
+    sonraki sayfa bağlantısı yine imleç kullanır ve COUNT(*) yapılmaz.
+    """
+    query, is_first = _page_query(queryset, request, per_page, keys)
+    return make_page(list(query), per_page, keys, is_first)
+
+
+async def apaginate(queryset, request, per_page=PER_PAGE, keys=('created_at', 'id')):
+    """paginate'in asenkron görünümler için sürümü."""
+    query, is_first = _page_query(queryset, request, per_page, keys)
+    return make_page([row async for row in query], per_page, keys, is_first)
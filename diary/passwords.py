@@ -0,0 +1,157 @@
+"""
+Parola özetleme maliyetinin sınırlanması.
+
+Parola özetleri (scrypt, Argon2, PBKDF2) bilerek yavaştır. Giriş ve kayıt
+isteklerindeki özetleme küçük bir iş parçacığı havuzunda (DIARY_HASH_WORKERS)
+çalışır; aynı anda en fazla DIARY_HASH_WORKERS + DIARY_HASH_QUEUE özetleme
+kabul edilir, yer açılmazsa DIARY_HASH_WAIT saniye sonra HashingBusy
+fırlatılır. Böylece bir giriş dalgası bütün işçileri özetlemeyle meşgul
+edemez, fazlası hızla reddedilir.
+
+Tercih edilen özetleyici PASSWORD_HASHERS listesinin ilkidir (bkz.
+DIARY_PASSWORD_HASHER); eski özetle kayıtlı parolalar başarılı girişte
+yeniden özetlenir. Özetlemede geçen süre HashTimingMiddleware ile isteğe
+göre toplanır, Server-Timing başlığında gönderilir ve loglanır.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+_timing = ContextVar('diary_hash_timing', default=None)
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class HashTiming:
+    """Bir istekte yapılan özetlemelerin sayısı, süresi ve sırada bekleme süresi"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.wait = 0.0
+
+    def server_timing(self):
+        return 'hash;dur={:.1f};desc="{} hashes, {:.1f}ms queued"'.format(
+            self.seconds * 1000, self.count, self.wait * 1000
+        )
+
+
+def _get_pool():
+    global _executor, _slots
+    workers = getattr(settings, 'DIARY_HASH_WORKERS', 2)
+    if not workers:
+        return None, None
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='diary-hash')
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, 'DIARY_HASH_QUEUE', 8))
+    return _executor, _slots
+
+
+def run(func, *args):
+    """func(*args)'ı özetleme havuzunda çalıştırır ve sonucunu döndürür."""
+    executor, slots = _get_pool()
+    timing = _timing.get()
+    started = time.perf_counter()
+    if executor is None:
+        result, elapsed = _timed(func, args)
+    else:
+        if not slots.acquire(timeout=getattr(settings, 'DIARY_HASH_WAIT', 2)):
+            logger.warning('Parola özetleme havuzu dolu, istek reddedildi')
+            raise HashingBusy('Parola özetleme havuzu dolu.')
+        try:
+            future = executor.submit(_timed, func, args)
+            result, elapsed = future.result()
+        finally:
+            slots.release()
+    if timing is not None:
+        timing.count += 1
+        timing.seconds += elapsed
+        timing.wait += time.perf_counter() - started - elapsed
+    return result
+
+
+def _timed(func, args):
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+def make_password(raw_password):
+    return run(hashers.make_password, raw_password)
+
+
+def set_password(user, raw_password):
+    """user.set_password gibi; özet havuzda hesaplanır"""
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+
+def check_password(user, raw_password):
+    """
+    user.check_password gibi. Parola eski bir özetleyiciyle ya da eski
+    ayarlarla kaydedildiyse tercih edilen özetleyiciyle yeniden yazılır;
+    kayıt havuz iş parçacığında değil, isteğin kendi bağlantısında yapılır.
+    """
+    outdated = []
+    if not run(hashers.check_password, raw_password, user.password, outdated.append):
+        return False
+    if outdated:
+        user.password = make_password(raw_password)
+        user.save(update_fields=['password'])
+    return True
+
+
+class HashTimingMiddleware:
+    """İstekteki özetleme süresini Server-Timing başlığına ekler ve loglar."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = HashTiming()
+        token = _timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timing.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        # sync_to_async bağlamı kopyalar; görünümdeki özetlemeler aynı nesneye yazar
+        timing = HashTiming()
+        token = _timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timing.reset(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing):
+        if timing.count:
+            existing = response.get('Server-Timing')
+            value = timing.server_timing()
+            response['Server-Timing'] = f'{existing}, {value}' if existing else value
+            logger.info(
+                '%s: %s parola özeti %.1f ms (sırada %.1f ms)',
+                request.path, timing.count, timing.seconds * 1000, timing.wait * 1000,
+            )
+        return response
@@ -0,0 +1,170 @@
+"""
+Görünüm başına SQL sorgu bütçesi ve N+1 dedektörü.
+
+QueryBudgetMiddleware her isteğin çalıştırdığı sorguları sayar, süresini
+toplar ve sabitleri atılmış parmak izleriyle tekrarlanan sorguları bulur.
+Bütçeler DIARY_QUERY_BUDGETS ayarında URL adına göre verilir (fnmatch
+kalıpları kullanılabilir, örn. 'admin:*_changelist'). Bütçe aşılırsa
+DIARY_QUERY_BUDGET_ACTION 'raise' ise QueryBudgetExceeded fırlatılır,
+aksi halde uyarı loglanır. Sayılar Server-Timing başlığında da gönderilir.
+
+Testler için QueryBudgetMixin aynı ölçümü bir blok içinde yapar.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from fnmatch import fnmatchcase
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN')
+IN_LIST_RE = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """Sabitleri atılmış sorgu metni: aynı şablondan gelen sorgular eşleşir."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    return IN_LIST_RE.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """execute_wrapper olarak bütün bağlantılardaki sorguları kaydeder."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @contextmanager
+    def record(self):
+        with _wrap_all(self):
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for sql, duration in self.queries)
+
+    def duplicates(self, threshold=2):
+        """threshold ve üzeri kez çalışan sorgu parmak izleri."""
+        counts = Counter(
+            fingerprint(sql) for sql, duration in self.queries
+            if not sql.startswith(TRANSACTION_STATEMENTS)
+        )
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+
+@contextmanager
+def _wrap_all(wrapper):
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+def budget_for(view_name):
+    budgets = getattr(settings, 'DIARY_QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    for pattern, budget in budgets.items():
+        if fnmatchcase(view_name, pattern):
+            return budget
+    return None
+
+
+def server_timing(recorder, duplicates):
+    return 'db;dur={:.1f};desc="{} queries, {} duplicated"'.format(
+        recorder.duration * 1000, recorder.count, sum(duplicates.values()) - len(duplicates)
+    )
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Asenkron ORM sorguları isteğin sync_to_async iş parçacığındaki
+        # bağlantıda çalışır; sarmalayıcılar o iş parçacığında kurulup kaldırılır.
+        recorder = QueryRecorder()
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(recorder.record())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else ''
+        duplicates = recorder.duplicates(getattr(settings, 'DIARY_QUERY_DUPLICATE_THRESHOLD', 3))
+
+        if getattr(settings, 'DIARY_QUERY_BUDGET_HEADERS', settings.DEBUG):
+            response['Server-Timing'] = server_timing(recorder, duplicates)
+
+        for sql, count in duplicates.items():
+            logger.warning('%s: aynı sorgu %s kez çalıştı (N+1?): %s', view_name, count, sql)
+
+        budget = budget_for(view_name) if view_name else None
+        if budget is not None and recorder.count > budget:
+            message = f'{view_name}: {recorder.count} sorgu çalıştı, bütçe {budget}'
+            if getattr(settings, 'DIARY_QUERY_BUDGET_ACTION', 'log') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class QueryBudgetMixin:
+    """
+    TestCase karışımı:
+
+        with self.assertQueryBudget(4):
+            self.client.get('/')
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, allow_duplicates=False):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        queries = '\n'.join(sql for sql, duration in recorder.queries)
+        self.assertLessEqual(
+            recorder.count, budget,
+            f'{recorder.count} sorgu çalıştı, bütçe {budget}:\n{queries}',
+        )
+        if not allow_duplicates:
+            duplicates = recorder.duplicates()
+            self.assertFalse(duplicates, f'Tekrarlanan sorgular: {duplicates}')
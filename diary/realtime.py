@@ -0,0 +1,139 @@
+"""
+Akış için anlık bildirimler (server-sent events).
+
+Herkese açık yeni bir giriş kaydedilip işlem onaylandığında girişin ID'si
+yazarın takipçilerine yayınlanır.
+Akış bağlantısı (async_views.feed_stream) bekleyen bildirimleri toplar ve
+"entries" olayında sadece ID'leri ve sayıyı gönderir; istemci kartları
+gerektiğinde feed_cards görünümünden ister. Bağlantı başına bir
+asyncio.Queue tutulur, boştaki bağlantı veritabanı bağlantısı tutmaz.
+
+Yayın/abonelik arka ucu DIARY_REALTIME_BROKER ayarıyla seçilir. Varsayılan
+InProcessBroker sadece aynı süreçteki bağlantılara dağıtır; birden fazla
+süreçle (uvicorn --workers N) çalışırken Redis gibi ortak bir arka uç
+Broker'dan türetilip bu ayara yazılmalıdır.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Bir olayda gönderilen en fazla ID; fazlası sadece sayıya eklenir
+MAX_IDS = 50
+
+
+def heartbeat_seconds():
+    return getattr(settings, 'DIARY_REALTIME_HEARTBEAT', 25)
+
+
+def max_age_seconds():
+    return getattr(settings, 'DIARY_REALTIME_MAX_AGE', 300)
+
+
+class Subscription:
+    """Bir akış bağlantısının kuyruğu. Olay döngüsünde oluşturulmalıdır."""
+
+    def __init__(self, user_id, maxsize=MAX_IDS):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, entry_id):
+        # Kuyruk doluysa ID atılır ama sayılır; istemci sayıyı yine görür
+        try:
+            self.queue.put_nowait(entry_id)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def next_batch(self, timeout):
+        """Bekleyen bütün giriş ID'leri ve atılanların sayısı; timeout içinde gelmezse ([], 0)."""
+        try:
+            batch = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return [], 0
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        dropped, self.dropped = self.dropped, 0
+        return batch, dropped
+
+
+class Broker:
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, user_ids, entry_id):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Aynı süreçteki abonelere dağıtır. publish herhangi bir iş parçacığından çağrılabilir."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.user_id]
+
+    def publish(self, user_ids, entry_id):
+        with self.lock:
+            targets = [
+                subscription
+                for user_id in user_ids
+                for subscription in self.subscribers.get(user_id, ())
+            ]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, entry_id)
+            except RuntimeError:
+                # Olay döngüsü kapanmış
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return _load_broker(getattr(settings, 'DIARY_REALTIME_BROKER', 'diary.realtime.InProcessBroker'))
+
+
+def publish_entry(entry, follower_ids):
+    """Girişi, işlem onaylandıktan sonra takipçilere bildirir."""
+    if not follower_ids:
+        return
+    entry_id = entry.id
+    transaction.on_commit(lambda: get_broker().publish(follower_ids, entry_id))
+
+
+def format_event(entry_ids, extra=0):
+    """
+    entries olayı: yeni giriş ID'leri (yeniden eskiye) ve toplam sayı.
+    Olay kimliği en yeni ID'dir; yeniden bağlanan tarayıcı bunu
+    Last-Event-ID başlığında geri gönderir.
+    """
+    entry_ids = sorted(set(entry_ids), reverse=True)
+    data = json.dumps({'ids': entry_ids[:MAX_IDS], 'count': len(entry_ids) + extra})
+    lines = [f'id: {entry_ids[0]}'] if entry_ids else []
+    lines += ['event: entries', f'data: {data}']
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,100 @@
+"""
+Resimlerin farklı genişliklerdeki kopyaları (rendition).
+
+Her resim için sabit genişlik kümesi (WIDTHS) ve desteklenen her biçim
+(AVIF, WebP ve JPEG yedeği) için bir kopya üretilir. Üretilen dosyalar
+modeldeki JSON alanında tutulur, böylece şablonlar ek sorgu yapmadan
+srcset oluşturabilir:
+
+    {"webp": [[64, "renditions/diary_photos/a_64.webp"], ...], "jpeg": [...]}
+"""
+import posixpath
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image
+
+WIDTHS = (64, 160, 480, 1024)
+
+# (anahtar, Pillow biçimi, MIME tipi, uzantı, kaydetme seçenekleri)
+# Tercih sırasına göre; AVIF sadece pillow-avif-plugin kuruluysa üretilir.
+FORMATS = [
+    ('avif', 'AVIF', 'image/avif', 'avif', {'quality': 60}),
+    ('webp', 'WEBP', 'image/webp', 'webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', 'image/jpeg', 'jpg', {'quality': 82, 'progressive': True}),
+]
+FALLBACK_FORMAT = 'jpeg'
+
+
+def available_formats():
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt[1] in Image.SAVE]
+
+
+def rendition_name(source_name, width, extension):
+    stem = posixpath.splitext(source_name)[0]
+    return f'renditions/{stem}_{width}.{extension}'
+
+
+def _flatten(img):
+    # JPEG saydamlık desteklemez, saydam resimler beyaz zemine yerleştirilir
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, 'white')
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def generate(field, img=None, widths=WIDTHS):
+    """
+    Resmin bütün kopyalarını üretir ve JSON alanına yazılacak sözlüğü döndürür.
+    Resim zaten açıksa (img) dosya depolamadan tekrar okunmaz.
+    """
+    storage = field.storage
+    if img is None:
+        with storage.open(field.name) as source:
+            img = Image.open(source)
+            img.load()
+    img = _flatten(img)
+
+    # Kaynaktan büyük kopya üretilmez; kaynak genişliği en büyük kopya olur
+    targets = sorted({min(width, img.width) for width in widths}, reverse=True)
+
+    formats = available_formats()
+    renditions = {key: [] for key, *rest in formats}
+    current = img
+    for width in targets:
+        height = max(1, round(img.height * width / img.width))
+        # Her kopya bir öncekinden küçültülür, büyük kaynağı tekrar tekrar işlemez
+        current = current.resize((width, height), Image.LANCZOS)
+        for key, pil_format, mime, extension, options in formats:
+            output = BytesIO()
+            current.save(output, format=pil_format, **options)
+            name = rendition_name(field.name, width, extension)
+            # Kaynak içerik adresli olduğu için aynı adlı kopya aynı içeriktir
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(output.getvalue()))
+            renditions[key].append([width, name])
+
+    for entries in renditions.values():
+        entries.sort()
+    return renditions
+
+
+def delete_for(storage, source_name):
+    """Kaynak dosyadan üretilmiş bütün kopyaları siler."""
+    directory, filename = posixpath.split(rendition_name(source_name, 0, ''))
+    prefix = filename[:-len('0.')]
+    try:
+        files = storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return
+    for name in files:
+        if name.startswith(prefix):
+            storage.delete(posixpath.join(directory, name))
+
+
+def srcset(storage, entries):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, name in entries)
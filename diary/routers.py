@@ -0,0 +1,118 @@
+"""
+Okuma kopyalarına (read replica) yönlendirme.
+
+DIARY_READ_REPLICAS boşsa her şey 'default' veritabanına gider. Doluysa:
+
+* Yazmalar her zaman birincil ('default') veritabanına gider.
+* Okumalar sadece ReplicaMiddleware'in izin verdiği isteklerde kopyalara
+  gider: GET/HEAD istekleri, @primary_db ile işaretlenmemiş görünümler ve
+  yakın zamanda yazma yapmamış istemciler. Yönetim komutları, arka plan
+  iş parçacıkları ve diğer bütün kod birincil veritabanından okur.
+* Yazdığını okuma (read-your-writes): yazma isteğinden sonra istemciye
+  kısa ömürlü bir çerez bırakılır; DIARY_REPLICA_STICKY_SECONDS boyunca
+  o istemcinin okumaları da birincilden yapılır, böylece kopyadaki
+  gecikme kendi yazdığını görmesini engellemez.
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'diary_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = contextvars.ContextVar('diary_use_replica', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DIARY_READ_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'DIARY_REPLICA_STICKY_SECONDS', 10)
+
+
+@contextmanager
+def reading_from_replica(enabled=True):
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def primary_db(view_func):
+    """Görünümün bütün okumalarını birincil veritabanından yaptırır."""
+    view_func.use_primary_db = True
+    return view_func
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        pool = replicas()
+        if pool and _use_replica.get():
+            return random.choice(pool)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Kopyalar birincilin aynısıdır; farklı bağlantılardan gelen nesneler ilişkilendirilebilir
+        pool = {PRIMARY, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Kopyalar şemayı birincilden alır
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with reading_from_replica(self.use_replica(request)):
+            response = self.get_response(request)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        # Bağlam değişkeni sync_to_async ile ORM iş parçacığına da kopyalanır
+        with reading_from_replica(self.use_replica(request)):
+            response = await self.get_response(request)
+        return self.finish(request, response)
+
+    def use_replica(self, request):
+        return bool(replicas()) and request.method in SAFE_METHODS and not self.is_sticky(request)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replicas():
+            until = time.time() + sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, f'{until:.0f}', max_age=sticky_seconds(), httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'use_primary_db', False):
+            _use_replica.set(False)
+
+    def is_sticky(self, request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
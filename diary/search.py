@@ -0,0 +1,184 @@
+"""
+Günlük girişlerinde tam metin arama.
+
+Veritabanına göre iki arka uç vardır:
+
+* SQLite: FTS5 sanal tablosu (diary_entry_fts). Metin Türkçe kurallarıyla
+  küçültülüp aksanlardan arındırılarak yazılır (İ->i, I->ı->i, ğ->g ...),
+  sorgu da aynı şekilde normalleştirilir. Tablo giriş kaydedilip
+  silindikçe signals üzerinden güncellenir.
+* PostgreSQL: 'turkish' yapılandırmasıyla tsvector üzerinde GIN ifade
+  indeksi. İndeksi veritabanı güncel tuttuğu için ek iş gerekmez.
+
+Sonuçlar sıralama puanına göre gelir ve (puan, id) imleciyle sayfalanır.
+"""
+import base64
+import re
+import unicodedata
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from .pagination import CursorPage, PER_PAGE
+
+FTS_TABLE = 'diary_entry_fts'
+
+TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Türkçe'ye özgü ve NFKD ile ayrışmayan harfler
+TURKISH_FOLD = str.maketrans({'ı': 'i', 'ß': 'ss'})
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Türkçe kurallarıyla küçültür ve aksanları kaldırır: 'İLK Günlüğüm' -> 'ilk gunlugum'"""
+    text = text.translate(TURKISH_LOWER).lower().translate(TURKISH_FOLD)
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def encode_cursor(rank, pk):
+    return base64.urlsafe_b64encode(f'{rank!r}|{pk}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        rank, pk = raw.rsplit('|', 1)
+        return float(rank), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class SQLiteBackend:
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, content, author_id UNINDEXED, privacy UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index_entry(self, entry, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [entry.id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content, author_id, privacy) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [entry.id, normalize(entry.title), normalize(entry.content), entry.author_id, entry.privacy],
+            )
+
+    def remove_entry(self, entry_id, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [entry_id])
+
+    def rebuild(self, entries, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content, author_id, privacy) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                (
+                    [pk, normalize(title), normalize(content), author_id, privacy]
+                    for pk, title, content, author_id, privacy in entries
+                ),
+            )
+
+    def search(self, query, user, position, limit, using=DEFAULT_DB_ALIAS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Her kelime önek olarak aranır ve hepsi eşleşmelidir
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        # bm25 küçük değer = daha iyi eşleşme; başlık içerikten ağırlıklı
+        rank = f'bm25({FTS_TABLE}, 4.0, 1.0)'
+        sql = (
+            f'SELECT rowid, {rank} FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND (privacy = %s OR author_id = %s)'
+        )
+        params = [match, 'public', user.id]
+        if position:
+            sql += f' AND ({rank} > %s OR ({rank} = %s AND rowid > %s))'
+            params += [position[0], position[0], position[1]]
+        sql += f' ORDER BY {rank}, rowid LIMIT %s'
+        params.append(limit)
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class PostgreSQLBackend:
+    DOCUMENT = "to_tsvector('turkish', coalesce(title, '') || ' ' || coalesce(content, ''))"
+
+    def create_index(self, cursor):
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS diary_entry_search_idx '
+            f'ON diary_diaryentry USING GIN ({self.DOCUMENT})'
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute('DROP INDEX IF EXISTS diary_entry_search_idx')
+
+    def index_entry(self, entry, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def remove_entry(self, entry_id, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def rebuild(self, entries, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def search(self, query, user, position, limit, using=DEFAULT_DB_ALIAS):
+        if not query.strip():
+            return []
+        # ts_rank büyük değer = daha iyi eşleşme; imleç puanı eksi olarak tutulur
+        rank = f"-ts_rank_cd({self.DOCUMENT}, websearch_to_tsquery('turkish', %s))"
+        sql = (
+            f'SELECT id, {rank} AS rank FROM diary_diaryentry '
+            f"WHERE {self.DOCUMENT} @@ websearch_to_tsquery('turkish', %s) "
+            'AND (privacy = %s OR author_id = %s)'
+        )
+        params = [query, query, 'public', user.id]
+        if position:
+            sql += f' AND ({rank} > %s OR ({rank} = %s AND id > %s))'
+            params += [query, position[0], query, position[0], position[1]]
+        sql += ' ORDER BY rank, id LIMIT %s'
+        params.append(limit)
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend(vendor=None):
+    return BACKENDS[vendor or connection.vendor]()
+
+
+def search_entries(query, user, cursor=None, per_page=PER_PAGE):
+    """Kullanıcının görebileceği (herkese açık + kendi) girişlerde arar."""
+    from .models import DiaryEntry
+
+    position = decode_cursor(cursor) if cursor else None
+    using = router.db_for_read(DiaryEntry)
+    rows = get_backend(connections[using].vendor).search(query, user, position, per_page + 1, using)
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+    entries = DiaryEntry.objects.using(using).select_related('author', 'author__userprofile').in_bulk(
+        [pk for pk, rank in rows]
+    )
+    return CursorPage(
+        [entries[pk] for pk, rank in rows if pk in entries],
+        next_cursor,
+        is_first=position is None,
+    )
@@ -0,0 +1,135 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import connections, transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import DiaryEntry, DiaryPhoto, Follow, UserProfile
+from . import authcache, blobs, cards, conditional, feeds, realtime, search, timeline
+
+
+@receiver(post_save, sender=DiaryEntry)
+def entry_saved(sender, instance, created, using, **kwargs):
+    # Yeni giriş ya da gizlilik değişikliği akışlara yansıtılır.
+    # Silinen girişlerin akış satırları CASCADE ile tek sorguda gider.
+    follower_ids = timeline.fan_out_entry(instance)
+    search.get_backend(connections[using].vendor).index_entry(instance, using)
+    feeds.public_entry_changed(instance)
+    author_id = instance.author_id
+    transaction.on_commit(lambda: conditional.bump_profile(author_id))
+    if created:
+        realtime.publish_entry(instance, follower_ids)
+
+
+@receiver(post_delete, sender=DiaryEntry)
+def entry_deleted(sender, instance, using, **kwargs):
+    search.get_backend(connections[using].vendor).remove_entry(instance.id, using)
+    feeds.public_entry_changed(instance)
+    author_id = instance.author_id
+    transaction.on_commit(lambda: conditional.bump_profile(author_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.add_author_to_timeline(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.remove_author_from_timeline(instance.follower_id, instance.following_id)
+
+
+# Önbellekteki oturum kullanıcısı ve takip edilenler (bkz. diary.authcache).
+# Silme işlem onaylandıktan sonra yapılır; araya giren bir istek önbelleği
+# eski veriyle yeniden dolduramaz.
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def following_changed(sender, instance, **kwargs):
+    follower_id, following_id = instance.follower_id, instance.following_id
+
+    def invalidate():
+        authcache.invalidate_following(follower_id)
+        # Takip düğmesi ve iki taraftaki sayaçlar (bkz. diary.conditional)
+        conditional.bump_following(follower_id)
+        conditional.bump_profile(follower_id, following_id)
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def auth_user_changed(sender, instance, update_fields=None, **kwargs):
+    if sender is UserProfile and update_fields and set(update_fields) <= set(UserProfile.COUNTER_FIELDS):
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+
+    def invalidate():
+        authcache.invalidate_user(user_id)
+        conditional.bump_profile(user_id)
+    transaction.on_commit(invalidate)
+
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def session_changed(sender, request, user, **kwargs):
+    if user is not None:
+        authcache.invalidate_user(user.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_created(sender, instance, created, **kwargs):
+    # Sonradan oluşturulan profillerin sayaçları mevcut veriden doldurulur
+    if created:
+        UserProfile.reconcile_counters(UserProfile.objects.filter(pk=instance.pk))
+
+
+# Kart önbelleği: giriş kendi updated_at değeriyle, fotoğraflar ve yazar
+# bilgileri nesil numarasıyla geçersiz kılınır (bkz. diary.cards)
+@receiver(post_save, sender=DiaryPhoto)
+@receiver(post_delete, sender=DiaryPhoto)
+def photo_changed(sender, instance, **kwargs):
+    cards.invalidate_entry(instance.diary_entry_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= set(UserProfile.COUNTER_FIELDS):
+        return
+    cards.invalidate_author(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Girişte sadece last_login güncellenir, kartı etkilemez
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    cards.invalidate_author(instance.pk)
+
+
+# İçerik adresli medya dosyalarının referans sayımı
+MEDIA_FIELDS = {DiaryPhoto: 'image', UserProfile: 'profile_picture'}
+
+
+def remember_media_name(sender, instance, **kwargs):
+    instance._original_media_name = getattr(instance, MEDIA_FIELDS[sender]).name
+
+
+def media_saved(sender, instance, **kwargs):
+    field = getattr(instance, MEDIA_FIELDS[sender])
+    previous = instance._original_media_name
+    if field.name != previous:
+        blobs.acquire(field.storage, field.name)
+        blobs.release(field.storage, previous)
+        instance._original_media_name = field.name
+
+
+def media_deleted(sender, instance, **kwargs):
+    field = getattr(instance, MEDIA_FIELDS[sender])
+    blobs.release(field.storage, instance._original_media_name)
+
+
+for model in MEDIA_FIELDS:
+    post_init.connect(remember_media_name, sender=model)
+    post_save.connect(media_saved, sender=model)
+    post_delete.connect(media_deleted, sender=model)
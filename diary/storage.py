@@ -0,0 +1,91 @@
+import hashlib
+import os
+import posixpath
+import uuid
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Yüklemeleri içeriklerinin SHA-256 özetine göre adlandıran depolama.
+
+    ``diary_photos/tatil.jpg`` olarak gelen dosya ``diary_photos/ab/<özet>.jpg``
+    olarak yazılır; aynı baytlar ikinci kez yüklenirse diske tekrar yazılmaz,
+    mevcut dosya paylaşılır. Paylaşılan dosyaların ne zaman silineceği
+    MediaBlob referans sayaçlarıyla belirlenir (bkz. diary.blobs).
+
+    HASHED_DIRS dışındaki adlar (örn. renditions/) olduğu gibi yazılır.
+    """
+    HASHED_DIRS = ('diary_photos', 'profile_pics')
+
+    def is_hashed(self, name):
+        parts = name.split('/')
+        return len(parts) == 3 and parts[0] in self.HASHED_DIRS and len(parts[1]) == 2
+
+    def hashed_name(self, name, digest):
+        directory = name.split('/', 1)[0]
+        extension = posixpath.splitext(name)[1].lower()
+        return f'{directory}/{digest[:2]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # Aynı ad aynı içerik demektir, alternatif ad üretmeye gerek yok
+        return name
+
+    def _save(self, name, content):
+        if name.split('/', 1)[0] in self.HASHED_DIRS:
+            # Yükleme işleyicisi özeti akış sırasında hesapladıysa tekrar okunmaz
+            digest = getattr(content, 'sha256', None) or file_digest(content)
+            name = self.hashed_name(name, digest)
+            # Dosya yazılmadan ya da var olan paylaşılmadan önce kayıt ayrılır;
+            # eşzamanlı bir release dosyayı silemez (bkz. diary.blobs)
+            from .blobs import reserve
+            reserve(self, name, content.size)
+
+        if self.exists(name):
+            return name
+
+        # Önce benzersiz geçici bir ada yazılır ve atomik olarak taşınır;
+        # aynı dosyayı eşzamanlı yazan iki istek birbirini bozmaz.
+        temp_name = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
+
+
+def file_digest(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    return media_storage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Özetli ve sıkıştırılmış statik dosyalar. collectstatic çalıştırılmamış
+    ortamlarda (testler, runserver) manifest olmadığı için özetsiz ada düşer.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Sadece şablonlardaki {% static %} çözümü; collectstatic sırasında CSS'teki
+        # eksik url() referansları yine hata verir
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Dosya STATIC_ROOT içinde yok
+            return name
@@ -0,0 +1,187 @@
+"""
+"Kimi takip etmeli" önerileri.
+
+compute_follow_suggestions komutu Follow tablosunu iki sıralı taramayla
+okuyup iki sıkıştırılmış komşuluk (CSR) dizisine çevirir: her kullanıcının takip
+ettikleri ve takipçileri, sıralı tam sayı dizilerinde. Kullanıcı u için
+aday c'nin skoru:
+
+* arkadaşın arkadaşı: u'nun takip ettiklerinden kaçının c'yi takip
+  ettiği (ortak bağlantı sayısı);
+* ortak takipçi benzerliği: u'yu takip edenlerle c'yi takip edenlerin
+  kesişimi, |takipçi(u) ∩ takipçi(c)| / sqrt(|takipçi(u)| * |takipçi(c)|);
+* c zaten u'yu takip ediyorsa küçük bir ek puan.
+
+Her kullanıcının ilk TOP_K adayı FollowSuggestions satırına yazılır;
+adayı az olanlar en çok takip edilen kullanıcılarla tamamlanır. Sayfalar
+öneriyi tek satırdan okur, istek sırasında graf sorgusu çalışmaz.
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from . import conditional
+from .models import Follow, FollowSuggestions, UserProfile
+
+TOP_K = 20
+SIDEBAR_LIMIT = 5
+CO_FOLLOWER_WEIGHT = 3.0
+FOLLOWS_YOU_BONUS = 0.5
+# Çok takipli/takipçili hesaplarda komşu listesinin bu kadarı dolaşılır
+MAX_NEIGHBORS = 500
+BATCH_SIZE = 1000
+POPULAR_CACHE_KEY = 'diary:popular-users'
+POPULAR_CACHE_TIMEOUT = 10 * 60
+
+
+def _csr(pairs, index):
+    """
+    Kaynağa, sonra hedefe göre sıralı (kaynak, hedef) çiftlerinden
+    offsets/targets dizileri: i'nin komşuları targets[offsets[i]:offsets[i + 1]].
+    """
+    offsets = array('l', [0]) * (len(index) + 1)
+    targets = array('l')
+    for source, target in pairs:
+        offsets[index[source] + 1] += 1
+        targets.append(index[target])
+    for i in range(len(index)):
+        offsets[i + 1] += offsets[i]
+    return offsets, targets
+
+
+class FollowGraph:
+    """
+    Takip grafı. Kullanıcılar id sırasıyla 0..n-1 indekslerine eşlenir;
+    id sırası korunduğu için her komşu listesi de sıralıdır.
+    """
+
+    def __init__(self, user_ids, follows_by_follower, follows_by_following):
+        self.ids = array('l', sorted(user_ids))
+        index = {user_id: i for i, user_id in enumerate(self.ids)}
+        self.out_offsets, self.out_targets = _csr(follows_by_follower, index)
+        self.in_offsets, self.in_sources = _csr(
+            ((following, follower) for follower, following in follows_by_following), index
+        )
+
+    @classmethod
+    def from_database(cls):
+        follows = Follow.objects.values_list('follower_id', 'following_id')
+        return cls(
+            User.objects.values_list('id', flat=True).iterator(),
+            follows.order_by('follower_id', 'following_id').iterator(),
+            follows.order_by('following_id', 'follower_id').iterator(),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def following(self, i):
+        return self.out_targets[self.out_offsets[i]:self.out_offsets[i + 1]]
+
+    def followers(self, i):
+        return self.in_sources[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    def in_degree(self, i):
+        return self.in_offsets[i + 1] - self.in_offsets[i]
+
+    def follows(self, i, j):
+        lo, hi = self.out_offsets[i], self.out_offsets[i + 1]
+        position = bisect_left(self.out_targets, j, lo, hi)
+        return position < hi and self.out_targets[position] == j
+
+    def popular(self, count):
+        return heapq.nlargest(count, range(len(self)), key=lambda i: (self.in_degree(i), -i))
+
+    def suggest(self, i, k, popular=()):
+        """i için en iyi k aday: [(indeks, ortak bağlantı, seni takip ediyor mu)]"""
+        mutual = defaultdict(int)
+        for friend in self.following(i)[:MAX_NEIGHBORS]:
+            for candidate in self.following(friend)[:MAX_NEIGHBORS]:
+                mutual[candidate] += 1
+
+        followers = self.followers(i)
+        co_followed = defaultdict(int)
+        for follower in followers[:MAX_NEIGHBORS]:
+            for candidate in self.following(follower)[:MAX_NEIGHBORS]:
+                co_followed[candidate] += 1
+
+        follows_you = set(followers)
+        scores = {}
+        for candidate in mutual.keys() | co_followed.keys() | follows_you:
+            if candidate == i or self.follows(i, candidate):
+                continue
+            score = mutual.get(candidate, 0)
+            if candidate in co_followed:
+                overlap = co_followed[candidate] / math.sqrt(len(followers) * self.in_degree(candidate))
+                score += CO_FOLLOWER_WEIGHT * overlap
+            if candidate in follows_you:
+                score += FOLLOWS_YOU_BONUS
+            scores[candidate] = score
+
+        best = heapq.nlargest(k, scores, key=lambda c: (scores[c], self.in_degree(c), -c))
+        for candidate in popular:
+            if len(best) >= k:
+                break
+            if candidate != i and candidate not in scores and not self.follows(i, candidate):
+                best.append(candidate)
+        return [(c, mutual.get(c, 0), int(c in follows_you)) for c in best]
+
+
+def compute_all(graph, k=TOP_K):
+    """Bütün kullanıcıların önerilerini hesaplar ve FollowSuggestions tablosunu yeniler."""
+    now = timezone.now()
+    popular = graph.popular(k * 2)
+    # Skorlama işlem dışında yapılır; social_diary.db arka ucunda atomic yazma
+    # kilidini (BEGIN IMMEDIATE) alır, kilit sadece silme ve ekleme süresince tutulur
+    rows = [
+        FollowSuggestions(
+            user_id=graph.ids[i],
+            suggestions=[[graph.ids[c], mutual, follows_you] for c, mutual, follows_you in graph.suggest(i, k, popular)],
+            computed_at=now,
+        )
+        for i in range(len(graph))
+    ]
+    with transaction.atomic():
+        FollowSuggestions.objects.all().delete()
+        FollowSuggestions.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    cache.delete(POPULAR_CACHE_KEY)
+    conditional.bump_suggestions()
+    return len(graph)
+
+
+def _popular_user_ids():
+    return cache.get_or_set(
+        POPULAR_CACHE_KEY,
+        lambda: list(
+            UserProfile.objects.order_by('-followers_count').values_list('user_id', flat=True)[:TOP_K]
+        ),
+        POPULAR_CACHE_TIMEOUT,
+    )
+
+
+def suggestions_for(user, limit=SIDEBAR_LIMIT):
+    """
+    Kenar çubuğu için önerilen kullanıcılar (userprofile yüklü). Her
+    kullanıcıya mutual_count ve follows_you eklenir. Hesaplama sonrası
+    takip edilmiş olanlar atlanır. Henüz satırı olmayan yeni kullanıcılara
+    en çok takip edilenler önerilir.
+    """
+    row = FollowSuggestions.objects.filter(user=user).values_list('suggestions', flat=True).first()
+    if row is None:
+        row = [[user_id, 0, 0] for user_id in _popular_user_ids() if user_id != user.pk]
+    reasons = {user_id: (position, mutual, follows_you) for position, (user_id, mutual, follows_you) in enumerate(row)}
+    if not reasons:
+        return []
+
+    users = sorted(
+        User.objects.filter(id__in=reasons).exclude(followers__follower=user).select_related('userprofile'),
+        key=lambda suggested: reasons[suggested.id][0],
+    )[:limit]
+    for suggested in users:
+        position, suggested.mutual_count, suggested.follows_you = reasons[suggested.id]
+    return users
@@ -1,5 +1,7 @@
 from django import template
 from django.conf import settings
+from django.utils.html import format_html, format_html_join
+from diary.renditions import FALLBACK_FORMAT, FORMATS, srcset as rendition_srcset
 
 register = template.Library()
 
@@ -21,3 +23,42 @@ def safe_image_url(image_field):
             # Herhangi bir hata durumunda None döndür
             return None
     return None
+
+
+@register.simple_tag
+def responsive_image(image_field, renditions, sizes, alt='', css_class='', style=''):
+    """
+    Resmin kopyalarından <picture> etiketi üretir: AVIF/WebP kaynakları ve
+    JPEG yedeğiyle birlikte srcset/sizes. Kopyası olmayan eski resimler için
+    tek bir <img> döndürür.
+
+    Örnek: {% responsive_image photo.image photo.renditions "25vw" alt="Fotoğraf" %}
+    """
+    url = safe_image_url(image_field)
+    if url is None:
+        return ''
+
+    attrs = format_html(
+        'alt="{}" class="{}" style="{}" loading="lazy" decoding="async"', alt, css_class, style
+    )
+    if not renditions or not renditions.get(FALLBACK_FORMAT):
+        return format_html('<img src="{}" {}>', url, attrs)
+
+    storage = image_field.storage
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime, rendition_srcset(storage, renditions[key]), sizes)
+            for key, pil_format, mime, extension, options in FORMATS
+            if key != FALLBACK_FORMAT and renditions.get(key)
+        ),
+    )
+    fallback = renditions[FALLBACK_FORMAT]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" {}></picture>',
+        sources,
+        storage.url(fallback[-1][1]),
+        rendition_srcset(storage, fallback),
+        sizes,
+        attrs,
+    )
@@ -1,3 +1,1663 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from . import async_views, authcache, blobs, cards, images, renditions, passwords, realtime, search, throttle, timeline, uploadhandlers
+from . import feeds, follows
+from .backends import users_with_email
+from .feeds import CARD_FIELDS, ahome_feed_page, home_feed_page, public_fallback_page, recent_public_entries
+from .forms import BUSY_MESSAGE, CustomUserCreationForm
+from .models import FAILED, PENDING, PROCESSING, READY, DiaryEntry, DiaryPhoto, Follow, FollowSuggestions, MediaBlob, TimelineEntry, UserProfile
+from .pagination import apaginate, decode_cursor, encode_cursor, paginate
+from .querybudget import QueryBudgetMixin, budget_for
+from .routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter, primary_db
+from .storage import StaticStorage, media_storage
+from .suggestions import FollowGraph, compute_all, suggestions_for
 
-# Create your tests here.
+
+class QueryPlanTests(TestCase):
+    """Akış ve profil sorgularının bileşik indeksleri kullandığını doğrular (SQLite)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.reader, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        for i in range(30):
+            DiaryEntry.objects.create(
+                author=cls.author, content=f'giriş {i}', privacy='public' if i % 2 else 'private'
+            )
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN çıktısı SQLite içindir')
+
+    def query_plans(self, url, user, table):
+        """url istenirken table üzerinden sıralı okuyan sorguların planlarını döndürür."""
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and f'FROM "{table}"' in sql and 'ORDER BY' in sql:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plans.append(' / '.join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans, f'{table} sorgusu bulunamadı')
+        return plans
+
+    def assertUsesIndex(self, plans, index):
+        for plan in plans:
+            self.assertIn(f'INDEX {index}', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_home_uses_timeline_index(self):
+        plans = self.query_plans('/', self.reader, 'diary_timelineentry')
+        self.assertUsesIndex(plans, 'diary_timeline_user_created')
+
+    def test_own_profile_uses_author_index(self):
+        plans = self.query_plans('/profile/yazar/', self.author, 'diary_diaryentry')
+        self.assertUsesIndex(plans, 'diary_entry_author_created')
+
+    def test_other_profile_uses_author_privacy_index(self):
+        plans = self.query_plans('/profile/yazar/', self.reader, 'diary_diaryentry')
+        self.assertUsesIndex(plans, 'diary_entry_author_privacy')
+
+    def test_public_entries_use_partial_index(self):
+        queryset = DiaryEntry.objects.filter(privacy='public').order_by('-created_at', '-id')[:10]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' / '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('INDEX diary_entry_public_created', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+@override_settings(DIARY_QUERY_BUDGET_ACTION='raise', DIARY_IMAGE_WORKERS=0)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Her görünümün DIARY_QUERY_BUDGETS içindeki bütçeye uyduğunu doğrular."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_superuser('yazar', 'yazar@example.com', 'parola')
+        for user in (cls.user, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        Follow.objects.create(follower=cls.user, following=cls.author)
+        for i in range(15):
+            entry = DiaryEntry.objects.create(author=cls.author, title=f'başlık {i}', content='içerik', privacy='public')
+            DiaryPhoto.objects.create(diary_entry=entry, image=f'diary_photos/eski_{i}.jpg')
+        UserProfile.reconcile_counters()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client.force_login(self.user)
+
+    def request(self, view_name, method='get', url=None, **data):
+        with self.assertQueryBudget(budget_for(view_name)):
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400)
+        return response
+
+    def test_home(self):
+        self.request('diary:home', url=reverse('diary:home'))
+
+    def test_profile(self):
+        self.request('diary:profile', url=reverse('diary:profile'))
+
+    def test_user_profile(self):
+        self.request('diary:user_profile', url=reverse('diary:user_profile', args=['yazar']))
+
+    def test_profile_calendar(self):
+        self.request('diary:profile_calendar', url=reverse('diary:profile_calendar', args=['yazar']))
+
+    def test_search(self):
+        self.request('diary:search', url=reverse('diary:search'), q='başlık')
+
+    def test_create_entry(self):
+        self.request('diary:create_entry', 'post', reverse('diary:create_entry'), content='yeni', privacy='public')
+
+    def test_follow_user(self):
+        self.request('diary:follow_user', 'post', reverse('diary:follow_user', args=['yazar']))
+
+    def test_edit_profile(self):
+        self.request('diary:edit_profile', url=reverse('diary:edit_profile'))
+
+    def test_delete_entry(self):
+        entry = DiaryEntry.objects.create(author=self.user, content='silinecek')
+        UserProfile.adjust_counters(self.user.id, entry_count=1)
+        self.request('diary:delete_entry', 'post', reverse('diary:delete_entry', args=[entry.id]))
+
+    def test_register(self):
+        self.client.logout()
+        self.request(
+            'diary:register', 'post', reverse('diary:register'),
+            email='yeni@example.com', password1='Zor-parola-123', password2='Zor-parola-123',
+        )
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.author)
+        for model in (UserProfile, Follow, DiaryEntry, DiaryPhoto):
+            view_name = f'admin:diary_{model._meta.model_name}_changelist'
+            self.request(view_name, url=reverse(view_name))
+
+    @override_settings(DIARY_QUERY_BUDGET_HEADERS=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('diary:home'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries, 0 duplicated"$')
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        cls.stranger = User.objects.create_user('yabanci', password='parola')
+        for user in (cls.reader, cls.author, cls.stranger):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+
+    def setUp(self):
+        # Herkese açık son girişler listesi önceki testlerden kalmasın
+        caches['default'].clear()
+
+    def timeline(self, user):
+        return set(TimelineEntry.objects.filter(user=user).values_list('entry_id', flat=True))
+
+    def feed(self, user):
+        page = home_feed_page(user, RequestFactory().get('/'))
+        return [entry.pk for entry in page.object_list]
+
+    def test_public_entry_fans_out_to_followers(self):
+        entry = DiaryEntry.objects.create(author=self.author, content='açık', privacy='public')
+        self.assertEqual(self.timeline(self.reader), {entry.pk})
+        self.assertEqual(self.timeline(self.author), {entry.pk})
+        self.assertEqual(self.timeline(self.stranger), set())
+
+        private = DiaryEntry.objects.create(author=self.author, content='gizli', privacy='private')
+        self.assertEqual(self.timeline(self.reader), {entry.pk})
+        self.assertEqual(self.timeline(self.author), {entry.pk, private.pk})
+
+    def test_entry_made_private_leaves_follower_timelines(self):
+        entry = DiaryEntry.objects.create(author=self.author, content='açık', privacy='public')
+        entry.privacy = 'private'
+        entry.save()
+        self.assertEqual(self.timeline(self.reader), set())
+        self.assertEqual(self.timeline(self.author), {entry.pk})
+
+        entry.privacy = 'public'
+        entry.save()
+        self.assertEqual(self.timeline(self.reader), {entry.pk})
+
+    def test_follow_and_unfollow_update_timeline(self):
+        theirs = DiaryEntry.objects.create(author=self.stranger, content='açık', privacy='public')
+        DiaryEntry.objects.create(author=self.stranger, content='gizli', privacy='private')
+        followed = DiaryEntry.objects.create(author=self.author, content='açık', privacy='public')
+
+        follow = Follow.objects.create(follower=self.reader, following=self.stranger)
+        self.assertEqual(self.timeline(self.reader), {theirs.pk, followed.pk})
+        follow.delete()
+        self.assertEqual(self.timeline(self.reader), {followed.pk})
+
+    def test_rebuild_timeline_for_fresh_user(self):
+        fresh = User.objects.create_user('yeni', password='parola')
+        own = DiaryEntry.objects.create(author=fresh, content='kendi', privacy='private')
+        public = DiaryEntry.objects.create(author=self.author, content='açık', privacy='public')
+        DiaryEntry.objects.create(author=self.author, content='gizli', privacy='private')
+        Follow.objects.create(follower=fresh, following=self.author)
+        TimelineEntry.objects.filter(user=fresh).delete()
+        self.assertFalse(timeline.is_timeline_ready(fresh))
+
+        timeline.rebuild_timeline(fresh)
+        self.assertEqual(self.timeline(fresh), {own.pk, public.pk})
+        self.assertTrue(timeline.is_timeline_ready(fresh))
+        # Tekrar çalıştırmak satırları çoğaltmaz
+        call_command('rebuild_timelines', 'yeni', stdout=StringIO())
+        self.assertEqual(TimelineEntry.objects.filter(user=fresh).count(), 2)
+
+    def test_cold_timeline_falls_back_to_live_query(self):
+        cold = User.objects.create_user('soguk', password='parola')
+        UserProfile.objects.create(user=cold)
+        public = DiaryEntry.objects.create(author=self.author, content='açık', privacy='public')
+        DiaryEntry.objects.create(author=self.author, content='gizli', privacy='private')
+        elsewhere = DiaryEntry.objects.create(author=self.stranger, content='başka', privacy='public')
+        own = DiaryEntry.objects.create(author=cold, content='kendi', privacy='private')
+
+        # Takip ettiği kimsenin içeriği yok: herkese açık son girişler ve kendi girişleri
+        self.assertEqual(self.feed(cold), [own.pk, elsewhere.pk, public.pk])
+
+        Follow.objects.create(follower=cold, following=self.author)
+        TimelineEntry.objects.filter(user=cold).delete()
+        self.assertEqual(self.feed(cold), [own.pk, public.pk])
+
+
+@override_settings(DIARY_CARD_CACHE_ENABLED=True)
+class CardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('yazar', password='parola')
+        cls.other = User.objects.create_user('diger', password='parola')
+        for user in (cls.author, cls.other):
+            UserProfile.objects.create(user=user)
+        cls.first = DiaryEntry.objects.create(author=cls.author, content='birinci', privacy='public')
+        cls.second = DiaryEntry.objects.create(author=cls.author, content='ikinci', privacy='public')
+        cls.unrelated = DiaryEntry.objects.create(author=cls.other, content='başka', privacy='public')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def entries(self):
+        return list(DiaryEntry.objects.only(*CARD_FIELDS).order_by('id'))
+
+    def keys(self):
+        entries = self.entries()
+        return dict(zip([entry.pk for entry in entries], cards.card_keys(entries)))
+
+    def assertChanged(self, before, *entries):
+        after = self.keys()
+        changed = {pk for pk in before if before[pk] != after[pk]}
+        self.assertEqual(changed, {entry.pk for entry in entries})
+
+    def test_cache_hit_skips_entry_query(self):
+        entries = self.entries()
+        with CaptureQueriesContext(connection) as queries:
+            html = cards.render_cards(entries)
+        self.assertEqual(len(html), 3)
+        self.assertIn('birinci', html[0])
+        self.assertTrue(any('diary_diaryphoto' in query['sql'] for query in queries.captured_queries))
+        with self.assertNumQueries(0):
+            self.assertEqual(cards.render_cards(entries), html)
+
+    @override_settings(DIARY_CARD_CACHE_ENABLED=False)
+    def test_disabled_cache_renders_every_time(self):
+        entries = self.entries()
+        with mock.patch.object(cards, 'get_cache') as get_cache:
+            html = cards.render_cards(entries)
+            self.assertIn('birinci', html[0])
+            self.assertEqual(cards.render_cards(entries), html)
+        get_cache.assert_not_called()
+
+    def test_editing_entry_changes_only_its_card(self):
+        before = self.keys()
+        entry = DiaryEntry.objects.get(pk=self.first.pk)
+        entry.content = 'düzeltildi'
+        entry.save()
+        self.assertChanged(before, self.first)
+        self.assertIn('düzeltildi', cards.render_cards([entry])[0])
+
+    def test_photo_changes_only_its_entry(self):
+        before = self.keys()
+        photo = DiaryPhoto.objects.create(diary_entry=self.second, image='diary_photos/eski.jpg')
+        self.assertChanged(before, self.second)
+        before = self.keys()
+        photo.delete()
+        self.assertChanged(before, self.second)
+
+    def test_author_profile_changes_their_cards(self):
+        before = self.keys()
+        profile = UserProfile.objects.get(user=self.author)
+        profile.bio = 'yeni bio'
+        profile.save()
+        self.assertChanged(before, self.first, self.second)
+
+        # Sadece sayaç güncellemesi kartları etkilemez
+        before = self.keys()
+        profile.entry_count = 5
+        profile.save(update_fields=['entry_count'])
+        self.assertChanged(before)
+
+    def test_username_change_rerenders_their_cards(self):
+        self.assertIn('yazar', cards.render_cards(self.entries())[0])
+        before = self.keys()
+        self.author.username = 'yenisim'
+        self.author.save()
+        self.assertChanged(before, self.first, self.second)
+        self.assertIn('yenisim', cards.render_cards(self.entries())[0])
+
+        # Girişte sadece last_login güncellenir
+        before = self.keys()
+        self.author.last_login = timezone.now()
+        self.author.save(update_fields=['last_login'])
+        self.assertChanged(before)
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('yazar', password='parola')
+        cls.other = User.objects.create_user('okur', password='parola')
+        for user in (cls.user, cls.other):
+            UserProfile.objects.create(user=user)
+
+    def counters(self, user):
+        return UserProfile.objects.filter(user=user).values(*UserProfile.COUNTER_FIELDS).get()
+
+    def test_create_and_delete_entry(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('diary:create_entry'), {'content': 'açık', 'privacy': 'public'})
+        self.client.post(reverse('diary:create_entry'), {'content': 'gizli', 'privacy': 'private'})
+        self.assertEqual(self.counters(self.user)['entry_count'], 2)
+        self.assertEqual(self.counters(self.user)['public_entry_count'], 1)
+
+        entry = DiaryEntry.objects.get(privacy='public')
+        self.client.post(reverse('diary:delete_entry', args=[entry.pk]))
+        self.assertEqual(self.counters(self.user)['entry_count'], 1)
+        self.assertEqual(self.counters(self.user)['public_entry_count'], 0)
+
+    def test_follow_toggle(self):
+        self.client.force_login(self.other)
+        url = reverse('diary:follow_user', args=[self.user.username])
+        self.assertEqual(self.client.post(url).json(), {'is_following': True, 'followers_count': 1})
+        self.assertEqual(self.counters(self.other)['following_count'], 1)
+        self.assertEqual(self.client.post(url).json(), {'is_following': False, 'followers_count': 0})
+        self.assertEqual(self.counters(self.other)['following_count'], 0)
+
+    def test_decrement_never_goes_below_zero(self):
+        UserProfile.adjust_counters(self.user.pk, entry_count=2, followers_count=-1)
+        self.assertEqual(self.counters(self.user)['entry_count'], 2)
+        self.assertEqual(self.counters(self.user)['followers_count'], 0)
+        UserProfile.adjust_counters(self.user.pk, entry_count=-5)
+        self.assertEqual(self.counters(self.user)['entry_count'], 0)
+
+    async def test_async_decrement_never_goes_below_zero(self):
+        await UserProfile.aadjust_counters(self.user.pk, following_count=-1)
+        profile = await UserProfile.objects.aget(user=self.user)
+        self.assertEqual(profile.following_count, 0)
+
+    def test_reconcile_fixes_only_drifted_profiles(self):
+        DiaryEntry.objects.create(author=self.user, content='açık', privacy='public')
+        DiaryEntry.objects.create(author=self.user, content='gizli', privacy='private')
+        Follow.objects.create(follower=self.other, following=self.user)
+        self.assertEqual(UserProfile.reconcile_counters(), 2)
+        self.assertEqual(self.counters(self.user), {
+            'entry_count': 2, 'public_entry_count': 1, 'followers_count': 1, 'following_count': 0,
+        })
+        self.assertEqual(self.counters(self.other)['following_count'], 1)
+
+        UserProfile.objects.filter(user=self.user).update(entry_count=7)
+        with self.assertNumQueries(2):
+            self.assertEqual(UserProfile.reconcile_counters(), 1)
+        self.assertEqual(self.counters(self.user)['entry_count'], 2)
+        self.assertEqual(UserProfile.reconcile_counters(), 0)
+        self.assertEqual(UserProfile.reconcile_counters(UserProfile.objects.filter(user=self.other)), 0)
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('yazar', password='parola')
+        cls.entries = [DiaryEntry.objects.create(author=author, content=f'giriş {i}') for i in range(7)]
+        # Aynı anda kaydedilmiş girişler ID ile sıralanır
+        same_time = cls.entries[4].created_at
+        DiaryEntry.objects.filter(pk__in=[entry.pk for entry in cls.entries[1:5]]).update(created_at=same_time)
+        cls.expected = list(
+            DiaryEntry.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def page(self, per_page=3, **params):
+        return paginate(DiaryEntry.objects.all(), RequestFactory().get('/', params), per_page)
+
+    def test_cursor_round_trip(self):
+        entry = DiaryEntry.objects.get(pk=self.entries[2].pk)
+        token = encode_cursor(entry.created_at, entry.pk)
+        self.assertEqual(decode_cursor(token), (entry.created_at, entry.pk))
+        self.assertNotIn('=', token)
+
+    def test_cursor_pages_break_ties_by_id(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = self.page(**({'cursor': cursor} if cursor else {}))
+            self.assertEqual(page.is_first, cursor is None)
+            seen += [entry.pk for entry in page]
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        for token in ('bozuk', '!!!', encode_cursor(timezone.now(), 1)[:-3], 'YWJj'):
+            self.assertIsNone(decode_cursor(token), token)
+            page = self.page(cursor=token)
+            self.assertTrue(page.is_first)
+            self.assertEqual([entry.pk for entry in page], self.expected[:3])
+
+    def test_legacy_page_parameter(self):
+        page = self.page(page='2')
+        self.assertFalse(page.is_first)
+        self.assertEqual([entry.pk for entry in page], self.expected[3:6])
+        # Sonraki sayfa bağlantısı imleç kullanır
+        rest = self.page(cursor=page.next_cursor)
+        self.assertEqual([entry.pk for entry in rest], self.expected[6:])
+        self.assertFalse(rest.has_next)
+
+        for value in ('abc', '0', '-3'):
+            page = self.page(page=value)
+            self.assertTrue(page.is_first)
+            self.assertEqual([entry.pk for entry in page], self.expected[:3])
+        self.assertEqual(list(self.page(page='9')), [])
+
+    async def test_async_pages_match(self):
+        request = RequestFactory().get('/', {'page': '2'})
+        page = await apaginate(DiaryEntry.objects.all(), request, 3)
+        self.assertEqual([entry.pk for entry in page], self.expected[3:6])
+        self.assertEqual(page.next_cursor, (await sync_to_async(self.page)(page='2')).next_cursor)
+
+
+class ProfileCalendarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.reader, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        # Europe/Istanbul UTC+3: UTC gece yarısına yakın kayıtlar yerel saatte bir sonraki güne düşer
+        for created_at, privacy in [
+            ('2024-04-30T20:59:00+00:00', 'public'),   # 30 Nisan 23:59
+            ('2024-04-30T21:30:00+00:00', 'public'),   # 1 Mayıs 00:30
+            ('2024-05-01T10:00:00+00:00', 'public'),
+            ('2024-05-01T11:00:00+00:00', 'private'),
+            ('2024-05-15T10:00:00+00:00', 'public'),
+            ('2024-05-31T20:59:00+00:00', 'public'),   # 31 Mayıs 23:59
+            ('2024-05-31T22:30:00+00:00', 'public'),   # 1 Haziran 01:30
+        ]:
+            entry = DiaryEntry.objects.create(author=cls.author, title='gün', content='içerik', privacy=privacy)
+            DiaryEntry.objects.filter(pk=entry.pk).update(created_at=created_at)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client.force_login(self.reader)
+
+    def calendar(self, month, username='yazar'):
+        return self.client.get(reverse('diary:profile_calendar', args=[username]), {'month': month}).json()
+
+    def test_counts_are_scoped_to_month_in_local_time(self):
+        data = self.calendar('2024-05')
+        self.assertEqual(data['days'], {'2024-05-01': 2, '2024-05-15': 1, '2024-05-31': 1})
+        self.assertEqual((data['month'], data['previous'], data['next']), ('2024-05', '2024-04', '2024-06'))
+        self.assertEqual(self.calendar('2024-04')['days'], {'2024-04-30': 1})
+        self.assertEqual(self.calendar('2024-06')['days'], {'2024-06-01': 1})
+
+    def test_private_entries_counted_only_for_owner(self):
+        self.client.force_login(self.author)
+        self.assertEqual(self.calendar('2024-05')['days']['2024-05-01'], 3)
+
+    def test_malformed_month_falls_back_to_current_month(self):
+        current = timezone.localdate().strftime('%Y-%m')
+        for month in ('2024', '2024-13', '2024-05-01', 'mayıs', '0-05'):
+            with self.subTest(month=month):
+                self.assertEqual(self.calendar(month)['month'], current)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('arayan', password='parola')
+        cls.other = User.objects.create_user('baskasi', password='parola')
+
+    def entry(self, content, author=None, privacy='public', title=''):
+        return DiaryEntry.objects.create(author=author or self.user, title=title, content=content, privacy=privacy)
+
+    def found(self, query, user=None, **kwargs):
+        return [entry.pk for entry in search.search_entries(query, user or self.user, **kwargs)]
+
+    def test_turkish_case_and_accent_folding(self):
+        self.assertEqual(search.normalize('İLK Günlüğüm'), 'ilk gunlugum')
+        self.assertEqual(search.normalize('IŞIK ılık'), 'isik ilik')
+        istanbul = self.entry("İstanbul'da IŞIK")
+        self.assertEqual(self.found('istanbul'), [istanbul.pk])
+        self.assertEqual(self.found('ISTANBUL'), [istanbul.pk])
+        self.assertEqual(self.found('ışık'), [istanbul.pk])
+        self.assertEqual(self.found('isi'), [istanbul.pk])
+        self.assertEqual(self.found('!!'), [])
+
+    def test_private_entries_only_visible_to_author(self):
+        public = self.entry('deniz kenarı', author=self.other)
+        private = self.entry('deniz feneri', author=self.other, privacy='private')
+        own_private = self.entry('deniz yıldızı', privacy='private')
+        self.assertEqual(sorted(self.found('deniz')), [public.pk, own_private.pk])
+        self.assertEqual(sorted(self.found('deniz', user=self.other)), [public.pk, private.pk])
+
+    def test_cursor_pages_do_not_overlap(self):
+        entries = {self.entry(f'yürüyüş {i}').pk for i in range(5)}
+        first = search.search_entries('yürüyüş', self.user, per_page=2)
+        self.assertTrue(first.has_next)
+        self.assertTrue(first.is_first)
+        second = search.search_entries('yürüyüş', self.user, cursor=first.next_cursor, per_page=2)
+        third = search.search_entries('yürüyüş', self.user, cursor=second.next_cursor, per_page=2)
+        self.assertFalse(second.is_first)
+        self.assertFalse(third.has_next)
+        pages = [entry.pk for page in (first, second, third) for entry in page]
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(set(pages), entries)
+        # Bozuk imleç ilk sayfaya düşer
+        self.assertEqual(self.found('yürüyüş', cursor='bozuk!', per_page=2), [entry.pk for entry in first])
+
+    def test_title_ranks_above_content(self):
+        in_content = self.entry('bahar geldi')
+        in_title = self.entry('başka bir gün', title='Bahar')
+        self.assertEqual(self.found('bahar'), [in_title.pk, in_content.pk])
+
+    def test_index_follows_save_and_delete(self):
+        entry = self.entry('kahvaltı')
+        entry.content = 'akşam yemeği'
+        entry.save()
+        self.assertEqual(self.found('kahvaltı'), [])
+        self.assertEqual(self.found('akşam'), [entry.pk])
+        entry.privacy = 'private'
+        entry.save()
+        self.assertEqual(self.found('akşam', user=self.other), [])
+        entry.delete()
+        self.assertEqual(self.found('akşam'), [])
+
+    def test_search_view(self):
+        self.entry('gizli not', author=self.other, privacy='private')
+        self.entry('açık not', author=self.other)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('diary:search'), {'q': 'NOT'})
+        self.assertContains(response, 'açık not')
+        self.assertNotContains(response, 'gizli not')
+
+
+class DemoDataTests(TestCase):
+    def generate(self, **options):
+        call_command(
+            'generate_demo_data', users=40, entries=200, photo_ratio=0, stdout=StringIO(), **options
+        )
+        return sorted(Follow.objects.values_list('follower__username', 'following__username'))
+
+    def test_generates_reproducible_graph(self):
+        follows = self.generate()
+        self.assertEqual(User.objects.filter(username__startswith='demo').count(), 40)
+        self.assertEqual(DiaryEntry.objects.count(), 200)
+        self.assertTrue(DiaryEntry.objects.filter(privacy='public').exists())
+        self.assertTrue(DiaryEntry.objects.filter(privacy='private').exists())
+
+        # Sayaçlar ve akış tabloları da doldurulur
+        profile = UserProfile.objects.order_by('-followers_count').first()
+        self.assertEqual(profile.followers_count, Follow.objects.filter(following=profile.user).count())
+        self.assertEqual(UserProfile.reconcile_counters(), 0)
+
+        self.assertEqual(self.generate(replace=True), follows)
+
+
+@override_settings(DIARY_READ_REPLICAS=['replica1'], DIARY_REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(TestCase):
+    """Okumaların hangi veritabanına yönlendirildiği (kopya bağlantısı gerekmez)."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def read_db(self, request, view=None):
+        """İstek sırasında DiaryEntry okumasının gideceği veritabanını döndürür."""
+        seen = []
+
+        def view_func(request):
+            seen.append(self.router.db_for_read(DiaryEntry))
+            return HttpResponse()
+
+        if view is not None:
+            view_func = view(view_func)
+
+        def get_response(request):
+            middleware.process_view(request, view_func, (), {})
+            return view_func(request)
+
+        middleware = ReplicaMiddleware(get_response)
+        response = middleware(request)
+        return seen[0], response
+
+    def test_outside_requests_reads_use_primary(self):
+        self.assertEqual(self.router.db_for_read(DiaryEntry), 'default')
+        self.assertEqual(self.router.db_for_write(DiaryEntry), 'default')
+
+    def test_safe_requests_read_from_replica(self):
+        db, response = self.read_db(self.factory.get('/'))
+        self.assertEqual(db, 'replica1')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_primary_views_and_writes_use_primary(self):
+        self.assertEqual(self.read_db(self.factory.get('/'), view=primary_db)[0], 'default')
+        db, response = self.read_db(self.factory.post('/'))
+        self.assertEqual(db, 'default')
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        db, response = self.read_db(self.factory.post('/'))
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+        self.assertEqual(self.read_db(request)[0], 'default')
+
+        request.COOKIES[STICKY_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.read_db(request)[0], 'replica1')
+
+    async def test_async_requests_pass_choice_to_orm_thread(self):
+        seen = []
+
+        async def get_response(request):
+            await sync_to_async(lambda: seen.append(self.router.db_for_read(DiaryEntry)))()
+            return HttpResponse()
+
+        await ReplicaMiddleware(get_response)(self.factory.get('/'))
+        self.assertEqual(seen, ['replica1'])
+
+    @override_settings(DIARY_READ_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        db, response = self.read_db(self.factory.post('/'))
+        self.assertEqual(self.read_db(self.factory.get('/'))[0], 'default')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+
+class AsyncViewTests(TestCase):
+    """diary.async_views görünümlerinin eşzamanlı sürümlerle aynı sonucu verdiğini doğrular."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        cls.other = User.objects.create_user('diger', password='parola')
+        for user in (cls.reader, cls.author, cls.other):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        for i in range(15):
+            DiaryEntry.objects.create(
+                author=cls.author, title=f'başlık {i}', content='içerik', privacy='public' if i % 3 else 'private'
+            )
+        UserProfile.reconcile_counters()
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    def get(self, path, user):
+        request = self.factory.get(path)
+        request.user = user
+        return request
+
+    async def test_home_feed_matches_sync_feed(self):
+        request = self.get('/', self.reader)
+        expected = await sync_to_async(home_feed_page)(self.reader, request)
+        page = await ahome_feed_page(self.reader, request)
+        self.assertEqual([entry.pk for entry in page.object_list], [entry.pk for entry in expected.object_list])
+        self.assertEqual(page.next_cursor, expected.next_cursor)
+
+        response = await async_views.home(request)
+        self.assertContains(response, 'başlık 14')
+        self.assertNotContains(response, 'başlık 12')
+
+    async def test_profile_hides_private_entries_from_others(self):
+        response = await async_views.profile(self.get('/profile/yazar/', self.reader), username='yazar')
+        self.assertContains(response, 'başlık 14')
+        self.assertNotContains(response, 'başlık 12')
+
+        response = await async_views.profile(self.get('/profile/', self.author))
+        self.assertContains(response, 'başlık 12')
+
+    async def test_profile_requires_login(self):
+        response = await async_views.profile(self.get('/profile/', AnonymousUser()))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_follow_user_toggles_and_adjusts_counters(self):
+        request = self.factory.post('/follow/diger/')
+        request.user = self.reader
+
+        response = await async_views.follow_user(request, username='diger')
+        self.assertJSONEqual(response.content, {'is_following': True, 'followers_count': 1})
+        self.assertTrue(await Follow.objects.filter(follower=self.reader, following=self.other).aexists())
+
+        response = await async_views.follow_user(request, username='diger')
+        self.assertJSONEqual(response.content, {'is_following': False, 'followers_count': 0})
+        profile = await UserProfile.objects.aget(user=self.reader)
+        self.assertEqual(profile.following_count, 1)
+
+
+@override_settings(DIARY_QUERY_BUDGET_HEADERS=True)
+class AsyncMiddlewareTests(TestCase):
+    """ASGI altında sorgu sayacının ORM iş parçacığındaki sorguları görmesi."""
+
+    def setUp(self):
+        user = User.objects.create_user('okur', password='parola')
+        UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        self.async_client.force_login(user)
+
+    async def test_queries_are_counted(self):
+        response = await self.async_client.get(reverse('diary:home'))
+        self.assertEqual(response.status_code, 200)
+        queries = int(response['Server-Timing'].split('"')[1].split()[0])
+        self.assertGreater(queries, 0)
+        self.assertLessEqual(queries, budget_for('diary:home'))
+
+
+@override_settings(DIARY_REALTIME_HEARTBEAT=0.05, DIARY_REALTIME_MAX_AGE=0.5)
+class RealtimeTests(TestCase):
+    """Yeni girişlerin takipçilerin akış bağlantısına ID olarak bildirilmesi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.reader, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        cls.old = DiaryEntry.objects.create(author=cls.author, content='eski', privacy='public')
+
+    def create_entries(self, *privacies):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [DiaryEntry.objects.create(author=self.author, content='yeni', privacy=p) for p in privacies]
+
+    async def test_public_entries_are_published_to_followers(self):
+        broker = realtime.get_broker()
+        subscription = broker.subscribe(self.reader.pk)
+        try:
+            public, private = await sync_to_async(self.create_entries)('public', 'private')
+            self.assertEqual(await subscription.next_batch(1), ([public.pk], 0))
+            self.assertEqual(await subscription.next_batch(0.05), ([], 0))
+        finally:
+            broker.unsubscribe(subscription)
+
+    async def test_stream_sends_missed_and_new_entries(self):
+        request = AsyncRequestFactory().get('/feed/stream/', headers={'Last-Event-ID': str(self.old.pk - 1)})
+        request.user = self.reader
+        response = await async_views.feed_stream(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = response.streaming_content
+        self.assertEqual(await anext(events), b'retry: 5000\n\n')
+        self.assertEqual(
+            await anext(events),
+            f'id: {self.old.pk}\nevent: entries\ndata: {{"ids": [{self.old.pk}], "count": 1}}\n\n'.encode(),
+        )
+        self.assertEqual(await anext(events), b': ping\n\n')
+
+        entry, = await sync_to_async(self.create_entries)('public')
+        self.assertIn(f'"ids": [{entry.pk}]'.encode(), await anext(events))
+
+        # DIARY_REALTIME_MAX_AGE dolunca akış kapanır ve abonelik silinir
+        self.assertLessEqual({chunk async for chunk in events}, {b': ping\n\n'})
+        self.assertNotIn(self.reader.pk, realtime.get_broker().subscribers)
+
+    def test_cards_only_include_visible_entries(self):
+        private, = self.create_entries('private')
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('diary:feed_cards'), {'ids': f'{self.old.pk},{private.pk},x'})
+        self.assertContains(response, 'eski')
+        self.assertNotContains(response, 'yeni')
+
+    def test_wsgi_stream_tells_browser_not_to_reconnect(self):
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(reverse('diary:feed_stream')).status_code, 204)
+
+
+@override_settings(DIARY_QUERY_BUDGET_ACTION='raise')
+class BulkFollowTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('okur', password='parola')
+        cls.authors = [User.objects.create_user(f'yazar{i}', password='parola') for i in range(20)]
+        for user in (cls.user, *cls.authors):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        for author in cls.authors:
+            DiaryEntry.objects.create(author=author, content='açık', privacy='public')
+            DiaryEntry.objects.create(author=author, content='gizli', privacy='private')
+        Follow.objects.create(follower=cls.user, following=cls.authors[0])
+        UserProfile.reconcile_counters()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, **data):
+        url = reverse('diary:bulk_follow')
+        with self.assertQueryBudget(budget_for('diary:bulk_follow')):
+            return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def test_follow_many(self):
+        names = [author.username for author in self.authors] + ['yok']
+        response = self.post(follow=names)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['not_found'], ['yok'])
+        self.assertEqual(data['results']['yazar0'], {'is_following': True, 'followers_count': 1})
+        self.assertEqual(data['results']['yazar5'], {'is_following': True, 'followers_count': 1})
+
+        self.assertEqual(Follow.objects.filter(follower=self.user).count(), 20)
+        self.assertEqual(UserProfile.reconcile_counters(), 0)
+        # Akışa sadece herkese açık girişler eklenir
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 20)
+
+    def test_unfollow_many(self):
+        self.post(follow=['yazar1', 'yazar2'])
+        response = self.post(unfollow=['yazar0', 'yazar1', 'yazar3'])
+        self.assertEqual(
+            {name: result['is_following'] for name, result in response.json()['results'].items()},
+            {'yazar0': False, 'yazar1': False, 'yazar3': False},
+        )
+        self.assertEqual(list(Follow.objects.filter(follower=self.user).values_list('following__username', flat=True)), ['yazar2'])
+        self.assertEqual(UserProfile.reconcile_counters(), 0)
+        self.assertEqual(set(TimelineEntry.objects.filter(user=self.user).values_list('author__username', flat=True)), {'yazar2'})
+
+    def test_follow_inserted_concurrently_is_not_counted(self):
+        bulk_create = Follow.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Başka bir istek okuma ile ekleme arasında yazar3'ü takip etti
+            Follow.objects.create(follower=self.user, following=self.authors[3])
+            UserProfile.adjust_counters(self.user.pk, following_count=1)
+            UserProfile.adjust_counters(self.authors[3].pk, followers_count=1)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Follow.objects, 'bulk_create', racing_bulk_create):
+            results, not_found = follows.bulk_follow(self.user, follow=['yazar1', 'yazar3'])
+        self.assertEqual(results['yazar3'], {'is_following': True, 'followers_count': 1})
+        self.assertEqual(Follow.objects.filter(follower=self.user).count(), 3)
+        self.assertEqual(UserProfile.reconcile_counters(), 0)
+
+    @override_settings(DIARY_AUTH_CACHE=True)
+    def test_unfollow_invalidates_following_cache(self):
+        caches['default'].clear()
+        self.assertEqual(authcache.following_ids(self.user), {self.authors[0].pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(unfollow=['yazar0'], follow=['yazar1'])
+        self.assertEqual(authcache.following_ids(self.user), {self.authors[1].pk})
+
+    def test_form_data(self):
+        response = self.client.post(reverse('diary:bulk_follow'), {'follow': ['yazar1', 'yazar2']})
+        self.assertEqual(sorted(response.json()['results']), ['yazar1', 'yazar2'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post(follow=['yazar1'], unfollow=['yazar1']).status_code, 400)
+        self.assertEqual(self.post(follow=['okur']).status_code, 400)
+        self.assertEqual(self.post(follow='yazar1').status_code, 400)
+        self.assertFalse(Follow.objects.filter(follower=self.user, following__username='yazar1').exists())
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        names = ['ali', 'banu', 'cem', 'deniz', 'ece', 'fatma']
+        cls.users = {name: User.objects.create_user(name, password='parola') for name in names}
+        for name in names:
+            UserProfile.objects.create(user=cls.users[name])
+        for follower, following in [
+            ('ali', 'banu'), ('ali', 'cem'), ('banu', 'deniz'), ('cem', 'deniz'),
+            ('cem', 'fatma'), ('ece', 'ali'), ('deniz', 'fatma'),
+        ]:
+            Follow.objects.create(follower=cls.users[follower], following=cls.users[following])
+        UserProfile.reconcile_counters()
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def suggested(self, name):
+        return [(user.username, user.mutual_count, user.follows_you) for user in suggestions_for(self.users[name])]
+
+    def test_graph_scores_friends_of_friends_and_followers(self):
+        graph = FollowGraph.from_database()
+        self.assertEqual(len(graph.out_targets), 7)
+        ali = graph.ids.index(self.users['ali'].pk)
+        names = {graph.ids.index(user.pk): name for name, user in self.users.items()}
+        suggestions = [(names[i], mutual, follows_you) for i, mutual, follows_you in graph.suggest(ali, 3)]
+        # deniz'i takip ettiklerinden ikisi takip ediyor; ece ali'yi takip ediyor
+        self.assertEqual(suggestions, [('deniz', 2, 0), ('fatma', 1, 0), ('ece', 0, 1)])
+
+    def test_reads_precomputed_suggestions(self):
+        compute_all(FollowGraph.from_database(), k=3)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.suggested('ali'), [('deniz', 2, 0), ('fatma', 1, 0), ('ece', 0, 1)])
+
+        # Hesaplamadan sonra takip edilenler gösterilmez
+        Follow.objects.create(follower=self.users['ali'], following=self.users['deniz'])
+        self.assertEqual([name for name, *reason in self.suggested('ali')], ['fatma', 'ece'])
+
+    def test_scoring_runs_outside_the_write_transaction(self):
+        graph = FollowGraph.from_database()
+        depth = len(connection.atomic_blocks)
+        suggest = graph.suggest
+
+        def outside_transaction(*args):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            return suggest(*args)
+
+        with mock.patch.object(graph, 'suggest', outside_transaction):
+            self.assertEqual(compute_all(graph, k=3), 6)
+        self.assertEqual(FollowSuggestions.objects.count(), 6)
+
+    def test_users_without_suggestions_get_popular_users(self):
+        self.assertEqual({name for name, *reason in self.suggested('ece')[:2]}, {'deniz', 'fatma'})
+
+
+class PublicFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.reader, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        cls.entries = [
+            DiaryEntry.objects.create(author=cls.author, content=f'giriş {i}', privacy='public')
+            for i in range(8)
+        ]
+        cls.own = DiaryEntry.objects.create(author=cls.reader, content='benim', privacy='private')
+
+    def setUp(self):
+        caches['default'].clear()
+        self.factory = RequestFactory()
+
+    def page_ids(self, url='/', user=None):
+        page = public_fallback_page(user or self.reader, self.factory.get(url), per_page=4)
+        return [entry.id for entry in page.object_list], page
+
+    def test_fallback_reads_cached_public_entries(self):
+        expected = [self.own.id] + [entry.id for entry in reversed(self.entries)][:3]
+        self.assertEqual(self.page_ids()[0], expected)
+        # Sıcak önbellekte herkese açık girişler taranmaz, sadece kendi girişleri okunur
+        with self.assertNumQueries(1):
+            ids, page = self.page_ids()
+        self.assertEqual(ids, expected)
+
+        ids, page = self.page_ids(f'/?cursor={page.next_cursor}')
+        self.assertEqual(ids, [entry.id for entry in reversed(self.entries)][3:7])
+
+    def test_pages_beyond_cached_window_use_query(self):
+        with mock.patch.object(feeds, 'PUBLIC_FEED_SIZE', 5):
+            first, page = self.page_ids()
+            second, page = self.page_ids(f'/?cursor={page.next_cursor}')
+        self.assertEqual(first + second, [self.own.id] + [entry.id for entry in reversed(self.entries)][:7])
+
+    def test_refreshed_on_public_create_and_delete(self):
+        self.assertEqual(recent_public_entries(1)[0].id, self.entries[-1].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = DiaryEntry.objects.create(author=self.author, content='yeni', privacy='public')
+        self.assertEqual(recent_public_entries(1)[0].id, entry.id)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            DiaryEntry.objects.create(author=self.author, content='gizli', privacy='private')
+        self.assertNotIn(feeds.refresh_public_feed, callbacks)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertEqual(recent_public_entries(1)[0].id, self.entries[-1].id)
+
+    def test_landing_shows_recent_public_entries(self):
+        response = self.client.get(reverse('diary:home'))
+        self.assertContains(response, 'giriş 7')
+        self.assertNotContains(response, 'benim')
+
+
+class MediaServingTests(TestCase):
+    name = 'diary_photos/ab/' + 'ab' * 32 + '.jpg'
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        os.makedirs(os.path.join(media_root.name, 'diary_photos', 'ab'))
+        with open(os.path.join(media_root.name, self.name), 'wb') as f:
+            f.write(b'0123456789')
+        with open(os.path.join(media_root.name, 'eski.jpg'), 'wb') as f:
+            f.write(b'eski')
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_serves_without_session_or_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/media/' + self.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], 'max-age=31536000, immutable')
+        self.assertNotIn('Set-Cookie', response)
+        self.assertEqual(self.client.get('/media/eski.jpg')['Cache-Control'], 'max-age=3600')
+
+        response = self.client.get('/media/' + self.name, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get('/media/' + self.name, headers={'Range': 'bytes=2-4'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(response['Content-Length'], '3')
+
+        response = self.client.get('/media/' + self.name, headers={'Range': 'bytes=-3'})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get('/media/' + self.name, headers={'Range': 'bytes=20-'})
+        self.assertEqual(response.status_code, 416)
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.client.get('/media/yok.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/diary_photos').status_code, 404)
+
+    @override_settings(DIARY_MEDIA_SENDFILE='X-Accel-Redirect')
+    def test_offloads_to_web_server(self):
+        response = self.client.get('/media/' + self.name)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.name)
+        self.assertEqual(response.content, b'')
+
+
+class StaticStorageTests(TestCase):
+    def test_missing_manifest_falls_back_to_plain_name(self):
+        with tempfile.TemporaryDirectory() as static_root:
+            storage = StaticStorage(location=static_root, base_url='/static/')
+            self.assertEqual(storage.url('css/style.css'), '/static/css/style.css')
+
+    def test_collectstatic_reports_missing_css_references(self):
+        with tempfile.TemporaryDirectory() as static_root:
+            with open(os.path.join(static_root, 'site.css'), 'w') as f:
+                f.write('body { background: url("yok.png"); }')
+            storage = StaticStorage(location=static_root, base_url='/static/')
+            errors = [
+                processed for _, _, processed in storage.post_process({'site.css': (storage, 'site.css')})
+                if isinstance(processed, Exception)
+            ]
+        self.assertEqual(len(errors), 1)
+        self.assertIn('yok.png', str(errors[0]))
+
+
+def jpeg_upload(size=(20, 20), color='red', name='foto.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class MediaTestMixin:
+    """Her test geçici bir MEDIA_ROOT kullanır; resim işleme havuzu kapalıdır."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name, DIARY_IMAGE_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class MediaBlobTests(MediaTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fotografci', password='parola')
+        cls.entry = DiaryEntry.objects.create(author=cls.user, content='tatil', privacy='public')
+
+    def photo(self, **kwargs):
+        return DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload(**kwargs))
+
+    def expire_reservations(self):
+        MediaBlob.objects.update(reserved_at=timezone.now() - blobs.RESERVATION_TTL - timedelta(seconds=1))
+
+    def test_same_content_shares_one_file(self):
+        first, second = self.photo(), self.photo(name='kopya.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(media_storage.is_hashed(first.image.name))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+    def test_file_deleted_when_last_reference_goes(self):
+        first, second = self.photo(), self.photo()
+        name = first.image.name
+        self.expire_reservations()
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+        self.assertTrue(media_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(media_storage.exists(name))
+
+    def test_replacing_image_releases_old_file(self):
+        photo = self.photo()
+        old_name = photo.image.name
+        self.expire_reservations()
+        photo = DiaryPhoto.objects.get(pk=photo.pk)
+        photo.image = jpeg_upload(color='blue')
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.save()
+        self.assertNotEqual(photo.image.name, old_name)
+        self.assertEqual(MediaBlob.objects.get(name=photo.image.name).ref_count, 1)
+        self.assertFalse(MediaBlob.objects.filter(name=old_name).exists())
+        self.assertFalse(media_storage.exists(old_name))
+
+    def test_resize_renames_and_releases_raw_upload(self):
+        photo = self.photo(size=(1200, 40))
+        raw_name = photo.image.name
+        self.assertEqual(photo.processing_state, PENDING)
+        self.expire_reservations()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(images.process(DiaryPhoto, photo.pk))
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_state, READY)
+        self.assertNotEqual(photo.image.name, raw_name)
+        self.assertEqual(photo.image.width, 1024)
+        self.assertEqual(MediaBlob.objects.get(name=photo.image.name).ref_count, 1)
+        self.assertFalse(MediaBlob.objects.filter(name=raw_name).exists())
+        self.assertFalse(media_storage.exists(raw_name))
+
+    def test_reserved_file_survives_release(self):
+        # Aynı içerik yükleniyor: kayıt ayrıldı, acquire henüz onaylanmadı
+        photo = self.photo()
+        name = photo.image.name
+        blobs.reserve(media_storage, name)
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 0)
+        self.assertTrue(media_storage.exists(name))
+
+        # Yükleme hiç tamamlanmazsa kayıt süresi dolunca temizlenir
+        self.assertEqual(blobs.purge_released(media_storage), 0)
+        self.expire_reservations()
+        self.assertEqual(blobs.purge_released(media_storage), 1)
+        self.assertFalse(media_storage.exists(name))
+
+    def test_delete_file_skips_existing_blob(self):
+        name = self.photo().image.name
+        blobs.delete_file(media_storage, name)
+        self.assertTrue(media_storage.exists(name))
+
+    def test_dedupe_dry_run_changes_nothing(self):
+        # Eski düzende, özetsiz adlarla kaydedilmiş aynı içerikli iki dosya
+        os.makedirs(media_storage.path('diary_photos'))
+        for name in ('diary_photos/eski.jpg', 'diary_photos/eski_kopya.jpg'):
+            with open(media_storage.path(name), 'wb') as f:
+                f.write(jpeg_upload().read())
+            DiaryPhoto.objects.create(diary_entry=self.entry, image=name)
+        self.assertFalse(MediaBlob.objects.exists())
+
+        out = StringIO()
+        call_command('dedupe_media', '--dry-run', stdout=out)
+        self.assertIn('2 dosya taşındı', out.getvalue())
+        self.assertEqual(
+            sorted(DiaryPhoto.objects.values_list('image', flat=True)),
+            ['diary_photos/eski.jpg', 'diary_photos/eski_kopya.jpg'],
+        )
+        self.assertTrue(media_storage.exists('diary_photos/eski.jpg'))
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(sorted(os.listdir(media_storage.path('diary_photos'))), ['eski.jpg', 'eski_kopya.jpg'])
+
+
+class ImageProcessingTests(MediaTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fotografci', password='parola')
+        UserProfile.objects.create(user=cls.user, timeline_built_at=timezone.now())
+        cls.entry = DiaryEntry.objects.create(author=cls.user, content='tatil', privacy='public')
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def state(self, photo):
+        return DiaryPhoto.objects.values_list('processing_state', flat=True).get(pk=photo.pk)
+
+    def test_pending_photo_becomes_ready(self):
+        photo = DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload(size=(600, 400)))
+        self.assertEqual(self.state(photo), PENDING)
+        self.assertTrue(images.process(DiaryPhoto, photo.pk))
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_state, READY)
+        self.assertTrue(photo.renditions)
+        # İş bir kez sahiplenilir
+        self.assertFalse(images.process(DiaryPhoto, photo.pk))
+
+    def test_claimed_photo_is_not_processed_twice(self):
+        photo = DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload())
+        # Başka bir işçi PENDING -> PROCESSING güncellemesini önce yaptı
+        DiaryPhoto.objects.filter(pk=photo.pk).update(processing_state=PROCESSING)
+        with mock.patch.object(images, 'resize_field') as resize:
+            self.assertFalse(images.process(DiaryPhoto, photo.pk))
+            self.assertEqual(images.process_pending(), 0)
+        resize.assert_not_called()
+        self.assertEqual(self.state(photo), PROCESSING)
+
+    def test_broken_file_is_marked_failed(self):
+        os.makedirs(media_storage.path('diary_photos'))
+        with open(media_storage.path('diary_photos/bozuk.jpg'), 'wb') as f:
+            f.write(b'resim degil')
+        photo = DiaryPhoto.objects.create(
+            diary_entry=self.entry, image='diary_photos/bozuk.jpg', processing_state=PENDING
+        )
+        missing = DiaryPhoto.objects.create(
+            diary_entry=self.entry, image='diary_photos/yok.jpg', processing_state=PENDING
+        )
+        with self.assertLogs('diary.images', 'ERROR'):
+            self.assertEqual(images.process_pending(), 2)
+        self.assertEqual(self.state(photo), FAILED)
+        self.assertEqual(self.state(missing), FAILED)
+
+    def test_reset_stuck(self):
+        stuck = DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload())
+        ready = DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload(color='blue'))
+        DiaryPhoto.objects.filter(pk=stuck.pk).update(processing_state=PROCESSING)
+        DiaryPhoto.objects.filter(pk=ready.pk).update(processing_state=READY)
+        self.assertEqual(images.reset_stuck(), 1)
+        self.assertEqual(self.state(stuck), PENDING)
+        self.assertEqual(self.state(ready), READY)
+        self.assertEqual(images.process_pending(), 1)
+        self.assertEqual(self.state(stuck), READY)
+
+    def test_placeholders_for_unfinished_photos(self):
+        photo = DiaryPhoto.objects.create(diary_entry=self.entry, image=jpeg_upload())
+        self.client.force_login(self.user)
+        for url in (reverse('diary:home'), reverse('diary:profile')):
+            response = self.client.get(url)
+            self.assertContains(response, 'Fotoğraf hazırlanıyor')
+            self.assertNotContains(response, 'Fotoğraf işlenemedi')
+
+        DiaryPhoto.objects.filter(pk=photo.pk).update(processing_state=FAILED)
+        # Durum değişikliği kartı process() içinde geçersiz kılar
+        cards.invalidate_entry(self.entry.pk)
+        for url in (reverse('diary:home'), reverse('diary:profile')):
+            response = self.client.get(url)
+            self.assertContains(response, 'Fotoğraf işlenemedi')
+            self.assertNotContains(response, 'Fotoğraf hazırlanıyor')
+            self.assertNotContains(response, 'photoModal')
+
+
+class RenditionTests(MediaTestMixin, TestCase):
+    def field(self, size, color='red'):
+        name = media_storage.save('diary_photos/foto.jpg', jpeg_upload(size=size, color=color))
+        return DiaryPhoto(image=name).image
+
+    def test_small_image_is_not_upscaled(self):
+        field = self.field((100, 50))
+        result = renditions.generate(field)
+        self.assertEqual(set(result), {key for key, *rest in renditions.available_formats()})
+        for key, entries in result.items():
+            self.assertEqual([width for width, name in entries], [64, 100])
+        width, name = result['jpeg'][-1]
+        self.assertEqual(name, renditions.rendition_name(field.name, 100, 'jpg'))
+        with media_storage.open(name) as f:
+            self.assertEqual(Image.open(f).size, (100, 50))
+
+    def test_large_image_gets_every_width(self):
+        result = renditions.generate(self.field((1500, 300)))
+        self.assertEqual([width for width, name in result['webp']], list(renditions.WIDTHS))
+        with media_storage.open(result['webp'][0][1]) as f:
+            self.assertEqual(Image.open(f).size, (64, 13))
+
+    def render(self, field, renditions_value, alt='Foto'):
+        template = Template('{% load image_filters %}{% responsive_image image renditions "25vw" alt=alt css_class="foto" %}')
+        return template.render(Context({'image': field, 'renditions': renditions_value, 'alt': alt}))
+
+    def test_responsive_image_markup(self):
+        field = self.field((100, 50))
+        result = renditions.generate(field)
+        html = self.render(field, result, alt='"tatil"')
+        webp = ', '.join(f'/media/{name} {width}w' for width, name in result['webp'])
+        jpeg = ', '.join(f'/media/{name} {width}w' for width, name in result['jpeg'])
+        self.assertTrue(html.startswith('<picture><source type="image/webp"'))
+        self.assertIn(f'<source type="image/webp" srcset="{webp}" sizes="25vw">', html)
+        self.assertIn(f'<img src="/media/{result["jpeg"][-1][1]}" srcset="{jpeg}" sizes="25vw"', html)
+        self.assertIn('alt="&quot;tatil&quot;" class="foto"', html)
+        self.assertTrue(html.endswith('></picture>'))
+
+    def test_responsive_image_without_renditions(self):
+        field = self.field((100, 50))
+        html = self.render(field, {})
+        self.assertEqual(
+            html, f'<img src="/media/{field.name}" alt="Foto" class="foto" style="" loading="lazy" decoding="async">'
+        )
+        self.assertEqual(self.render(DiaryPhoto().image, {}), '')
+
+    def test_delete_for_removes_only_that_sources_files(self):
+        field = self.field((100, 50))
+        other = self.field((100, 50), color='blue')
+        names = [name for entries in renditions.generate(field).values() for width, name in entries]
+        kept = [name for entries in renditions.generate(other).values() for width, name in entries]
+
+        renditions.delete_for(media_storage, field.name)
+        self.assertFalse(any(media_storage.exists(name) for name in names))
+        self.assertTrue(all(media_storage.exists(name) for name in kept))
+        # Kopyası hiç üretilmemiş kaynak için hata vermez
+        renditions.delete_for(media_storage, 'profile_pics/ab/yok.jpg')
+
+
+class UploadHandlerTests(MediaTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('yukleyen', password='parola')
+        UserProfile.objects.create(user=cls.user, timeline_built_at=timezone.now())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def parse(self, upload, image_handlers=True):
+        request = RequestFactory().post('/', {'dosya': upload})
+        if image_handlers:
+            request.upload_handlers = [
+                uploadhandlers.ImageMemoryFileUploadHandler(request),
+                uploadhandlers.ImageTemporaryFileUploadHandler(request),
+            ]
+        return request, request.FILES
+
+    def create_entry(self, *photos):
+        return self.client.post(
+            reverse('diary:create_entry'), {'content': 'fotoğraflı', 'privacy': 'public', 'photos': list(photos)}
+        )
+
+    def test_valid_image_is_hashed_while_streaming(self):
+        upload = jpeg_upload()
+        digest = hashlib.sha256(upload.read()).hexdigest()
+        upload.seek(0)
+        request, files = self.parse(upload)
+        self.assertEqual(files['dosya'].sha256, digest)
+        self.assertFalse(getattr(request, 'rejected_uploads', []))
+
+    def test_other_views_use_default_handlers(self):
+        # Yönetim paneli gibi görünümler resim olmayan dosyaları da alır
+        request, files = self.parse(SimpleUploadedFile('notlar.txt', b'metin'), image_handlers=False)
+        self.assertEqual(files['dosya'].read(), b'metin')
+
+    def test_rejects_non_image(self):
+        request, files = self.parse(SimpleUploadedFile('notlar.txt', b'metin' * 100))
+        self.assertEqual(request.rejected_uploads, [('dosya', 'notlar.txt', 'Dosya geçerli bir resim değil.')])
+
+    def test_rejects_disallowed_format(self):
+        buffer = BytesIO()
+        Image.new('RGB', (4, 4)).save(buffer, format='BMP')
+        request, files = self.parse(SimpleUploadedFile('resim.bmp', buffer.getvalue()))
+        self.assertNotIn('dosya', files)
+        self.assertIn('Sadece JPEG', request.rejected_uploads[0][2])
+
+    @override_settings(DIARY_UPLOAD_MAX_PIXELS=100)
+    def test_rejects_too_many_pixels_from_header(self):
+        request, files = self.parse(jpeg_upload(size=(20, 20)))
+        self.assertNotIn('dosya', files)
+        self.assertEqual(request.rejected_uploads[0][2], 'Resim çok büyük (20x20).')
+
+    def test_rejects_truncated_header(self):
+        header = jpeg_upload().read()[:20]
+        request, files = self.parse(SimpleUploadedFile('yarim.jpg', header))
+        self.assertEqual(request.rejected_uploads, [('dosya', 'yarim.jpg', 'Dosya geçerli bir resim değil.')])
+        self.assertFalse(DiaryPhoto.objects.exists())
+
+    def test_rejection_reaches_entry_form(self):
+        response = self.create_entry(SimpleUploadedFile('notlar.txt', b'metin' * 100))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'notlar.txt: Dosya geçerli bir resim değil.')
+        self.assertFalse(DiaryEntry.objects.exists())
+
+        response = self.create_entry(jpeg_upload())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(DiaryPhoto.objects.get().diary_entry.content, 'fotoğraflı')
+
+    def test_rejection_reaches_profile_form(self):
+        response = self.client.post(reverse('diary:edit_profile'), {
+            'username': self.user.username, 'bio': '', 'profile_picture': SimpleUploadedFile('notlar.txt', b'x' * 100),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Dosya geçerli bir resim değil.')
+
+    def test_photo_views_still_check_csrf(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse('diary:create_entry'), {'content': 'x', 'privacy': 'public'})
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(DIARY_AUTH_CACHE=True, SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class AuthCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.user, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        DiaryEntry.objects.create(author=cls.author, content='içerik', privacy='public')
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client.login(username='okur', password='parola')
+
+    def tables(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return ' '.join(query['sql'] for query in queries)
+
+    def test_steady_state_skips_session_user_and_follow_queries(self):
+        self.tables('/')
+        sql = self.tables('/')
+        self.assertNotIn('django_session', sql)
+        self.assertNotIn('FROM "diary_userprofile" WHERE', sql)
+        self.assertNotIn('WHERE "auth_user"."id" = ', sql)
+
+        self.tables('/profile/yazar/')
+        self.assertNotIn('diary_follow"', self.tables('/profile/yazar/'))
+
+    def test_follow_toggle_invalidates_following(self):
+        self.assertFalse(self.client.get('/profile/yazar/').context['is_following'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('diary:follow_user', args=['yazar']))
+        self.assertTrue(self.client.get('/profile/yazar/').context['is_following'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('diary:bulk_follow'), {'unfollow': ['yazar']})
+        self.assertFalse(self.client.get('/profile/yazar/').context['is_following'])
+
+    def test_password_change_and_logout_end_cached_sessions(self):
+        self.client.get('/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('yeni-parola')
+            self.user.save()
+        self.assertTemplateUsed(self.client.get('/'), 'diary/landing.html')
+
+        self.client.login(username='okur', password='yeni-parola')
+        self.client.get('/')
+        self.client.post(reverse('logout'))
+        self.assertTemplateUsed(self.client.get('/'), 'diary/landing.html')
+
+    def test_profile_edit_invalidates_cached_user(self):
+        self.client.get('/')
+        self.assertIsNotNone(caches['default'].get('diary:auth-user:%d' % self.user.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(user=self.user).get().save()
+        self.assertIsNone(caches['default'].get('diary:auth-user:%d' % self.user.pk))
+        self.assertTrue(authcache.cached_profile(self.client.get('/').wsgi_request.user))
+
+
+class EmailLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('ali', 'Ali@Example.com', 'parola')
+        for username in ('ali1', 'ali2', 'alim', 'ali2x'):
+            User.objects.create_user(username, password='parola')
+
+    def test_login_with_case_insensitive_email_or_username(self):
+        response = self.client.post(reverse('login'), {'username': 'ali@example.COM', 'password': 'parola'})
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertEqual(self.client.session['_auth_user_id'], str(self.user.pk))
+
+        self.client.logout()
+        self.assertTrue(self.client.login(username='ali', password='parola'))
+        self.assertFalse(self.client.login(username='yok@example.com', password='parola'))
+
+    def test_email_lookup_uses_unique_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN çıktısı SQLite içindir')
+        sql, params = users_with_email('ali@example.com').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' / '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('INDEX diary_user_email_lower', plan)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('baska', 'ALI@example.com', 'parola')
+        form = CustomUserCreationForm({'email': 'ali@EXAMPLE.com', 'password1': 'Zor-parola-123', 'password2': 'Zor-parola-123'})
+        self.assertIn('email', form.errors)
+
+    def test_username_allocated_in_one_query(self):
+        form = CustomUserCreationForm()
+        with self.assertNumQueries(1):
+            self.assertEqual(form.generate_username_from_email('ali@example.org'), 'ali3')
+        self.assertEqual(form.generate_username_from_email('veli@example.org'), 'veli')
+
+    def test_registration_retries_taken_username(self):
+        form = CustomUserCreationForm({'email': 'veli@example.org', 'password1': 'Zor-parola-123', 'password2': 'Zor-parola-123'})
+        self.assertTrue(form.is_valid())
+        user = form.save(commit=False)
+        # Başka bir kayıt aynı adı araya girip aldı
+        User.objects.create_user(user.username, password='parola')
+        form.save_user(user)
+        self.assertEqual(user.username, 'veli1')
+
+
+class PasswordHashingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='ayse', email='ayse@example.com', password=make_password('parola', hasher='pbkdf2_sha256')
+        )
+
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def login(self, password='parola'):
+        return self.client.post(reverse('login'), {'username': 'ayse@example.com', 'password': password})
+
+    def test_login_upgrades_hash_and_reports_timing(self):
+        response = self.login()
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertIn('hash;dur=', response['Server-Timing'])
+        self.assertIn('2 hashes', response['Server-Timing'])
+
+    @override_settings(DIARY_THROTTLE_RATES={'login-email': (2, 60), 'login-ip': (100, 60)})
+    def test_login_throttled_by_email_without_hashing(self):
+        for attempt in range(2):
+            self.assertEqual(self.login('yanlis').status_code, 200)
+        with mock.patch.object(passwords, 'run') as run:
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, throttle.MESSAGE, status_code=429)
+        run.assert_not_called()
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    @override_settings(DIARY_THROTTLE_RATES={'register-ip': (1, 60)})
+    def test_registration_throttled_by_ip(self):
+        data = {'email': 'yeni@example.com', 'password1': 'Zor-parola-123', 'password2': 'baska'}
+        self.assertEqual(self.client.post(reverse('diary:register'), data).status_code, 200)
+        data['password2'] = data['password1']
+        response = self.client.post(reverse('diary:register'), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(email='yeni@example.com').exists())
+
+    @override_settings(DIARY_HASH_WAIT=0)
+    def test_full_pool_rejects_login(self):
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        with self.assertLogs('diary.passwords', 'WARNING') as logs:
+            with mock.patch.object(passwords, '_get_pool', return_value=(mock.Mock(), slots)):
+                response = self.login()
+        self.assertContains(response, BUSY_MESSAGE, status_code=503)
+        self.assertEqual(logs.output, ['WARNING:diary.passwords:Parola özetleme havuzu dolu, istek reddedildi'])
+
+
+@override_settings(DIARY_ETAGS=True)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('okur', password='parola')
+        cls.author = User.objects.create_user('yazar', password='parola')
+        for user in (cls.reader, cls.author):
+            UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        cls.entry = DiaryEntry.objects.create(author=cls.author, title='ilk', content='içerik', privacy='public')
+        UserProfile.reconcile_counters()
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def revalidate(self, url):
+        # İlk ziyarette CSRF çerezi oluşur; çerez ETag'e girdiği için sonraki istekten itibaren sabittir
+        self.client.get(url)
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('private', first['Cache-Control'])
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('private', second['Cache-Control'])
+        return first['ETag']
+
+    def test_home_not_modified_until_feed_changes(self):
+        etag = self.revalidate(reverse('diary:home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            DiaryEntry.objects.create(author=self.author, title='ikinci', content='içerik', privacy='public')
+        response = self.client.get(reverse('diary:home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'ikinci')
+
+    def test_json_feed_shares_validators(self):
+        etag = self.revalidate(reverse('diary:feed_json'))
+        self.assertNotEqual(etag, self.client.get(reverse('diary:home'))['ETag'])
+        response = self.client.get(reverse('diary:feed_json'))
+        self.assertEqual([entry['title'] for entry in response.json()['entries']], ['ilk'])
+
+        DiaryEntry.objects.filter(pk=self.entry.pk).update(title='düzeltildi', updated_at=timezone.now())
+        response = self.client.get(reverse('diary:feed_json'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['entries'][0]['title'], 'düzeltildi')
+
+    def test_profile_and_calendar_change_with_follow_and_entries(self):
+        profile_url = reverse('diary:user_profile', args=['yazar'])
+        calendar_url = reverse('diary:profile_calendar', args=['yazar'])
+        profile_etag = self.revalidate(profile_url)
+        calendar_etag = self.revalidate(calendar_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('diary:follow_user', args=['yazar']))
+        response = self.client.get(profile_url, HTTP_IF_NONE_MATCH=profile_etag)
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DiaryEntry.objects.create(author=self.author, content='yeni', privacy='public')
+        self.assertEqual(self.client.get(calendar_url, HTTP_IF_NONE_MATCH=calendar_etag).status_code, 200)
+
+    async def test_async_profile_not_modified(self):
+        factory = AsyncRequestFactory()
+        request = factory.get('/profile/yazar/')
+        request.user = self.reader
+        response = await async_views.profile(request, username='yazar')
+        self.assertEqual(response.status_code, 200)
+
+        request = factory.get('/profile/yazar/', headers={'If-None-Match': response['ETag']})
+        request.user = self.reader
+        response = await async_views.profile(request, username='yazar')
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(DIARY_ETAGS=False)
+    async def test_disabled_without_shared_cache(self):
+        await sync_to_async(self.client.force_login)(self.reader)
+        response = await sync_to_async(self.client.get)(reverse('diary:home'))
+        self.assertNotIn('ETag', response)
+        self.assertEqual(response['Cache-Control'], 'private, must-revalidate, max-age=0')
+
+        request = AsyncRequestFactory().get('/profile/yazar/', headers={'If-None-Match': '*'})
+        request.user = self.reader
+        response = await async_views.profile(request, username='yazar')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,70 @@
+"""
+Giriş ve kayıt denemelerinin hız sınırı.
+
+Sayaçlar sabit pencereli ve süreç içi önbellektedir (DIARY_THROTTLE_CACHE,
+varsayılan 'throttle' LocMemCache); her süreç kendi sayacını tuttuğu için
+gerçek sınır işçi sayısıyla çarpılır. Sınırlar DIARY_THROTTLE_RATES
+ayarında kapsam adına göre (deneme sayısı, pencere saniyesi) olarak verilir:
+
+* login-ip, login-email: IP'den ve e-postaya yapılan başarısız girişler.
+  Başarılı giriş e-posta sayacını sıfırlar.
+* register-ip: IP'den gelen kayıt denemeleri.
+
+Sınır aşılınca parola hiç özetlenmez; form hatası ve 429 döner.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_RATES = {
+    'login-ip': (20, 5 * 60),
+    'login-email': (5, 15 * 60),
+    'register-ip': (10, 60 * 60),
+}
+MESSAGE = 'Çok fazla deneme yapıldı. Lütfen birkaç dakika sonra tekrar deneyin.'
+
+
+def _cache():
+    return caches[getattr(settings, 'DIARY_THROTTLE_CACHE', 'throttle')]
+
+
+def _rate(scope):
+    return getattr(settings, 'DIARY_THROTTLE_RATES', DEFAULT_RATES).get(scope)
+
+
+def _key(scope, ident):
+    # E-posta büyük/küçük harf duyarsız; anahtar uzunluğu sabit olsun
+    digest = hashlib.sha256(str(ident).lower().encode()).hexdigest()[:32]
+    return f'diary:throttle:{scope}:{digest}'
+
+
+def client_ip(request):
+    # Vekil arkasında REMOTE_ADDR'ı gerçek istemci adresiyle dolduran web sunucusu ayarı gerekir
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_limited(scope, ident):
+    rate = _rate(scope)
+    if rate is None or not ident:
+        return False
+    return (_cache().get(_key(scope, ident)) or 0) >= rate[0]
+
+
+def hit(scope, ident):
+    """Denemeyi sayar ve pencere içindeki deneme sayısını döndürür."""
+    rate = _rate(scope)
+    if rate is None or not ident:
+        return 0
+    cache, key = _cache(), _key(scope, ident)
+    cache.add(key, 0, rate[1])
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Anahtar add ile incr arasında süresi dolup silindi
+        cache.set(key, 1, rate[1])
+        return 1
+
+
+def reset(scope, ident):
+    if ident:
+        _cache().delete(_key(scope, ident))
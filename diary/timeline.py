@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.utils import timezone
+from .authcache import cached_profile
+from .models import DiaryEntry, Follow, TimelineEntry, UserProfile
+
+# bulk_create için parti boyutu (SQLite değişken limitinin altında kalmak için)
+BATCH_SIZE = 500
+
+
+def _rows_for(user_ids, entry):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            entry_id=entry.id,
+            author_id=entry.author_id,
+            created_at=entry.created_at,
+        )
+        for user_id in user_ids
+    ]
+
+
+def fan_out_entry(entry):
+    """
+    Girişi yazarın ve (herkese açıksa) takipçilerinin akışına yazar.
+    Gizliye çekilen girişler takipçilerin akışından çıkarılır.
+    Tekrar çağrılması güvenlidir. Girişin dağıtıldığı takipçileri döndürür.
+    """
+    follower_ids = []
+    if entry.privacy == 'public':
+        follower_ids = list(
+            Follow.objects.filter(following_id=entry.author_id).values_list('follower_id', flat=True)
+        )
+    else:
+        TimelineEntry.objects.filter(entry_id=entry.id).exclude(user_id=entry.author_id).delete()
+
+    TimelineEntry.objects.bulk_create(
+        _rows_for([entry.author_id, *follower_ids], entry), batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+    return follower_ids
+
+
+def add_authors_to_timeline(follower_id, author_ids):
+    """Yeni takip edilen yazarların herkese açık girişlerini akışa ekler."""
+    entries = DiaryEntry.objects.filter(author_id__in=author_ids, privacy='public').values_list(
+        'id', 'author_id', 'created_at'
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=follower_id, entry_id=entry_id, author_id=author_id, created_at=created_at)
+            for entry_id, author_id, created_at in entries.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_author_to_timeline(follower_id, author_id):
+    add_authors_to_timeline(follower_id, [author_id])
+
+
+def remove_authors_from_timeline(follower_id, author_ids):
+    """Takibi bırakılan yazarların girişlerini akıştan çıkarır."""
+    TimelineEntry.objects.filter(user_id=follower_id, author_id__in=author_ids).delete()
+
+
+def remove_author_from_timeline(follower_id, author_id):
+    remove_authors_from_timeline(follower_id, [author_id])
+
+
+def is_timeline_ready(user):
+    profile = cached_profile(user)
+    if profile is not None and profile.timeline_built_at:
+        return True
+    return UserProfile.objects.filter(user=user, timeline_built_at__isnull=False).exists()
+
+
+@transaction.atomic
+def rebuild_timeline(user):
+    """Kullanıcının akışını Follow ve DiaryEntry tablolarından baştan oluşturur."""
+    TimelineEntry.objects.filter(user=user).delete()
+
+    following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
+    own_entries = DiaryEntry.objects.filter(author=user)
+    followed_entries = DiaryEntry.objects.filter(author_id__in=following_ids, privacy='public')
+    entries = (own_entries | followed_entries).values_list('id', 'author_id', 'created_at')
+
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user.id, entry_id=entry_id, author_id=author_id, created_at=created_at)
+            for entry_id, author_id, created_at in entries.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    profile, created = UserProfile.objects.get_or_create(user=user)
+    UserProfile.objects.filter(pk=profile.pk).update(timeline_built_at=timezone.now())
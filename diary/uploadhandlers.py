@@ -0,0 +1,130 @@
+"""
+Resim yüklemeleri için akış tabanlı yükleme işleyicileri.
+
+Dosya parçaları gelirken:
+
+* SHA-256 özeti hesaplanır ve dosya nesnesine ``sha256`` olarak eklenir;
+  ContentAddressedStorage dosyayı ikinci kez okumadan adlandırır.
+* Biçim ve boyutlar sadece dosya başlığından (ilk parçalardan) okunur.
+  Desteklenmeyen ya da çok büyük resimler geri kalanı diske/belleğe
+  yazılmadan atlanır ve ``request.rejected_uploads`` listesine eklenir;
+  görünümler bu liste boş değilse formu reddeder.
+
+İşleyiciler site geneline değil, sadece image_uploads ile işaretlenmiş
+fotoğraf görünümlerine kurulur; yönetim paneli gibi diğer görünümlerde
+Django'nun varsayılan işleyicileri çalışır.
+"""
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, SkipFile, TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import ImageFile
+
+ALLOWED_FORMATS = {'JPEG', 'MPO', 'PNG', 'WEBP', 'GIF'}
+# Başlığı bu kadar veride bulunamayan dosyalar reddedilir
+MAX_HEADER_BYTES = 256 * 1024
+
+
+def max_pixels():
+    return getattr(settings, 'DIARY_UPLOAD_MAX_PIXELS', 40_000_000)
+
+
+class HashingMixin:
+    def new_file(self, *args, **kwargs):
+        self.digest = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.is_receiving():
+            self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+    def is_receiving(self):
+        return True
+
+
+class ImageHeaderMixin:
+    def new_file(self, *args, **kwargs):
+        self.header_parser = ImageFile.Parser()
+        self.header_size = 0
+        self.header_checked = False
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.is_receiving() and not self.header_checked:
+            self.check_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def check_header(self, raw_data):
+        # Parser başlık çözülene kadar veriyi biriktirir; çözülünce beslemeyi bırakırız
+        try:
+            self.header_parser.feed(raw_data)
+        except (OSError, SyntaxError):
+            self.reject('Dosya geçerli bir resim değil.')
+        self.header_size += len(raw_data)
+
+        image = self.header_parser.image
+        if image is None:
+            if self.header_size > MAX_HEADER_BYTES:
+                self.reject('Dosya geçerli bir resim değil.')
+            return
+
+        self.header_checked = True
+        self.header_parser = None
+        if image.format not in ALLOWED_FORMATS:
+            self.reject('Sadece JPEG, PNG, WebP ve GIF resimleri yükleyebilirsiniz.')
+        if image.width * image.height > max_pixels():
+            self.reject(f'Resim çok büyük ({image.width}x{image.height}).')
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None and not self.header_checked:
+            # Dosya bitti ama başlık çözülemedi. Zincirdeki diğer işleyiciler
+            # çağrılmasın diye dosya döndürülür, görünüm isteği reddeder.
+            self.record_rejection('Dosya geçerli bir resim değil.')
+        return uploaded
+
+    def record_rejection(self, reason):
+        if not hasattr(self.request, 'rejected_uploads'):
+            self.request.rejected_uploads = []
+        self.request.rejected_uploads.append((self.field_name, self.file_name, reason))
+
+    def reject(self, reason):
+        self.record_rejection(reason)
+        raise SkipFile(reason)
+
+
+class ImageMemoryFileUploadHandler(ImageHeaderMixin, HashingMixin, MemoryFileUploadHandler):
+    def is_receiving(self):
+        # Dosya bellek sınırını aşıyorsa parçalar geçici dosya işleyicisine gider
+        return self.activated
+
+
+class ImageTemporaryFileUploadHandler(ImageHeaderMixin, HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def image_uploads(view_func):
+    """
+    Görünümün yüklemelerini resim işleyicileriyle alır. İşleyiciler
+    request.POST okunmadan kurulmalıdır; CsrfViewMiddleware POST'u okuduğu
+    için CSRF kontrolü görünüm içinde, işleyiciler kurulduktan sonra yapılır.
+    """
+    protected = csrf_protect(view_func)
+
+    @wraps(view_func)
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [
+            ImageMemoryFileUploadHandler(request),
+            ImageTemporaryFileUploadHandler(request),
+        ]
+        return protected(request, *args, **kwargs)
+    return wrapper
@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.DIARY_ASYNC_VIEWS:
+    from . import async_views as feed_views
+else:
+    feed_views = views
+
 app_name = 'diary'
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', feed_views.home, name='home'),
+    path('feed/stream/', feed_views.feed_stream, name='feed_stream'),
+    path('feed/cards/', views.feed_cards, name='feed_cards'),
+    path('feed/json/', views.feed_json, name='feed_json'),
     path('create/', views.create_entry, name='create_entry'),
-    path('profile/', views.profile, name='profile'),
-    path('profile/<str:username>/', views.profile, name='user_profile'),
-    path('follow/<str:username>/', views.follow_user, name='follow_user'),
+    path('profile/', feed_views.profile, name='profile'),
+    path('profile/<str:username>/', feed_views.profile, name='user_profile'),
+    path('profile/<str:username>/calendar/', views.profile_calendar, name='profile_calendar'),
+    path('search/', views.search, name='search'),
+    path('follow/<str:username>/', feed_views.follow_user, name='follow_user'),
+    path('follows/', views.bulk_follow, name='bulk_follow'),
     path('register/', views.register_view, name='register'),
     path('edit-profile/', views.edit_profile, name='edit_profile'),
     path('delete-entry/<int:entry_id>/', views.delete_entry, name='delete_entry'),
@@ -2,56 +2,110 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate
+from django.contrib.auth import views as auth_views
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.http import Http404, HttpResponse, JsonResponse
 from .models import DiaryEntry, DiaryPhoto, UserProfile, Follow
-from .forms import DiaryEntryForm, UserProfileForm, CustomUserCreationForm, CustomAuthenticationForm, EditUsernameForm
+from .forms import BUSY_MESSAGE, DiaryEntryForm, UserProfileForm, CustomUserCreationForm, CustomAuthenticationForm, EditUsernameForm
+from . import authcache, follows, passwords, throttle
+from .conditional import (
+    calendar_etag, etag_condition, feed_etag, feed_page, json_feed_etag, private_cache, profile_etag, profile_user,
+)
+from .feeds import LANDING_ENTRIES, recent_public_entries, visible_entries
+from .cards import render_cards
+from .pagination import paginate
+from .realtime import MAX_IDS
+from .routers import primary_db
+from .search import search_entries
+from .suggestions import suggestions_for
+from .uploadhandlers import image_uploads
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 import json
 
 
+@private_cache
+@etag_condition(feed_etag)
 def home(request):
     """Ana sayfa akışı"""
     if request.user.is_authenticated:
-        following_users = list(Follow.objects.filter(follower=request.user).values_list('following_id', flat=True))
-        
-        # Kullanıcının kendi gönderilerini her zaman dahil et
-        user_entries_q = Q(author=request.user)
-        
-        # Takip edilen kullanıcıların herkese açık gönderileri için Q nesnesi
-        following_entries_q = Q(author__in=following_users, privacy='public')
-
-        # Birleşik sorgu
-        combined_q = user_entries_q | following_entries_q
-        entries = DiaryEntry.objects.filter(combined_q).distinct().select_related('author', 'author__userprofile').prefetch_related('photos').order_by('-created_at')
-
-        # Eğer kullanıcının akışı (kendi gönderileri hariç) boşsa, genel herkese açık gönderileri göster
-        has_followed_content = entries.exclude(author=request.user).exists()
-        if not has_followed_content:
-            # Genel herkese açık gönderileri de akışa ekle
-            public_entries_q = Q(privacy='public')
-            final_q = user_entries_q | public_entries_q
-            entries = DiaryEntry.objects.filter(final_q).distinct().select_related('author', 'author__userprofile').prefetch_related('photos').order_by('-created_at')
-
-        paginator = Paginator(entries, 10)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-
-        return render(request, 'diary/home.html', {'page_obj': page_obj})
+        # Sayfa ETag hesaplanırken yüklendi (bkz. diary.conditional)
+        page_obj = feed_page(request)
+        # Kartlar önbellekten gelir, sadece eksik olanlar çizilir
+        cards = render_cards(page_obj.object_list)
+
+        return render(request, 'diary/home.html', {
+            'page_obj': page_obj,
+            'cards': cards,
+            'suggestions': suggestions_for(request.user),
+        })
     else:
         # Giriş yapmamış kullanıcılar için landing sayfasını göster
-        # Hata riskini azaltmak için public entries göndermeyi devre dışı bırakıyoruz
-        return render(request, 'diary/landing.html', {'entries': []})
+        return render(request, 'diary/landing.html', {
+            'cards': render_cards(recent_public_entries(LANDING_ENTRIES)),
+        })
+
+
+@private_cache
+@login_required
+@etag_condition(json_feed_etag)
+def feed_json(request):
+    """Ana sayfa akışının JSON sürümü (?cursor= ile sayfalanır)"""
+    page_obj = feed_page(request)
+    ids = [entry.id for entry in page_obj.object_list]
+    entries = DiaryEntry.objects.select_related('author').prefetch_related('photos').in_bulk(ids)
+    return JsonResponse({
+        'entries': [
+            {
+                'id': entry.id,
+                'author': entry.author.username,
+                'title': entry.title,
+                'content': entry.content,
+                'privacy': entry.privacy,
+                'created_at': entry.created_at.isoformat(),
+                'updated_at': entry.updated_at.isoformat(),
+                'photos': [photo.image.url for photo in entry.photos.all() if photo.image and photo.is_ready],
+            }
+            for entry in (entries[entry_id] for entry_id in ids if entry_id in entries)
+        ],
+        'next_cursor': page_obj.next_cursor,
+    })
 
 
 @login_required
+def feed_cards(request):
+    """Anlık bildirimle gelen girişlerin kartları (?ids=12,11,9)"""
+    ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.isdigit()][:MAX_IDS]
+    cards = render_cards(visible_entries(request.user, ids)) if ids else []
+    return HttpResponse(''.join(cards))
+
+
+@login_required
+def feed_stream(request):
+    # Bildirim akışı ASGI'de diary.async_views.feed_stream ile açılır. WSGI
+    # işçisi uzun bağlantı tutamaz; 204 tarayıcının yeniden bağlanmasını durdurur.
+    return HttpResponse(status=204)
+
+
+@primary_db
+@login_required
+@image_uploads
 def create_entry(request):
     """Yeni günlük girişi oluştur"""
     if request.method == 'POST':
         form = DiaryEntryForm(request.POST)
         photos = request.FILES.getlist('photos')
 
+        # Yükleme sırasında başlığından reddedilen dosyalar
+        rejected = getattr(request, 'rejected_uploads', [])
+        if rejected:
+            for field_name, file_name, reason in rejected:
+                messages.error(request, f'{file_name}: {reason}')
+            return render(request, 'diary/create_entry.html', {'form': form})
+
         if len(photos) > 3:
             messages.error(request, 'En fazla 3 fotoğraf yükleyebilirsiniz.')
             return render(request, 'diary/create_entry.html', {'form': form})
@@ -60,6 +114,11 @@ def create_entry(request):
             entry = form.save(commit=False)
             entry.author = request.user
             entry.save()  # Önce ana nesneyi kaydet
+            UserProfile.adjust_counters(
+                request.user.id,
+                entry_count=1,
+                public_entry_count=int(entry.privacy == 'public'),
+            )
 
             # Sonra fotoğrafları işle
             for photo_file in photos:
@@ -73,45 +132,50 @@ def create_entry(request):
     return render(request, 'diary/create_entry.html', {'form': form})
 
 
+def _profile_user(request, username):
+    if username:
+        # ETag hesaplanırken yüklendi (bkz. diary.conditional)
+        user = profile_user(request, username)
+        if user is None:
+            raise Http404('Kullanıcı bulunamadı.')
+        return user, user == request.user
+    return request.user, True
+
+
+def _profile_entries(user, is_own_profile):
+    # Günlük girişlerini filtrele
+    if is_own_profile:
+        return DiaryEntry.objects.filter(author=user)
+    return DiaryEntry.objects.filter(author=user, privacy='public')
+
+
+@private_cache
 @login_required
+@etag_condition(profile_etag)
 def profile(request, username=None):
     """Profil sayfası - kendi veya başkasının günlükleri"""
-    if username:
-        user = get_object_or_404(User, username=username)
-        is_own_profile = user == request.user
-    else:
-        user = request.user
-        is_own_profile = True
+    user, is_own_profile = _profile_user(request, username)
     
     # Profil bilgilerini al veya oluştur
     profile, created = UserProfile.objects.get_or_create(user=user)
+    if created:
+        # Yeni profilin sayaçları kayıt sırasında dolduruldu
+        profile.refresh_from_db(fields=UserProfile.COUNTER_FIELDS)
     
-    # Günlük girişlerini filtrele
-    if is_own_profile:
-        entries = DiaryEntry.objects.filter(author=user)
-    else:
-        entries = DiaryEntry.objects.filter(author=user, privacy='public')
-    
-    entries = entries.select_related('author').prefetch_related('photos')
+    entries = _profile_entries(user, is_own_profile)
+    page_obj = paginate(entries.select_related('author').prefetch_related('photos'), request)
     
     # Takip durumunu kontrol et
     is_following = False
     if not is_own_profile and request.user.is_authenticated:
-        is_following = Follow.objects.filter(follower=request.user, following=user).exists()
-    
-    # Takvim görünümü için günlükleri tarihe göre grupla
-    entries_by_date = {}
-    for entry in entries:
-        date_key = entry.date_only
-        if date_key not in entries_by_date:
-            entries_by_date[date_key] = []
-        entries_by_date[date_key].append(entry)
+        is_following = authcache.is_following(request.user, user.pk)
     
+    # Takvim görünümü profile_calendar üzerinden ay ay ayrıca yüklenir
     context = {
         'profile_user': user,
         'profile': profile,
-        'entries': entries,
-        'entries_by_date': entries_by_date,
+        'entries': page_obj,
+        'entry_count': profile.entry_count if is_own_profile else profile.public_entry_count,
         'is_own_profile': is_own_profile,
         'is_following': is_following,
     }
@@ -119,6 +183,55 @@ def profile(request, username=None):
     return render(request, 'diary/profile.html', context)
 
 
+@private_cache
+@login_required
+@etag_condition(calendar_etag)
+def profile_calendar(request, username):
+    """Takvim görünümü için seçilen aydaki günlük sayıları (JSON)"""
+    user, is_own_profile = _profile_user(request, username)
+
+    today = timezone.localdate()
+    try:
+        year, month = (int(part) for part in request.GET.get('month', '').split('-'))
+        if not date.min.year < year < date.max.year:
+            raise ValueError(year)
+        month_start = date(year, month, 1)
+    except ValueError:
+        month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=31)).replace(day=1)
+    previous_month = (month_start - timedelta(days=1)).replace(day=1)
+
+    tz = timezone.get_current_timezone()
+    days = (
+        _profile_entries(user, is_own_profile)
+        .filter(
+            created_at__gte=datetime.combine(month_start, time.min, tzinfo=tz),
+            created_at__lt=datetime.combine(next_month, time.min, tzinfo=tz),
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by('day')
+    )
+
+    return JsonResponse({
+        'month': month_start.strftime('%Y-%m'),
+        'previous': previous_month.strftime('%Y-%m'),
+        'next': next_month.strftime('%Y-%m'),
+        'days': {row['day'].isoformat(): row['count'] for row in days},
+    })
+
+
+@login_required
+def search(request):
+    """Herkese açık ve kendi günlüklerinde tam metin arama"""
+    query = request.GET.get('q', '').strip()[:200]
+    page_obj = search_entries(query, request.user, request.GET.get('cursor')) if query else None
+
+    return render(request, 'diary/search.html', {'query': query, 'page_obj': page_obj})
+
+
+@primary_db
 @login_required
 def follow_user(request, username):
     """Kullanıcıyı takip et/takibi bırak"""
@@ -128,40 +241,110 @@ def follow_user(request, username):
         if user_to_follow == request.user:
             return JsonResponse({'error': 'Kendinizi takip edemezsiniz.'}, status=400)
         
-        follow_obj, created = Follow.objects.get_or_create(
-            follower=request.user,
-            following=user_to_follow
-        )
-        
-        if not created:
-            follow_obj.delete()
-            is_following = False
-        else:
-            is_following = True
+        with transaction.atomic():
+            follow_obj, created = Follow.objects.get_or_create(
+                follower=request.user,
+                following=user_to_follow
+            )
+            
+            if not created:
+                follow_obj.delete()
+                is_following = False
+            else:
+                is_following = True
+
+            delta = 1 if is_following else -1
+            UserProfile.adjust_counters(request.user.id, following_count=delta)
+            UserProfile.adjust_counters(user_to_follow.id, followers_count=delta)
+
+        followers_count = UserProfile.objects.filter(user=user_to_follow).values_list(
+            'followers_count', flat=True
+        ).first()
         
-        return JsonResponse({'is_following': is_following})
+        return JsonResponse({'is_following': is_following, 'followers_count': followers_count})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
+@primary_db
+@login_required
+def bulk_follow(request):
+    """
+    Birden çok kullanıcıyı tek istekte takip et/takibi bırak.
+    Gövde JSON ({"follow": [...], "unfollow": [...]}) ya da aynı adlı form alanları olabilir.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+            follow, unfollow = data.get('follow', []), data.get('unfollow', [])
+        except (ValueError, AttributeError):
+            return JsonResponse({'error': 'Geçersiz JSON.'}, status=400)
+    else:
+        follow, unfollow = request.POST.getlist('follow'), request.POST.getlist('unfollow')
+    if not isinstance(follow, list) or not isinstance(unfollow, list) or \
+            not all(isinstance(name, str) for name in follow + unfollow):
+        return JsonResponse({'error': 'follow ve unfollow kullanıcı adı listesi olmalı.'}, status=400)
+
+    try:
+        results, not_found = follows.bulk_follow(request.user, follow, unfollow)
+    except follows.BulkFollowError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({'results': results, 'not_found': not_found})
+
+
+@primary_db
 def register_view(request):
     """Kullanıcı kayıt sayfası - Email tabanlı"""
+    status = 200
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            # UserProfile oluştur
-            UserProfile.objects.create(user=user)
-            login(request, user)
-            messages.success(request, f'Hoş geldin! Kullanıcı adın: {user.username}')
-            return redirect('diary:home')
+        ip = throttle.client_ip(request)
+        if throttle.is_limited('register-ip', ip):
+            # Kullanıcı kaydedilmez, parola özetlenmez
+            form.add_error(None, throttle.MESSAGE)
+            status = 429
+        else:
+            throttle.hit('register-ip', ip)
+            if form.is_valid():
+                try:
+                    user = form.save()
+                except IntegrityError:
+                    # Aynı e-postayla eşzamanlı kayıt
+                    form.add_error('email', 'Bu e-posta adresi zaten kullanılıyor.')
+                except passwords.HashingBusy:
+                    form.add_error(None, BUSY_MESSAGE)
+                    status = 503
+                else:
+                    # UserProfile oluştur (yeni kullanıcının akışı boş ama hazırdır)
+                    UserProfile.objects.create(user=user, timeline_built_at=timezone.now())
+                    login(request, user)
+                    messages.success(request, f'Hoş geldin! Kullanıcı adın: {user.username}')
+                    return redirect('diary:home')
     else:
         form = CustomUserCreationForm()
     
-    return render(request, 'registration/register.html', {'form': form})
+    return render(request, 'registration/register.html', {'form': form}, status=status)
+
 
+class LoginView(auth_views.LoginView):
+    """E-postayla giriş; hız sınırı aşıldığında 429, özetleme havuzu doluysa 503 döner"""
+    authentication_form = CustomAuthenticationForm
 
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if form.limit_message == throttle.MESSAGE:
+            response.status_code = 429
+        elif form.limit_message:
+            response.status_code = 503
+        return response
+
+
+@primary_db
 @login_required
+@image_uploads
 def edit_profile(request):
     """Profil düzenleme sayfası"""
     profile, created = UserProfile.objects.get_or_create(user=request.user)
@@ -169,9 +352,15 @@ def edit_profile(request):
     if request.method == 'POST':
         profile_form = UserProfileForm(request.POST, request.FILES, instance=profile)
         username_form = EditUsernameForm(request.POST, instance=request.user)
+
+        # Yükleme sırasında başlığından reddedilen dosyalar
+        for field_name, file_name, reason in getattr(request, 'rejected_uploads', []):
+            profile_form.add_error('profile_picture', reason)
         
         if profile_form.is_valid() and username_form.is_valid():
-            profile_form.save()
+            # Sadece formdaki alanları yaz; sayaçlar eski değerleriyle ezilmesin
+            profile = profile_form.save(commit=False)
+            profile.save(update_fields=UserProfileForm.Meta.fields)
             username_form.save()
             messages.success(request, 'Profiliniz başarıyla güncellendi!')
             return redirect('diary:user_profile', username=request.user.username)
@@ -185,13 +374,20 @@ def edit_profile(request):
     })
 
 
+@primary_db
 @login_required
 def delete_entry(request, entry_id):
     """Günlük girişini sil"""
     entry = get_object_or_404(DiaryEntry, id=entry_id, author=request.user)
     
     if request.method == 'POST':
-        entry.delete()
+        with transaction.atomic():
+            entry.delete()
+            UserProfile.adjust_counters(
+                request.user.id,
+                entry_count=-1,
+                public_entry_count=-int(entry.privacy == 'public'),
+            )
         messages.success(request, 'Günlük girişiniz silindi.')
         return redirect('diary:user_profile', username=request.user.username)
     
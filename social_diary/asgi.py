@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "social_diary.settings")
+# Akış ve takip görünümlerinin asenkron sürümleri (bkz. diary.async_views)
+os.environ.setdefault("DIARY_ASYNC_VIEWS", "True")
 
 application = get_asgi_application()
@@ -0,0 +1,40 @@
+"""
+Eşzamanlı gunicorn işçileri için ayarlanmış SQLite arka ucu.
+
+* Her bağlantı açılırken PRAGMA'lar uygulanır: WAL kipinde okuyucular
+  yazarı beklemez; synchronous=NORMAL WAL ile güvenlidir ve her işlemde
+  fsync yapmaz; busy_timeout kilitli veritabanında hata yerine bekletir.
+* Yazma işlemleri (transaction.atomic) BEGIN yerine BEGIN IMMEDIATE ile
+  başlar. Düz BEGIN ile okuyarak başlayan iki işlem aynı anda yazmaya
+  geçmeye çalışınca biri busy_timeout beklemeden "database is locked"
+  hatası alır; IMMEDIATE yazma kilidini baştan alır ve sıraya girer.
+
+PRAGMA'lar DATABASES OPTIONS içindeki "pragmas" sözlüğüyle değiştirilebilir.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Negatif değer KB cinsindendir: bağlantı başına ~20 MB sayfa önbelleği
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -45,10 +45,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Statik ve medya dosyaları sonraki ara katmanlara girmeden sunulur
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "diary.media.MediaMiddleware",
+    # Sorgu bütçesinin Server-Timing başlığına parola özetleme süresini ekler
+    "diary.passwords.HashTimingMiddleware",
+    "diary.querybudget.QueryBudgetMiddleware",
+    "diary.routers.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "diary.authcache.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -77,14 +84,33 @@ WSGI_APPLICATION = "social_diary.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# WAL, bağlantı PRAGMA'ları ve BEGIN IMMEDIATE ile SQLite (bkz. social_diary/db/base.py)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "social_diary.db",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # sqlite3.connect zaman aşımı (saniye); busy_timeout ile aynı
+            "timeout": 5,
+        },
     }
 }
 
 
+# Okuma kopyaları (bkz. diary/routers.py). Örn. iki yerel SQLite kopyası:
+# DIARY_REPLICA_DATABASES="/yol/replica1.sqlite3,/yol/replica2.sqlite3"
+# Kopyaların birincilden güncel tutulması (litestream, pg akış çoğaltması vb.) dışarıdadır.
+DIARY_READ_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get('DIARY_REPLICA_DATABASES', '').split(',')), 1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': name, 'TEST': {'MIRROR': 'default'}}
+    DIARY_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['diary.routers.ReplicaRouter']
+# Yazma isteğinden sonra istemcinin okumaları bu kadar saniye birincilden yapılır
+DIARY_REPLICA_STICKY_SECONDS = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -116,6 +142,36 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Giriş e-posta ile (admin için kullanıcı adıyla) yapılır
+AUTHENTICATION_BACKENDS = ['diary.backends.EmailBackend']
+
+# Yeni parolalar DIARY_PASSWORD_HASHER ile özetlenir; listedeki diğer
+# özetleyicilerle kayıtlı parolalar başarılı girişte yeniden özetlenir.
+# 'argon2' için argon2-cffi paketi kurulmalıdır.
+_PASSWORD_HASHERS = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+DIARY_PASSWORD_HASHER = os.environ.get('DIARY_PASSWORD_HASHER', 'scrypt')
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[DIARY_PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != DIARY_PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Parola özetleme havuzu (bkz. diary.passwords): iş parçacığı sayısı,
+# sırada bekleyebilecek özetleme sayısı ve sıraya girmek için beklenen süre (sn)
+DIARY_HASH_WORKERS = int(os.environ.get('DIARY_HASH_WORKERS', '2'))
+DIARY_HASH_QUEUE = 8
+DIARY_HASH_WAIT = 2
+
+# Giriş/kayıt hız sınırları (bkz. diary.throttle): (deneme, pencere sn)
+DIARY_THROTTLE_CACHE = 'throttle'
+DIARY_THROTTLE_RATES = {
+    'login-ip': (20, 5 * 60),
+    'login-email': (5, 15 * 60),
+    'register-ip': (10, 60 * 60),
+}
+
 # Login/Logout Redirects
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -130,11 +186,123 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [
     BASE_DIR / "diary" / "static",
 ]
+# collectstatic dosya adlarına içerik özeti ekler ve gzip (Brotli kuruluysa
+# .br) kopyalarını üretir; WhiteNoise özetli adları bir yıl immutable sunar.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "diary.storage.StaticStorage"},
+}
 
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 # PythonAnywhere'de kullanıcı tarafından yüklenen dosyaların (media) saklanacağı dizin.
+# Medya dosyalarını web sunucusuna bıraktırmak için (bkz. diary.media):
+# 'X-Accel-Redirect' (nginx) ya da 'X-Sendfile' (Apache/lighttpd)
+DIARY_MEDIA_SENDFILE = os.environ.get('DIARY_MEDIA_SENDFILE') or None
+# X-Accel-Redirect için MEDIA_ROOT'a alias verilmiş nginx internal location'ı
+DIARY_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Fotoğraf görünümlerinde yüklemelerin SHA-256 özeti ve resim başlığı dosya
+# gelirken kontrol edilir (bkz. diary.uploadhandlers.image_uploads)
+# Bellekte tutulacak en büyük yükleme; daha büyükleri geçici dosyaya akar
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# Başlıkta bundan fazla piksel bildiren resimler hiç kaydedilmez
+DIARY_UPLOAD_MAX_PIXELS = 40_000_000
+
+# Önbellek: varsayılan süreç içi bellek. Birden çok süreç çalışıyorsa
+# DIARY_CACHE_DIR ile dosya tabanlı (süreçler arası paylaşılan) önbellek seçilir.
+if os.environ.get('DIARY_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DIARY_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'diary',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+# Giriş/kayıt hız sınırı sayaçları her zaman süreç içindedir (bkz. diary.throttle)
+CACHES['throttle'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'diary-throttle',
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+}
+
+# Oturum, kullanıcı/profil ve takip edilenler önbellekten okunur (bkz.
+# diary.authcache). Süreç içi önbellekte çıkış yapan kullanıcı diğer
+# süreçlerde oturumlu kalabileceği için varsayılan olarak sadece paylaşılan
+# önbellekle açılır; tek süreçli sunucuda DIARY_AUTH_CACHE=True verilebilir.
+DIARY_AUTH_CACHE = os.environ.get('DIARY_AUTH_CACHE', str(bool(os.environ.get('DIARY_CACHE_DIR')))) == 'True'
+DIARY_AUTH_CACHE_TIMEOUT = 60 * 60
+# Oturumlar veritabanına yazılır, önbellekten okunur (write-through)
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if DIARY_AUTH_CACHE else 'django.contrib.sessions.backends.db'
+)
+
+# Ana sayfa, profil ve takvim yanıtları ETag ile doğrulanır ve
+# 'Cache-Control: private' gönderilir; tarayıcı bu kadar saniye boyunca
+# sunucuya sormadan kopyasını kullanabilir (bkz. diary.conditional)
+DIARY_PRIVATE_MAX_AGE = 0
+# ETag sürümleri önbellekte tutulur; süreç içi önbellekte diğer süreçler eski
+# bir 304 döndürebileceğinden varsayılan olarak sadece DIARY_CACHE_DIR ile açılır.
+DIARY_ETAGS = os.environ.get('DIARY_ETAGS', str(bool(os.environ.get('DIARY_CACHE_DIR')))) == 'True'
+
+# Akış kartı önbelleği (bkz. diary.cards). Kart nesilleri süreç içi önbellekte
+# diğer süreçlerde artmadığından varsayılan olarak sadece DIARY_CACHE_DIR ile
+# açılır.
+DIARY_CARD_CACHE_ENABLED = os.environ.get(
+    'DIARY_CARD_CACHE_ENABLED', str(bool(os.environ.get('DIARY_CACHE_DIR')))
+) == 'True'
+DIARY_CARD_CACHE = 'default'
+DIARY_CARD_CACHE_TIMEOUT = int(os.environ.get('DIARY_CARD_CACHE_TIMEOUT', 60 * 60 * 24))
+# Landing sayfası ve boş akışların paylaştığı herkese açık son girişler
+# listesinin ömrü (sn, bkz. diary.feeds)
+DIARY_PUBLIC_FEED_TIMEOUT = 60
+
+# Görünüm başına en fazla SQL sorgusu (bkz. diary.querybudget). Oturum ve
+# kullanıcı sorguları dahildir; önbellek boşken çalışan sorgular hesaba katılır.
+DIARY_QUERY_BUDGETS = {
+    'diary:home': 10,
+    'diary:feed_cards': 7,
+    'diary:feed_json': 7,
+    'diary:feed_stream': 4,
+    'diary:profile': 5,
+    'diary:user_profile': 7,
+    'diary:profile_calendar': 4,
+    'diary:search': 4,
+    'diary:create_entry': 24,
+    'diary:follow_user': 14,
+    'diary:bulk_follow': 16,
+    'diary:register': 15,
+    'diary:edit_profile': 12,
+    'diary:delete_entry': 16,
+    'admin:*_changelist': 8,
+}
+# 'raise' bütçe aşımında hata fırlatır (geliştirme/test), 'log' uyarı yazar
+DIARY_QUERY_BUDGET_ACTION = os.environ.get('DIARY_QUERY_BUDGET_ACTION', 'raise' if DEBUG else 'log')
+# Sorgu sayısı ve süresi Server-Timing başlığında gönderilsin mi
+DIARY_QUERY_BUDGET_HEADERS = DEBUG
+
+# home, profile ve follow_user için diary.async_views kullanılsın mı.
+# ASGI sunucusunda (asgi.py) varsayılan olarak açıktır.
+DIARY_ASYNC_VIEWS = os.environ.get('DIARY_ASYNC_VIEWS', 'False') == 'True'
+
+# Anlık akış bildirimleri (bkz. diary.realtime). Birden fazla ASGI süreci
+# için süreçler arası bir Broker sınıfı verilmelidir.
+DIARY_REALTIME_BROKER = 'diary.realtime.InProcessBroker'
+# Boştaki akışa gönderilen yorum satırı aralığı ve akışın en uzun ömrü (sn)
+DIARY_REALTIME_HEARTBEAT = 25
+DIARY_REALTIME_MAX_AGE = 300
+
+# Yüklenen resimleri boyutlandıran web süreci içi iş parçacığı sayısı.
+# 0 yapılırsa işler sadece "python manage.py process_images --loop" ile işlenir.
+DIARY_IMAGE_WORKERS = int(os.environ.get('DIARY_IMAGE_WORKERS', '2'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -16,19 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
-from diary.forms import CustomAuthenticationForm
+from diary.views import LoginView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('', include('diary.urls')),
-    path('accounts/login/', auth_views.LoginView.as_view(
-        authentication_form=CustomAuthenticationForm
-    ), name='login'),
+    path('accounts/login/', LoginView.as_view(), name='login'),
     path('accounts/logout/', auth_views.LogoutView.as_view(), name='logout'),
 ]
 
-# Media files için hem development hem de production ortamında
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media dosyaları URL çözümlemesine gelmeden diary.media.MediaMiddleware ile sunulur
@@ -170,11 +170,10 @@ function toggleFollow(username) {
             btn.classList.add('btn-primary');
         }
         
-        // Update follower count if element exists
+        // Update follower count with the authoritative value from the server
         const followerCount = document.querySelector('.follower-count');
-        if (followerCount) {
-            const current = parseInt(followerCount.textContent);
-            followerCount.textContent = data.is_following ? current + 1 : current - 1;
+        if (followerCount && data.followers_count !== null) {
+            followerCount.textContent = data.followers_count;
         }
     })
     .catch(error => {
@@ -205,11 +204,13 @@ function showAlert(message, type = 'info') {
 }
 
 // Infinite scroll for feed
+// Sunucu imleç (cursor) tabanlı sayfalama kullanır; bir sonraki sayfanın
+// adresi her zaman sayfadaki rel="next" bağlantısından okunur.
 let loading = false;
-let currentPage = 1;
 
 function loadMoreEntries() {
-    if (loading) return;
+    const nextLink = document.querySelector('a[rel="next"]');
+    if (loading || !nextLink) return;
     
     loading = true;
     const loadingIndicator = document.getElementById('loadingIndicator');
@@ -217,7 +218,7 @@ function loadMoreEntries() {
         loadingIndicator.style.display = 'block';
     }
     
-    fetch(`?page=${currentPage + 1}`, {
+    fetch(nextLink.href, {
         headers: {
             'X-Requested-With': 'XMLHttpRequest'
         }
@@ -227,14 +228,22 @@ function loadMoreEntries() {
         const parser = new DOMParser();
         const doc = parser.parseFromString(html, 'text/html');
         const newEntries = doc.querySelectorAll('.diary-card');
+        const entriesContainer = document.querySelector('.entries-container');
         
-        if (newEntries.length > 0) {
-            const entriesContainer = document.querySelector('.entries-container');
-            if (entriesContainer) {
-                newEntries.forEach(entry => {
-                    entriesContainer.appendChild(entry);
-                });
-                currentPage++;
+        if (newEntries.length > 0 && entriesContainer) {
+            newEntries.forEach(entry => {
+                entriesContainer.appendChild(entry);
+            });
+
+            // Sayfalama bağlantısını yeni sayfanınkiyle değiştir
+            const currentNav = document.querySelector('nav[aria-label="Sayfa navigasyonu"]');
+            const newNav = doc.querySelector('nav[aria-label="Sayfa navigasyonu"]');
+            if (currentNav) {
+                if (newNav) {
+                    currentNav.replaceWith(newNav);
+                } else {
+                    currentNav.remove();
+                }
             }
         }
         